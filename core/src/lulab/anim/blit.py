@@ -0,0 +1,240 @@
+"""
+blit.py
+Blit-based animation export: the static layer is drawn once, per frame only what moves.
+
+The ANIM_001-003 helpers build FuncAnimation(..., blit=False), and
+anim.save() redraws the whole figure (axes, grid, legend, colour bars,
+background images) for every frame regardless of blit. Here
+- the artists an update returns are the dynamic layer
+- per axes, static artists below the lowest dynamic zorder are drawn
+  once into a cached background; static artists above the highest
+  dynamic zorder (spines, legend, texts, ...) are drawn once onto a
+  transparent overlay; the few in between are redrawn with the frame
+- a frame = restore background, draw dynamic artists, composite the
+  overlay pixels (only the non-transparent ones), hand the Agg buffer
+  to the writer (RawPipeWriter / FFMpegWriter pipe / PillowWriter)
+  without a savefig
+If an update changes axis limits, the layers are rebuilt for that frame.
+Result is the same image as a full redraw (up to rounding at antialiased
+overlay edges).
+
+Dynamic artists must be returned by update (as for FuncAnimation
+blit=True); anything else that changes between frames is frozen.
+
+Usage:
+    from lulab.anim.blit import BlitAnimation
+    from lulab.anim.defaults import save_animation
+
+    anim = BlitAnimation(fig, update, frames=80)            # update(frame) -> artists
+    save_animation(anim, OUT_DIR / "ANIM_scatter_reveal")
+
+    # or keep the notebook's FuncAnimation and export it with blitting:
+    save_animation(ani, OUT_DIR / "ANIM_hist_reveal", blit=True)
+"""
+
+from __future__ import annotations
+
+import itertools
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+
+class BlitAnimation:
+    """
+    update(frame, *fargs) -> iterable of the artists it changed.
+
+    frames : int (range) or iterable of frame data, as for FuncAnimation
+    init   : optional init(); its artists are static unless update returns them
+    """
+
+    def __init__(self, fig, update: Callable[..., Optional[Iterable[Any]]],
+                 frames: Any = None, *,
+                 init: Optional[Callable[[], Any]] = None,
+                 fargs: Sequence[Any] = (),
+                 save_count: Optional[int] = None):
+        self.fig = fig
+        self.update = update
+        self.init = init
+        self.fargs = tuple(fargs)
+        self._frames = frames
+        self.save_count = save_count
+
+    @classmethod
+    def from_func_animation(cls, anim) -> "BlitAnimation":
+        """
+        Same figure / update / frames as a FuncAnimation (its timer is not used).
+
+        FuncAnimation has no public accessors for these, so its private
+        attributes are read; if a matplotlib release renames them this
+        raises, and BlitAnimation(fig, update, frames, ...) works instead.
+        """
+        import matplotlib
+
+        attrs = ("_fig", "_func", "_init_func", "_args", "_save_count", "new_saved_frame_seq")
+        missing = [a for a in attrs if not hasattr(anim, a)]
+        if missing:
+            raise TypeError(f"Cannot read {missing} from this FuncAnimation (matplotlib "
+                            f"{matplotlib.__version__}); build BlitAnimation(fig, update, frames, "
+                            "init=..., fargs=...) directly")
+        if hasattr(anim, "_draw_was_started"):
+            anim._draw_was_started = True                     # no "deleted without rendering" warning
+        return cls(anim._fig, anim._func, anim.new_saved_frame_seq, init=anim._init_func,
+                   fargs=anim._args or (), save_count=anim._save_count)
+
+    def frame_seq(self) -> Iterator[Any]:
+        f = self._frames
+        if callable(f) and not hasattr(f, "__len__"):
+            f = f()                                           # FuncAnimation.new_saved_frame_seq
+        if f is None:
+            return itertools.count()
+        if isinstance(f, (int, np.integer)):
+            return iter(range(int(f)))
+        seq = iter(f)
+        return seq if self.save_count is None else itertools.islice(seq, self.save_count)
+
+    # -------------------------
+    # Layers
+    # -------------------------
+    def _layers(self, canvas, dynamic: List[Any]) -> Dict[str, Any]:
+        """Background region, overlay pixels and the per-frame draw list."""
+        fig = self.fig
+        dyn = set(dynamic)
+        per_frame: List[Any] = []
+        overlay: List[Any] = []
+        for ax in fig.axes:
+            mine = [a for a in ax.get_children() if a in dyn]
+            if not mine:
+                continue
+            zmin = min(a.get_zorder() for a in mine)
+            zmax = max(a.get_zorder() for a in mine)
+            middle, above = [], []
+            for a in ax.get_children():
+                if a is ax.patch or not a.get_visible():
+                    continue
+                z = a.get_zorder()
+                if a in dyn or zmin <= z <= zmax:
+                    middle.append(a)
+                elif z > zmax:
+                    above.append(a)
+            # Axes.draw order: zorder, ties in child order (sort is stable)
+            per_frame += sorted(middle, key=lambda a: a.get_zorder())
+            overlay += sorted(above, key=lambda a: a.get_zorder())
+        per_frame += [a for a in dynamic if a.axes is None]   # figure-level dynamic artists
+
+        hidden = per_frame + overlay
+        flags = [a.get_animated() for a in hidden]
+        for a in hidden:
+            a.set_animated(True)                              # canvas.draw() skips them
+        try:
+            canvas.draw()
+            background = canvas.copy_from_bbox(fig.bbox)
+            renderer = canvas.get_renderer()
+            renderer.clear()
+            for a in overlay:
+                a.draw(renderer)
+            px = np.asarray(canvas.buffer_rgba()).reshape(-1, 4)
+            idx = np.flatnonzero(px[:, 3])
+            rgba = px[idx].astype(np.float32)
+        finally:
+            for a, f in zip(hidden, flags):
+                a.set_animated(f)
+        return {
+            "background": background,
+            "per_frame": per_frame,
+            "overlay_idx": idx,
+            "overlay_rgb": rgba[:, :3],
+            "overlay_a": rgba[:, 3:] / 255.0,
+            "limits": [ax.viewLim.frozen().get_points().copy() for ax in fig.axes],
+        }
+
+    def _limits_changed(self, layers: Dict[str, Any]) -> bool:
+        return any(not np.array_equal(ax.viewLim.get_points(), lim)
+                   for ax, lim in zip(self.fig.axes, layers["limits"]))
+
+    def _compose(self, canvas, layers: Dict[str, Any]) -> np.ndarray:
+        canvas.restore_region(layers["background"])
+        renderer = canvas.get_renderer()
+        for a in layers["per_frame"]:
+            a.draw(renderer)
+        buf = np.asarray(canvas.buffer_rgba())
+        flat = buf.reshape(-1, 4)
+        idx, a = layers["overlay_idx"], layers["overlay_a"]
+        if idx.size:
+            under = flat[idx, :3].astype(np.float32)
+            flat[idx, :3] = (layers["overlay_rgb"] * a + under * (1.0 - a) + 0.5).astype(np.uint8)
+            flat[idx, 3] = np.maximum(flat[idx, 3], (a[:, 0] * 255 + 0.5).astype(np.uint8))
+        return buf
+
+    # -------------------------
+    # Frames
+    # -------------------------
+    def iter_frames(self, dpi: Optional[float] = None) -> Iterator[np.ndarray]:
+        """RGBA buffer per frame (a view into the canvas: copy it to keep it)."""
+        with _agg_canvas(self.fig, dpi) as canvas:
+            if self.init is not None:
+                self.init()
+            layers = None
+            for frame in self.frame_seq():
+                changed = self.update(frame, *self.fargs)
+                if layers is None:
+                    dynamic = [a for a in (changed or ()) if a is not None]
+                    if not dynamic:
+                        raise ValueError("update() returned no artists; blitting needs the changed artists")
+                    layers = self._layers(canvas, dynamic)
+                elif self._limits_changed(layers):
+                    layers = self._layers(canvas, dynamic)
+                yield self._compose(canvas, layers)
+
+    def save(self, filename, writer=None, fps: Optional[int] = None, dpi: Optional[float] = None,
+             **kwargs) -> None:
+        """Drop-in for Animation.save with a MovieWriter instance (as save_animation passes)."""
+        from matplotlib.animation import PillowWriter
+
+        if writer is None or isinstance(writer, str):
+            raise TypeError("BlitAnimation.save needs a writer instance (FFMpegWriter / PillowWriter)")
+        dpi = self.fig.dpi if dpi is None else dpi
+        with writer.saving(self.fig, filename, dpi):
+            for rgba in self.iter_frames(writer.dpi):
+                _emit(writer, rgba, PillowWriter)
+
+
+# -------------------------
+# Writers and canvas
+# -------------------------
+def _emit(writer, rgba: np.ndarray, pillow_cls) -> None:
+    """Hand one RGBA frame to a matplotlib writer without re-rendering."""
+    from matplotlib.animation import FileMovieWriter, MovieWriter
+
+    h, w = rgba.shape[:2]
+    if tuple(writer.frame_size) != (w, h):
+        raise ValueError(f"frame is {w}x{h} px, writer expects {writer.frame_size}")
+    if hasattr(writer, "write_rgba"):                          # lulab.anim.pipe.RawPipeWriter
+        writer.write_rgba(rgba)
+    elif isinstance(writer, pillow_cls):
+        from PIL import Image
+
+        im = Image.frombuffer("RGBA", (w, h), rgba.tobytes(), "raw", "RGBA", 0, 1)
+        writer._frames.append(im if im.getextrema()[3][0] < 255 else im.convert("RGB"))
+    elif (isinstance(writer, MovieWriter) and not isinstance(writer, FileMovieWriter)
+          and writer.frame_format in ("rgba", "raw")):
+        writer._proc.stdin.write(memoryview(rgba).cast("B"))
+    else:
+        writer.grab_frame()                                   # other writers: full redraw
+
+
+@contextmanager
+def _agg_canvas(fig, dpi: Optional[float]) -> Iterator:
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    old_canvas, old_dpi = fig.canvas, fig.dpi
+    canvas = old_canvas if isinstance(old_canvas, FigureCanvasAgg) else FigureCanvasAgg(fig)
+    if dpi is not None:
+        fig.dpi = dpi
+    try:
+        yield canvas
+    finally:
+        fig.dpi = old_dpi
+        if canvas is not old_canvas:
+            fig.set_canvas(old_canvas)
@@ -6,7 +6,8 @@ Extracted & normalized from ANIM_001_EN.ipynb:
 - export settings (format, fps, dpi, codecs)
 - theme handling (light/dark rcParams)
 - project path discovery (topics/.../animations)
-- save_animation() helper (MP4/GIF)
+- save_animation() helper (MP4/GIF; segments in parallel for
+  lulab.anim.parallel.SegmentedAnimation)
 
 Usage in notebooks:
     from lulab.anim.defaults import apply_theme, save_animation, THEME
@@ -40,6 +41,11 @@ DPI: int = 150
 MP4_CODEC: str = "libx264"
 MP4_BITRATE: int = 1800
 
+# stream raw canvas buffers to ffmpeg from an encoder thread (lulab.anim.pipe);
+# False: matplotlib's FFMpegWriter
+MP4_PIPE_WRITER: bool = True
+MP4_THREADS: int = 0  # ffmpeg -threads, 0 = auto
+
 # keep MP4 broadly compatible
 MP4_EXTRA_ARGS = [
     "-pix_fmt", "yuv420p",
@@ -49,6 +55,10 @@ MP4_EXTRA_ARGS = [
 GIF_WRITER: str = "pillow"
 GIF_LOOP: int = 0  # 0 = infinite
 
+# draw the static layer once per export (lulab.anim.blit); off by default
+# because update() must return every artist it changes
+BLIT_EXPORT: bool = False
+
 # =================================================
 # Theme settings
 # =================================================
@@ -140,14 +150,17 @@ def save_animation(anim, out_path_base: Path, *,
                    dpi: int = DPI,
                    mp4_codec: str = MP4_CODEC,
                    mp4_bitrate: int = MP4_BITRATE,
-                   gif_loop: int = GIF_LOOP) -> Path:
+                   gif_loop: int = GIF_LOOP,
+                   blit: bool = BLIT_EXPORT,
+                   workers: Optional[int] = None) -> Path:
     """
     Save a matplotlib animation as MP4 or GIF.
 
     Parameters
     ----------
-    anim : matplotlib.animation.Animation
-        The animation object (e.g., FuncAnimation).
+    anim : matplotlib.animation.Animation or lulab.anim.parallel.SegmentedAnimation
+        The animation object (e.g., FuncAnimation). A SegmentedAnimation
+        is rendered in frame-range segments over a process pool.
     out_path_base : Path
         Output path without suffix (suffix is added based on format).
     fmt : {'mp4','gif'}, optional
@@ -158,7 +171,23 @@ def save_animation(anim, out_path_base: Path, *,
         FFmpeg encoder settings.
     gif_loop : int
         GIF loop count. 0 = infinite.
+    blit : bool
+        Export a FuncAnimation through lulab.anim.blit.BlitAnimation: the
+        static layer is drawn once, per frame only the artists its update
+        returns. A BlitAnimation is always exported that way.
+    workers : int, optional
+        SegmentedAnimation only: worker processes (default: CPU count).
     """
+    from lulab.anim.parallel import SegmentedAnimation, save_segmented
+
+    segmented = isinstance(anim, SegmentedAnimation)
+    if blit and not segmented:
+        from matplotlib.animation import FuncAnimation
+        from lulab.anim.blit import BlitAnimation
+
+        if isinstance(anim, FuncAnimation):
+            anim = BlitAnimation.from_func_animation(anim)
+
     out_path_base = Path(out_path_base)
     out_path_base.parent.mkdir(parents=True, exist_ok=True)
 
@@ -166,19 +195,28 @@ def save_animation(anim, out_path_base: Path, *,
     if fmt2 == "mp4":
         out_file = out_path_base.with_suffix(".mp4")
         print("Target:", out_file.resolve())
-        writer = FFMpegWriter(
-            fps=fps,
-            codec=mp4_codec,
-            bitrate=mp4_bitrate,
-            extra_args=MP4_EXTRA_ARGS,
-        )
-        anim.save(out_file, writer=writer, dpi=dpi)
+        writer_kw = dict(codec=mp4_codec, bitrate=mp4_bitrate, extra_args=MP4_EXTRA_ARGS)
+        if segmented:
+            save_segmented(anim, out_file, fmt="mp4", fps=fps, dpi=dpi, workers=workers,
+                           writer_kw=writer_kw, blit=blit)
+        elif MP4_PIPE_WRITER:
+            from lulab.anim.pipe import RawPipeWriter
+
+            anim.save(out_file, writer=RawPipeWriter(fps=fps, threads=MP4_THREADS, **writer_kw),
+                      dpi=dpi)
+        else:
+            anim.save(out_file, writer=FFMpegWriter(fps=fps, **writer_kw), dpi=dpi)
         print("Saved:", out_file.resolve(), "exists:", out_file.exists())
         return out_file
 
     if fmt2 == "gif":
         out_file = out_path_base.with_suffix(".gif")
         print("Target:", out_file.resolve())
+        if segmented:
+            save_segmented(anim, out_file, fmt="gif", fps=fps, dpi=dpi, workers=workers,
+                           gif_loop=gif_loop, blit=blit)
+            print("Saved:", out_file.resolve(), "exists:", out_file.exists())
+            return out_file
         # loop isn't supported in some older matplotlibs
         try:
             writer = PillowWriter(fps=fps, loop=gif_loop)
@@ -0,0 +1,206 @@
+"""
+kinematics.py
+Precomputed face-on disk kinematics for rotation / migration animations.
+
+ANIM_003 recomputes R, phi and cos/sin for every star on every frame.
+Here everything that does not depend on time is computed once:
+- a tabulated rotation curve -> per-star angular velocity Omega(R)
+- per-star migration offsets, azimuthal drift, start times, 1/duration
+- a cached cos/sin table (phase -> nearest entry, no trig per frame)
+
+so a frame is a handful of fused array ops written into a reusable
+(N, 2) offsets buffer, ready for scatter.set_offsets().
+
+Usage:
+    from lulab.anim.kinematics import RotationCurve, DiskTracks
+
+    curve = RotationCurve.flat(220.0, r_min=0.8)
+    tracks = DiskTracks.build(R0, phi0, dr=dR_end,
+                              omega=ROTATION_SCALE * curve.omega(R0),
+                              t_start=3.0, t_end=13.5, r_clip=(0.5, 20.0))
+
+    def update(i):
+        xy, active = tracks.at(times[i])
+        sc.set_offsets(xy)
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Callable, Optional, Tuple
+
+import numpy as np
+
+KMS_TO_KPC_PER_GYR: float = 1.022712
+
+# 2^14 entries: worst-case position error R * pi / 2^14 ~ 4 pc at 20 kpc
+TRIG_BITS: int = 14
+
+
+# -------------------------
+# Easing
+# -------------------------
+def ease_in_out(x: np.ndarray) -> np.ndarray:
+    """Cosine ease (ANIM_003 face-on cell)."""
+    return 0.5 - 0.5 * np.cos(np.pi * x)
+
+
+def smoothstep(x: np.ndarray) -> np.ndarray:
+    """x^2 (3 - 2x) ease (ANIM_003 inside-out cell)."""
+    return x * x * (3.0 - 2.0 * x)
+
+
+def linear(x: np.ndarray) -> np.ndarray:
+    return x
+
+
+# -------------------------
+# Cached cos / sin
+# -------------------------
+@lru_cache(maxsize=4)
+def _trig_table(bits: int, dtype: str) -> Tuple[np.ndarray, np.ndarray, float]:
+    n = 1 << bits
+    a = np.arange(n) * (2.0 * np.pi / n)
+    return np.cos(a).astype(dtype), np.sin(a).astype(dtype), n / (2.0 * np.pi)
+
+
+def cos_sin(phase: np.ndarray, *, bits: int = TRIG_BITS,
+            dtype=np.float64) -> Tuple[np.ndarray, np.ndarray]:
+    """Table-lookup cos / sin of phase (rad), nearest of 2^bits entries."""
+    c, s, scale = _trig_table(int(bits), np.dtype(dtype).name)
+    k = np.rint(np.multiply(phase, scale)).astype(np.int64)
+    k &= c.size - 1
+    return c[k], s[k]
+
+
+# -------------------------
+# Rotation curve
+# -------------------------
+@dataclass
+class RotationCurve:
+    """Tabulated circular velocity v_c(R) in km/s."""
+
+    r_kpc: np.ndarray
+    v_kms: np.ndarray
+    r_min: float = 0.8   # Omega = v / max(R, r_min) keeps the centre finite
+
+    @classmethod
+    def flat(cls, v_kms: float = 220.0, *, r_min: float = 0.8,
+             r_max: float = 30.0) -> "RotationCurve":
+        """Flat curve, as in the ANIM_003 face-on cell (V = 220 km/s)."""
+        return cls(np.array([0.0, r_max]), np.array([v_kms, v_kms]), r_min)
+
+    @classmethod
+    def from_function(cls, fn: Callable[[np.ndarray], np.ndarray], *,
+                      r_max: float = 30.0, n: int = 512,
+                      r_min: float = 0.8) -> "RotationCurve":
+        """Tabulate any v_c(R) (km/s) once on a uniform grid."""
+        r = np.linspace(0.0, r_max, n)
+        return cls(r, np.asarray(fn(r), dtype=float), r_min)
+
+    def v(self, R: np.ndarray) -> np.ndarray:
+        return np.interp(R, self.r_kpc, self.v_kms)
+
+    def omega(self, R: np.ndarray) -> np.ndarray:
+        """Angular velocity in rad/Gyr."""
+        R = np.asarray(R, dtype=float)
+        return self.v(R) * KMS_TO_KPC_PER_GYR / np.maximum(R, self.r_min)
+
+
+# -------------------------
+# Per-star tracks
+# -------------------------
+@dataclass
+class DiskTracks:
+    """
+    Closed-form face-on tracks for N stars.
+
+    R(t)   = clip(r0 + dr * ease(p))
+    phi(t) = phi0 + dphi * ease(p) + omega * (t - t_ref)
+    p      = clip((t - t_start) / (t_end - t_start), 0, 1)
+
+    Stars with t < t_start are inactive (not yet born).
+    """
+
+    r0: np.ndarray
+    phi0: np.ndarray
+    dr: np.ndarray
+    dphi: np.ndarray
+    omega: np.ndarray          # rad/Gyr, 0 for "no rotation"
+    t_start: np.ndarray
+    inv_dur: np.ndarray        # 1 / (t_end - t_start), precomputed
+    t_end: float
+    t_ref: float
+    r_clip: Tuple[float, float]
+    ease: Callable[[np.ndarray], np.ndarray] = ease_in_out
+    dtype: type = np.float64
+
+    def __post_init__(self) -> None:
+        self._xy = np.empty((self.r0.size, 2), dtype=self.dtype)
+        # one shared start time: progress is a scalar, not N eases per frame
+        self._uniform = bool(self.t_start.size) and bool(np.all(self.t_start == self.t_start[0]))
+
+    @classmethod
+    def build(cls, r0, phi0, *,
+              dr=0.0, dphi=0.0, omega=0.0,
+              t_start=0.0, t_end: float = 13.5,
+              t_ref: Optional[float] = None,
+              r_clip: Tuple[float, float] = (0.0, np.inf),
+              ease: Callable[[np.ndarray], np.ndarray] = ease_in_out,
+              dtype=np.float64) -> "DiskTracks":
+        """Broadcast and precompute everything that does not depend on t."""
+        r0 = np.asarray(r0, dtype=float)
+        n = r0.shape
+
+        def arr(v):
+            return np.broadcast_to(np.asarray(v, dtype=float), n).copy()
+
+        t_start = arr(t_start)
+        dur = np.maximum(t_end - t_start, 1e-6)
+        if t_ref is None:
+            t_ref = float(t_start.min()) if t_start.size else 0.0
+        return cls(r0=r0, phi0=arr(phi0), dr=arr(dr), dphi=arr(dphi),
+                   omega=arr(omega), t_start=t_start, inv_dur=1.0 / dur,
+                   t_end=float(t_end), t_ref=float(t_ref),
+                   r_clip=(float(r_clip[0]), float(r_clip[1])),
+                   ease=ease, dtype=dtype)
+
+    def progress(self, t: float):
+        if self._uniform:
+            p = (t - self.t_start[0]) * self.inv_dur[0]
+            return float(self.ease(min(max(p, 0.0), 1.0)))
+        p = (t - self.t_start) * self.inv_dur
+        np.clip(p, 0.0, 1.0, out=p)
+        return self.ease(p)
+
+    def at(self, t: float, out: Optional[np.ndarray] = None
+           ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        (xy, active) at time t (Gyr).
+
+        xy is an (N, 2) buffer reused between calls (pass out= to keep
+        frames); inactive stars still get positions, mask them with active.
+        """
+        e = self.progress(t)
+        R = self.r0 + self.dr * e
+        np.clip(R, *self.r_clip, out=R)
+
+        phase = self.omega * (t - self.t_ref)
+        phase += self.phi0
+        phase += self.dphi * e
+        c, s = cos_sin(phase, dtype=self.dtype)
+
+        xy = self._xy if out is None else out
+        np.multiply(R, c, out=xy[:, 0])
+        np.multiply(R, s, out=xy[:, 1])
+        return xy, self.t_start <= t
+
+    def track(self, i: int, times: np.ndarray) -> np.ndarray:
+        """(T, 2) path of one star (e.g. the Sun trail) over times."""
+        times = np.asarray(times, dtype=float)
+        p = np.clip((times - self.t_start[i]) * self.inv_dur[i], 0.0, 1.0)
+        e = self.ease(p)
+        R = np.clip(self.r0[i] + self.dr[i] * e, *self.r_clip)
+        phi = self.phi0[i] + self.dphi[i] * e + self.omega[i] * (times - self.t_ref)
+        return np.column_stack([R * np.cos(phi), R * np.sin(phi)])
@@ -0,0 +1,162 @@
+"""
+pipe.py
+MP4 writer that streams raw RGBA canvas buffers to ffmpeg from a background thread.
+
+FFMpegWriter.grab_frame() runs a full savefig(format="rgba") per frame
+and then blocks on the pipe write, so the figure sits idle while ffmpeg
+encodes and the other way round. RawPipeWriter instead
+- draws the Agg canvas and takes its buffer_rgba() (no savefig, no
+  intermediate image format); the pixels are copied once into a
+  recycled frame buffer, because the next draw reuses the canvas memory
+- hands the frame to a bounded queue; an encoder thread writes it to
+  ffmpeg's stdin (rawvideo, rgba, explicit size and rate) while the next
+  frame is rendered; a full queue makes rendering wait (bounded memory)
+- runs ffmpeg with an explicit output pix_fmt (yuv420p) and -threads
+With lulab.anim.blit the frames come as RGBA arrays and go straight to
+write_rgba(). Export time becomes the render time plus the last frame's
+encode.
+
+Usage:
+    from lulab.anim.pipe import RawPipeWriter
+
+    writer = RawPipeWriter(fps=24, codec="libx264", bitrate=1800)
+    anim.save(OUT_DIR / "ANIM_x.mp4", writer=writer, dpi=150)
+
+    # save_animation(..., fmt="mp4") uses it unless MP4_PIPE_WRITER is False
+"""
+
+from __future__ import annotations
+
+import logging
+import queue
+import shutil
+import subprocess
+import threading
+from typing import List, Optional, Sequence
+
+import matplotlib as mpl
+import numpy as np
+from matplotlib.animation import AbstractMovieWriter
+
+_log = logging.getLogger(__name__)
+
+# frames rendered ahead of the encoder
+QUEUE_SIZE: int = 4
+
+OUT_PIX_FMT: str = "yuv420p"
+
+
+class RawPipeWriter(AbstractMovieWriter):
+    """
+    fps, codec, bitrate : as FFMpegWriter (bitrate in kbit/s; <= 0 lets the codec decide)
+    extra_args          : output options, e.g. lulab.anim.defaults.MP4_EXTRA_ARGS
+    threads             : ffmpeg -threads (0 = ffmpeg's choice)
+    queue_size          : frames that may wait for the encoder
+    """
+
+    def __init__(self, fps: int = 5, codec: Optional[str] = None,
+                 bitrate: Optional[int] = None, extra_args: Optional[Sequence[str]] = None,
+                 metadata: Optional[dict] = None, *,
+                 threads: int = 0,
+                 queue_size: int = QUEUE_SIZE):
+        super().__init__(fps=fps, metadata=metadata, codec=codec, bitrate=bitrate)
+        if self.codec == "h264":
+            self.codec = "libx264"
+        self.extra_args = list(extra_args or [])
+        self.threads = int(threads)
+        self.queue_size = max(1, int(queue_size))
+
+    # -------------------------
+    # Process and encoder thread
+    # -------------------------
+    def _args(self, w: int, h: int) -> List[str]:
+        args = [mpl.rcParams["animation.ffmpeg_path"], "-y", "-loglevel", "error",
+                "-f", "rawvideo", "-pix_fmt", "rgba", "-s", f"{w}x{h}", "-framerate", str(self.fps),
+                "-i", "pipe:0", "-an", "-c:v", self.codec, "-threads", str(self.threads)]
+        if self.bitrate and self.bitrate > 0:
+            args += ["-b:v", f"{self.bitrate}k"]
+        for k, v in self.metadata.items():
+            args += ["-metadata", f"{k}={v}"]
+        args += self.extra_args
+        if "-pix_fmt" not in self.extra_args:
+            args += ["-pix_fmt", OUT_PIX_FMT]
+        return args + [str(self.outfile)]
+
+    def setup(self, fig, outfile, dpi=None) -> None:
+        super().setup(fig, outfile, dpi)
+        ffmpeg = mpl.rcParams["animation.ffmpeg_path"]
+        if shutil.which(ffmpeg) is None:
+            raise RuntimeError(f"ffmpeg not found ({ffmpeg}); MP4 export needs it")
+        self._w, self._h = fig.get_size_inches()
+        w, h = self.frame_size
+        self._shape = (h, w, 4)
+        self._proc = subprocess.Popen(self._args(w, h), stdin=subprocess.PIPE,
+                                      stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        self._queue: "queue.Queue[Optional[np.ndarray]]" = queue.Queue(self.queue_size)
+        self._free: "queue.Queue[np.ndarray]" = queue.Queue()
+        self._error: Optional[BaseException] = None
+        self._thread = threading.Thread(target=self._encode, name="RawPipeWriter", daemon=True)
+        self._thread.start()
+
+    def _encode(self) -> None:
+        stdin = self._proc.stdin
+        while True:
+            frame = self._queue.get()
+            if frame is None:
+                return
+            try:
+                if self._error is None:
+                    stdin.write(memoryview(frame).cast("B"))
+            except BaseException as e:                    # ffmpeg died: keep draining
+                self._error = e
+            self._free.put(frame)
+
+    def _buffer(self) -> np.ndarray:
+        try:
+            return self._free.get_nowait()
+        except queue.Empty:
+            return np.empty(self._shape, dtype=np.uint8)
+
+    # -------------------------
+    # Frames
+    # -------------------------
+    def write_rgba(self, rgba: np.ndarray) -> None:
+        """Queue one (h, w, 4) uint8 frame; blocks while the queue is full."""
+        if rgba.shape != self._shape:
+            raise ValueError(f"frame is {rgba.shape[1]}x{rgba.shape[0]} px, "
+                             f"writer expects {self._shape[1]}x{self._shape[0]}")
+        if self._error is not None:
+            raise RuntimeError(f"ffmpeg stopped accepting frames: {self._error}")
+        buf = self._buffer()
+        np.copyto(buf, rgba)
+        self._queue.put(buf)
+
+    def grab_frame(self, **savefig_kwargs) -> None:
+        """Draw the figure (as savefig would) and queue its canvas buffer."""
+        from lulab.anim.blit import _agg_canvas
+
+        fig = self.fig
+        fig.set_size_inches(self._w, self._h)
+        # Animation.save passes the (opaque) facecolor savefig would use
+        old_fc = fig.patch.get_facecolor()
+        if "facecolor" in savefig_kwargs:
+            fig.patch.set_facecolor(savefig_kwargs["facecolor"])
+        try:
+            with _agg_canvas(fig, self.dpi) as canvas:
+                canvas.draw()
+                self.write_rgba(np.asarray(canvas.buffer_rgba()))
+        finally:
+            fig.patch.set_facecolor(old_fc)
+
+    def finish(self) -> None:
+        self._queue.put(None)
+        self._thread.join()
+        _, err = self._proc.communicate()
+        err = err.decode(errors="replace") if err else ""
+        if err:
+            _log.log(logging.WARNING if self._proc.returncode else logging.DEBUG,
+                     "ffmpeg stderr:\n%s", err)
+        if self._proc.returncode:
+            raise subprocess.CalledProcessError(self._proc.returncode, self._proc.args, None, err)
+        if self._error is not None:
+            raise RuntimeError(f"ffmpeg stopped accepting frames: {self._error}")
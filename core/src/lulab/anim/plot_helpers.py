@@ -15,6 +15,8 @@ from typing import Tuple, Iterable, Optional
 import numpy as np
 import matplotlib.pyplot as plt
 
+from lulab.stats.binned import binned_stats
+
 # -------------------------
 # Figure / Axes factories
 # -------------------------
@@ -61,16 +63,9 @@ def binned_median(x: np.ndarray, y: np.ndarray,
                   bins: np.ndarray,
                   min_count: int = 200):
     """Return (x_mid, y_median) for bins with at least min_count."""
-    x = np.asarray(x); y = np.asarray(y)
-    idx = np.digitize(x, bins) - 1
-    xm, ym = [], []
-    for i in range(len(bins)-1):
-        sel = idx == i
-        if sel.sum() < min_count:
-            continue
-        xm.append(0.5*(bins[i] + bins[i+1]))
-        ym.append(np.nanmedian(y[sel]))
-    return np.array(xm), np.array(ym)
+    st = binned_stats(x, y, bins, q=(0.5,), min_count=min_count, mean=False)
+    keep = st.valid
+    return st.centers[keep], st.median[keep]
 
 # -------------------------
 # Text overlay helper
@@ -0,0 +1,225 @@
+"""
+galactic.py
+Pure-NumPy batched ICRS -> Galactic -> Galactocentric transforms.
+
+Replaces the astropy SkyCoord round-trip used in ACAP_002 DATA_ISM and
+ANIM_002 Cell 3 just to get R_gal / Z_gal for 10^5..10^6 stars:
+- rotation matrices are precomputed once per (R_sun, z_sun)
+- arrays are processed in fixed-size chunks into preallocated outputs
+- float32 inputs stay float32 (half the memory), float64 stays float64
+
+Conventions follow astropy's Galactocentric frame (GC at the origin,
+Sun at x = -R_sun, tilted so the Sun sits z_sun above the plane), and the
+ICRS -> Galactic matrix is the one astropy uses (via FK5 J2000). It
+differs from the Hipparcos-defined matrix by ~20 mas.
+
+Usage:
+    from lulab.coords.galactic import galactocentric_rz
+
+    R_gal, Z_gal = galactocentric_rz(ra_deg, dec_deg, dist_kpc, r_sun=8.2)
+"""
+
+from __future__ import annotations
+
+from functools import lru_cache
+from typing import Optional, Tuple
+
+import numpy as np
+
+from lulab.io.defaults import R_SUN_KPC
+
+# Galactic centre (ICRS) as in astropy's Galactocentric defaults
+RA_GC_DEG: float = 266.4051
+DEC_GC_DEG: float = -28.936175
+Z_SUN_KPC: float = 0.0208
+ROLL0_DEG: float = 58.5986320306   # aligns the x-z plane with the Galactic plane
+
+# ICRS unit vector -> Galactic unit vector (astropy ICRS -> FK5 J2000 -> Galactic)
+ICRS_TO_GAL = np.array([
+    [-0.0548756577125916, -0.8734370519556159, -0.4838350736167155],
+    [+0.4941094371927268, -0.4448297212232952, +0.7469821839866676],
+    [-0.8676661375596576, -0.1980763372730005, +0.4559838136873016],
+])
+
+CHUNK: int = 1 << 20
+
+
+# -------------------------
+# Matrices
+# -------------------------
+def _rot(angle_rad: float, axis: str) -> np.ndarray:
+    """Passive rotation matrix (same convention as astropy's rotation_matrix)."""
+    c, s = np.cos(angle_rad), np.sin(angle_rad)
+    if axis == "x":
+        return np.array([[1, 0, 0], [0, c, s], [0, -s, c]])
+    if axis == "y":
+        return np.array([[c, 0, -s], [0, 1, 0], [s, 0, c]])
+    if axis == "z":
+        return np.array([[c, s, 0], [-s, c, 0], [0, 0, 1]])
+    raise ValueError("axis must be 'x', 'y' or 'z'")
+
+
+@lru_cache(maxsize=32)
+def _galactocentric_matrix(r_sun: float, z_sun: float, roll_deg: float):
+    R = (_rot(np.deg2rad(ROLL0_DEG - roll_deg), "x")
+         @ _rot(-np.deg2rad(DEC_GC_DEG), "y")
+         @ _rot(np.deg2rad(RA_GC_DEG), "z"))
+    H = _rot(-np.arcsin(z_sun / r_sun), "y")
+    return H @ R, H @ np.array([-r_sun, 0.0, 0.0])
+
+
+def galactocentric_matrix(r_sun: float = R_SUN_KPC,
+                          z_sun: float = Z_SUN_KPC,
+                          roll_deg: float = 0.0) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    (M, offset) such that x_gc = M @ x_icrs + offset (kpc).
+
+    x_icrs is the heliocentric ICRS cartesian position. Cached per
+    (r_sun, z_sun, roll); returned arrays are copies.
+    """
+    M, off = _galactocentric_matrix(float(r_sun), float(z_sun), float(roll_deg))
+    return M.copy(), off.copy()
+
+
+# -------------------------
+# Batched kernels
+# -------------------------
+def _unit_vectors(lon_deg, lat_deg, dtype):
+    lon = np.deg2rad(np.asarray(lon_deg, dtype=dtype))
+    lat = np.deg2rad(np.asarray(lat_deg, dtype=dtype))
+    cl = np.cos(lat)
+    return cl * np.cos(lon), cl * np.sin(lon), np.sin(lat)
+
+
+def _apply(M, offset, ux, uy, uz, d):
+    """x_out = M @ (d * u) + offset, written as fused row sums."""
+    out = []
+    for i in range(3):
+        v = ux * M[i, 0]
+        v += uy * M[i, 1]
+        v += uz * M[i, 2]
+        if d is not None:
+            v *= d
+        if offset is not None:
+            v += offset[i]
+        out.append(v)
+    return out
+
+
+def _dtype_of(*arrays) -> np.dtype:
+    return np.result_type(*[np.asarray(a).dtype for a in arrays], np.float32)
+
+
+def icrs_to_galactic(ra_deg, dec_deg, *, chunk: int = CHUNK) -> Tuple[np.ndarray, np.ndarray]:
+    """ICRS (ra, dec) in degrees -> Galactic (l, b) in degrees."""
+    ra = np.asarray(ra_deg).ravel()
+    dec = np.asarray(dec_deg).ravel()
+    dtype = _dtype_of(ra, dec)
+    M = ICRS_TO_GAL.astype(dtype)
+
+    l = np.empty(ra.size, dtype=dtype)
+    b = np.empty(ra.size, dtype=dtype)
+    for s in range(0, ra.size, chunk):
+        sl = slice(s, s + chunk)
+        x, y, z = _apply(M, None, *_unit_vectors(ra[sl], dec[sl], dtype), None)
+        l[sl] = np.rad2deg(np.arctan2(y, x)) % 360.0
+        b[sl] = np.rad2deg(np.arctan2(z, np.hypot(x, y)))
+    return l, b
+
+
+def icrs_to_galactocentric(ra_deg, dec_deg, dist_kpc, *,
+                           r_sun: float = R_SUN_KPC,
+                           z_sun: float = Z_SUN_KPC,
+                           chunk: int = CHUNK) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """ICRS (ra, dec, distance) -> Galactocentric cartesian (x, y, z) in kpc."""
+    ra = np.asarray(ra_deg).ravel()
+    dec = np.asarray(dec_deg).ravel()
+    dist = np.asarray(dist_kpc).ravel()
+    dtype = _dtype_of(ra, dec, dist)
+    M, off = galactocentric_matrix(r_sun, z_sun)
+    M, off = M.astype(dtype), off.astype(dtype)
+
+    x = np.empty(ra.size, dtype=dtype)
+    y = np.empty(ra.size, dtype=dtype)
+    z = np.empty(ra.size, dtype=dtype)
+    for s in range(0, ra.size, chunk):
+        sl = slice(s, s + chunk)
+        d = dist[sl].astype(dtype, copy=False)
+        x[sl], y[sl], z[sl] = _apply(M, off, *_unit_vectors(ra[sl], dec[sl], dtype), d)
+    return x, y, z
+
+
+def galactic_to_galactocentric(l_deg, b_deg, dist_kpc, *,
+                               r_sun: float = R_SUN_KPC,
+                               z_sun: float = Z_SUN_KPC,
+                               chunk: int = CHUNK) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Galactic (l, b, distance) -> Galactocentric cartesian (x, y, z) in kpc."""
+    M, off = galactocentric_matrix(r_sun, z_sun)
+    M = M @ ICRS_TO_GAL.T   # Galactic -> ICRS -> Galactocentric in one matrix
+    l = np.asarray(l_deg).ravel()
+    b = np.asarray(b_deg).ravel()
+    dist = np.asarray(dist_kpc).ravel()
+    dtype = _dtype_of(l, b, dist)
+    M, off = M.astype(dtype), off.astype(dtype)
+
+    x = np.empty(l.size, dtype=dtype)
+    y = np.empty(l.size, dtype=dtype)
+    z = np.empty(l.size, dtype=dtype)
+    for s in range(0, l.size, chunk):
+        sl = slice(s, s + chunk)
+        d = dist[sl].astype(dtype, copy=False)
+        x[sl], y[sl], z[sl] = _apply(M, off, *_unit_vectors(l[sl], b[sl], dtype), d)
+    return x, y, z
+
+
+def galactocentric_rz(ra_deg, dec_deg, dist_kpc, *,
+                      r_sun: float = R_SUN_KPC,
+                      z_sun: float = Z_SUN_KPC,
+                      phi: bool = False,
+                      chunk: int = CHUNK):
+    """
+    Cylindrical R_gal, Z_gal (kpc) straight from ICRS; optionally also phi (deg).
+
+    This is what ACAP_002 DATA_ISM / ANIM_002 Cell 3 need:
+        R_gal, Z_gal = galactocentric_rz(m["ra"], m["dec"], m["dist_kpc"], r_sun=R_SUN)
+    """
+    x, y, z = icrs_to_galactocentric(ra_deg, dec_deg, dist_kpc,
+                                     r_sun=r_sun, z_sun=z_sun, chunk=chunk)
+    R = np.hypot(x, y)
+    if phi:
+        return R, z, np.rad2deg(np.arctan2(y, x))
+    return R, z
+
+
+def validate_against_astropy(n: int = 20_000, *,
+                             r_sun: float = 8.2,
+                             z_sun: float = Z_SUN_KPC,
+                             seed: Optional[int] = 0) -> dict:
+    """
+    Compare with astropy on random stars (astropy needed only here).
+
+    Returns max |d(l,b)| in mas and max |d(x,y,z)| in pc.
+    """
+    import astropy.units as u
+    from astropy.coordinates import SkyCoord, Galactocentric
+
+    rng = np.random.default_rng(seed)
+    ra = rng.uniform(0, 360, n)
+    dec = np.rad2deg(np.arcsin(rng.uniform(-1, 1, n)))
+    dist = rng.uniform(0.01, 20.0, n)
+
+    c = SkyCoord(ra=ra * u.deg, dec=dec * u.deg, distance=dist * u.kpc, frame="icrs")
+    g = c.galactic
+    gc = c.transform_to(Galactocentric(galcen_distance=r_sun * u.kpc, z_sun=z_sun * u.kpc))
+
+    l, b = icrs_to_galactic(ra, dec)
+    x, y, z = icrs_to_galactocentric(ra, dec, dist, r_sun=r_sun, z_sun=z_sun)
+
+    dl = (l - g.l.deg + 180.0) % 360.0 - 180.0
+    return {
+        "lb_mas": float(3.6e6 * max(np.abs(dl * np.cos(np.deg2rad(b))).max(),
+                                    np.abs(b - g.b.deg).max())),
+        "xyz_pc": float(1e3 * max(np.abs(x - gc.x.to_value(u.kpc)).max(),
+                                  np.abs(y - gc.y.to_value(u.kpc)).max(),
+                                  np.abs(z - gc.z.to_value(u.kpc)).max())),
+    }
@@ -0,0 +1,290 @@
+"""
+gradients.py
+Age-sliced radial [Fe/H] gradients from the Boulet+2024 x APOGEE x Gaia join.
+
+Measures how the gradient steepens with age (the premise behind
+GRAD_EARLY / GRAD_TODAY in lulab.io.defaults):
+
+- join boulet_apogee_ages.csv (age, feh, gaia_id) with
+  apogee_gaia_fehr_R.csv (gaia_id, R_gal, feh, ...) on gaia_id
+- bin by age x R_gal (median [Fe/H] + counts per cell)
+- per age slice, least-squares [Fe/H] = a + g * (R - R_sun) with
+  Poisson-bootstrap errors; all slices and replicates are accumulated as
+  weighted sufficient statistics, one matrix product per chunk of stars
+- the compact gradient table is cached next to the output CSV and only
+  recomputed when either input file (or the settings) change
+
+Usage:
+    from lulab.gce.gradients import build_gradient_table
+
+    tab = build_gradient_table(PROC / "boulet_apogee_ages.csv",
+                               PROC / "apogee_gaia_fehr_R.csv",
+                               PROC / "boulet_apogee_gradients.csv")
+"""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from lulab.io.cache import digest, file_digest
+from lulab.io.defaults import R_SUN_KPC
+from lulab.stats.binned import grouped_stats
+from lulab.stats.fit import polyfit_rows
+
+AGE_EDGES_GYR: Tuple[float, ...] = (0.0, 2.0, 4.0, 6.0, 8.0, 10.0, 12.0, 14.0)
+R_BINS_KPC: Tuple[float, ...] = tuple(np.arange(0.0, 20.01, 1.0))
+R_FIT_KPC: Tuple[float, float] = (5.0, 15.0)
+
+N_BOOT: int = 1000
+MIN_FIT_N: int = 200
+MIN_BIN_N: int = 50
+CHUNK_ELEMS: int = 4_000_000
+
+
+# -------------------------
+# Join
+# -------------------------
+def _gaia_int(s: pd.Series) -> pd.Series:
+    """
+    Gaia source_id as nullable Int64 without float round-off.
+
+    Accepts integer columns and digit strings; missing values become <NA>.
+    Float columns (a CSV read without dtype=str, an upcasting merge) have
+    already lost the low digits of 19-digit ids, so they are rejected, as
+    is any other value that is not a plain id.
+    """
+    if pd.api.types.is_float_dtype(s.dtype):
+        raise ValueError(f"Gaia ids in {s.name!r} are {s.dtype}, which cannot hold 19-digit "
+                         f"ids exactly; read the column with dtype=str")
+    if pd.api.types.is_integer_dtype(s.dtype):
+        return s.astype("Int64")
+    txt = s.astype("string")
+    bad = txt.notna() & ~txt.str.fullmatch(r"\s*\d+\s*").fillna(False)
+    if bad.any():
+        raise ValueError(f"{int(bad.sum())} Gaia ids in {s.name!r} are not plain digit "
+                         f"strings, e.g. {txt[bad].iloc[0]!r}")
+    # straight from the digit strings: to_numeric would go through float64
+    # as soon as one id is missing and merge distinct 19-digit ids
+    return txt.str.strip().astype("Int64")
+
+
+def join_ages_positions(ages: pd.DataFrame, ism: pd.DataFrame, *,
+                        id_col: str = "gaia_id",
+                        age_col: str = "age",
+                        r_col: str = "R_gal",
+                        feh_col: str = "feh",
+                        feh_from: str = "ism") -> pd.DataFrame:
+    """
+    Inner join on Gaia id -> columns [gaia_id, age, R_gal, feh].
+
+    feh_from : 'ism' (APOGEE value from the positions table) or 'ages'.
+    Duplicate ids on either side keep the first row.
+    """
+    for name, df, cols in (("ages", ages, (id_col, age_col)),
+                           ("ism", ism, (id_col, r_col))):
+        missing = [c for c in cols if c not in df.columns]
+        if missing:
+            raise KeyError(f"{name} table missing columns: {missing}. Has: {list(df.columns)}")
+    src = ism if feh_from == "ism" else ages
+    if feh_col not in src.columns:
+        raise KeyError(f"{feh_from} table missing column: {feh_col}")
+
+    a = pd.DataFrame({
+        "gaia_id": _gaia_int(ages[id_col]),
+        "age": pd.to_numeric(ages[age_col], errors="coerce"),
+    })
+    b = pd.DataFrame({
+        "gaia_id": _gaia_int(ism[id_col]),
+        "R_gal": pd.to_numeric(ism[r_col], errors="coerce"),
+    })
+    if feh_from == "ism":
+        b["feh"] = pd.to_numeric(ism[feh_col], errors="coerce")
+    else:
+        a["feh"] = pd.to_numeric(ages[feh_col], errors="coerce")
+
+    a = a.dropna().drop_duplicates("gaia_id")
+    b = b.dropna().drop_duplicates("gaia_id")
+    return a.merge(b, on="gaia_id", how="inner", validate="one_to_one")
+
+
+# -------------------------
+# Binned cube (age x R)
+# -------------------------
+def binned_age_r(age, r, feh, age_edges=AGE_EDGES_GYR, r_bins=R_BINS_KPC):
+    """
+    Median [Fe/H] and counts on the age x R grid from one sort.
+
+    Returns (median, counts), both shaped (n_age, n_r).
+    """
+    age_edges = np.asarray(age_edges, dtype=float)
+    r_bins = np.asarray(r_bins, dtype=float)
+    na, nr = age_edges.size - 1, r_bins.size - 1
+
+    ia = np.searchsorted(age_edges, age, side="right") - 1
+    ir = np.searchsorted(r_bins, r, side="right") - 1
+    ok = (ia >= 0) & (ia < na) & (ir >= 0) & (ir < nr) & np.isfinite(feh)
+    cell = ia[ok] * nr + ir[ok]
+    counts, med, _, _ = grouped_stats(cell, np.asarray(feh, dtype=float)[ok], na * nr,
+                                      q=(0.5,), mean=False)
+    med = med[:, 0]
+    return med.reshape(na, nr), counts.reshape(na, nr)
+
+
+# -------------------------
+# Gradient fits with bootstrap
+# -------------------------
+def _fit_from_sums(s: np.ndarray):
+    """OLS slope / intercept from sums [n, Sx, Sy, Sxx, Sxy] (last axis)."""
+    n, sx, sy, sxx, sxy = np.moveaxis(s, -1, 0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        den = n * sxx - sx * sx
+        g = (n * sxy - sx * sy) / den
+        a = (sy - g * sx) / n
+    return g, a
+
+
+def fit_sliced_gradients(age, r, feh, *,
+                         age_edges: Sequence[float] = AGE_EDGES_GYR,
+                         r_fit: Tuple[float, float] = R_FIT_KPC,
+                         r_sun: float = R_SUN_KPC,
+                         n_boot: int = N_BOOT,
+                         min_n: int = MIN_FIT_N,
+                         r_bins: Optional[Sequence[float]] = R_BINS_KPC,
+                         min_bin_n: int = MIN_BIN_N,
+                         seed: Optional[int] = 0,
+                         chunk_elems: int = CHUNK_ELEMS) -> pd.DataFrame:
+    """
+    Per-age-slice gradient d[Fe/H]/dR and [Fe/H](R_sun) with bootstrap errors.
+
+    Bootstrap replicates use Poisson(1) star weights (the large-n limit of
+    multinomial resampling), so every slice and replicate is built from
+    weighted sums accumulated chunk by chunk:
+        sums[b, k, :] += W[b, chunk] @ (onehot_k * [1, x, y, x^2, xy])[chunk]
+
+    With r_bins given, grad_binned adds a count-weighted fit to the
+    age x R binned medians (bins with >= min_bin_n stars) as a cross-check.
+    """
+    age = np.asarray(age, dtype=float)
+    r = np.asarray(r, dtype=float)
+    feh = np.asarray(feh, dtype=float)
+    age_edges = np.asarray(age_edges, dtype=float)
+    nk = age_edges.size - 1
+
+    k = np.searchsorted(age_edges, age, side="right") - 1
+    ok = ((k >= 0) & (k < nk) & np.isfinite(r) & np.isfinite(feh)
+          & (r >= r_fit[0]) & (r <= r_fit[1]))
+    k, x, y = k[ok], r[ok] - r_sun, feh[ok]
+    n = k.size
+
+    def design(sl: slice) -> np.ndarray:
+        """one-hot slice x [1, x, y, x^2, xy] -> (c, nk*5)"""
+        xs, ys, ks = x[sl], y[sl], k[sl]
+        d = np.zeros((ks.size, nk, 5))
+        d[np.arange(ks.size), ks] = np.column_stack([np.ones(ks.size), xs, ys, xs * xs, xs * ys])
+        return d.reshape(ks.size, nk * 5)
+
+    point = np.zeros(nk * 5)
+    boot = np.zeros((n_boot, nk * 5))
+    rng = np.random.default_rng(seed)
+    step = max(1, int(chunk_elems) // max(1, n_boot))
+    for s in range(0, n, step):
+        d = design(slice(s, s + step))
+        point += d.sum(axis=0)
+        w = rng.poisson(1.0, size=(n_boot, d.shape[0])).astype(float)
+        boot += w @ d
+    point = point.reshape(nk, 5)
+    boot = boot.reshape(n_boot, nk, 5)
+
+    g, a = _fit_from_sums(point)
+    gb, ab = _fit_from_sums(boot)
+    g_q = np.nanquantile(gb, [0.16, 0.84], axis=0)
+
+    tab = pd.DataFrame({
+        "age_lo": age_edges[:-1],
+        "age_hi": age_edges[1:],
+        "age_mid": 0.5 * (age_edges[:-1] + age_edges[1:]),
+        "n": point[:, 0].astype(int),
+        "grad": g,
+        "grad_err": np.nanstd(gb, axis=0),
+        "grad_p16": g_q[0],
+        "grad_p84": g_q[1],
+        "feh_rsun": a,
+        "feh_rsun_err": np.nanstd(ab, axis=0),
+    })
+    few = tab["n"] < min_n
+    tab.loc[few, ["grad", "grad_err", "grad_p16", "grad_p84", "feh_rsun", "feh_rsun_err"]] = np.nan
+
+    # cross-check: count-weighted fit to the age x R binned medians
+    if r_bins is not None:
+        med, cnt = binned_age_r(age, r, feh, age_edges, r_bins)
+        rc = 0.5 * (np.asarray(r_bins[:-1], float) + np.asarray(r_bins[1:], float)) - r_sun
+        in_fit = (rc + r_sun >= r_fit[0]) & (rc + r_sun <= r_fit[1])
+        w = np.where((cnt >= min_bin_n) & in_fit[None, :] & np.isfinite(med), cnt, 0).astype(float)
+        gbin = polyfit_rows(rc, med, 1, weights=w).slope
+        gbin[(w > 0).sum(1) < 3] = np.nan
+        tab["grad_binned"] = gbin
+    return tab
+
+
+# -------------------------
+# Pipeline stage (cached on input content)
+# -------------------------
+def build_gradient_table(ages_csv: Path, ism_csv: Path, out_csv: Path, *,
+                         age_edges: Sequence[float] = AGE_EDGES_GYR,
+                         r_fit: Tuple[float, float] = R_FIT_KPC,
+                         r_sun: float = R_SUN_KPC,
+                         n_boot: int = N_BOOT,
+                         min_n: int = MIN_FIT_N,
+                         seed: int = 0,
+                         force: bool = False) -> pd.DataFrame:
+    """
+    Join -> fit -> save out_csv, unless out_csv is up to date.
+
+    A sidecar <out_csv>.meta.json records the input file digests and the
+    settings; when they match, the existing CSV is returned as-is.
+    """
+    ages_csv, ism_csv, out_csv = Path(ages_csv), Path(ism_csv), Path(out_csv)
+    meta_path = out_csv.with_suffix(out_csv.suffix + ".meta.json")
+
+    settings: Dict[str, object] = {
+        "age_edges": [float(v) for v in age_edges],
+        "r_fit": [float(v) for v in r_fit],
+        "r_sun": float(r_sun),
+        "n_boot": int(n_boot),
+        "min_n": int(min_n),
+        "seed": int(seed),
+    }
+    inputs = {ages_csv.name: file_digest(ages_csv), ism_csv.name: file_digest(ism_csv)}
+    key = digest(inputs, settings)
+
+    if not force and out_csv.exists() and meta_path.exists():
+        try:
+            if json.loads(meta_path.read_text(encoding="utf-8")).get("key") == key:
+                print("Up to date:", out_csv)
+                return pd.read_csv(out_csv)
+        except (OSError, ValueError):
+            pass
+
+    joined = join_ages_positions(pd.read_csv(ages_csv, dtype={"gaia_id": str}),
+                                 pd.read_csv(ism_csv, dtype={"gaia_id": str}))
+    print("Joined rows:", len(joined))
+
+    tab = fit_sliced_gradients(
+        joined["age"].to_numpy(), joined["R_gal"].to_numpy(), joined["feh"].to_numpy(),
+        age_edges=age_edges, r_fit=r_fit, r_sun=r_sun,
+        n_boot=n_boot, min_n=min_n, seed=seed,
+    )
+
+    out_csv.parent.mkdir(parents=True, exist_ok=True)
+    tab.to_csv(out_csv, index=False)
+    meta_path.write_text(json.dumps(
+        {"key": key, "inputs": inputs, "settings": settings, "rows_joined": int(len(joined))},
+        indent=2,
+    ) + "\n", encoding="utf-8")
+    print("Saved:", out_csv)
+    return tab
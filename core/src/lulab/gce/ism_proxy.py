@@ -0,0 +1,300 @@
+"""
+ism_proxy.py
+Empirical ISM proxy: monotone, smoothed [Fe/H](R) from binned stats + inverse lookup.
+
+Replaces the ad-hoc code in ANIM_003 Cell C (and friends) that builds a
+median [Fe/H](R) curve from apogee_gaia_ism_proxy.csv and inverts it with
+np.interp after nudging the knots to be increasing.
+
+Steps:
+- binned medians of [Fe/H] in R (bins below min_count are dropped)
+- optional running-mean smoothing over neighbouring bins
+- weighted isotonic fit (pool-adjacent-violators) in the gradient direction;
+  non-monotone stretches become flat plateaus, listed in `plateaus`
+- inverse table on a uniform [Fe/H] grid mapping to the linear segment,
+  so inversion is index arithmetic plus a gather (no binary search) and is
+  exact for the piecewise-linear curve
+
+A metallicity that falls on a plateau maps to the plateau's mid radius.
+Optionally one proxy is built per age slice; the grid version inverts
+every star against its own slice in the same pass.
+
+Usage:
+    from lulab.gce.ism_proxy import proxy_from_frame
+
+    proxy = proxy_from_frame(pd.read_csv(PROC / "apogee_gaia_ism_proxy.csv"),
+                             r_bins=np.linspace(7.5, 15.5, 17), min_count=400)
+    R_birth = proxy.invert(feh)
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import List, Literal, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from lulab.stats.binned import binned_stats
+
+Extrapolate = Literal["clip", "nan", "linear"]
+
+# Minimum inverse-table resolution (uniform in [Fe/H] cells)
+N_TABLE: int = 4096
+
+
+# -------------------------
+# Building blocks
+# -------------------------
+def binned_medians(r, feh, r_bins, min_count: int = 0):
+    """
+    Median [Fe/H] per R bin (lulab.stats.binned, one sort, no per-bin masks).
+
+    Returns
+    -------
+    (centers, medians, counts) ; medians are NaN where counts < min_count.
+    """
+    st = binned_stats(r, np.asarray(feh, dtype=float), r_bins,
+                      q=(0.5,), min_count=min_count, mean=False)
+    return st.centers, st.median, st.counts
+
+
+def isotonic(y, w=None, *, increasing: bool = True) -> np.ndarray:
+    """Weighted isotonic regression (pool-adjacent-violators), O(n)."""
+    y = np.asarray(y, dtype=float)
+    w = np.ones_like(y) if w is None else np.asarray(w, dtype=float)
+    if not increasing:
+        return -isotonic(-y, w, increasing=True)
+
+    vals: List[float] = []
+    wts: List[float] = []
+    lens: List[int] = []
+    for yi, wi in zip(y, w):
+        vals.append(yi); wts.append(wi); lens.append(1)
+        while len(vals) > 1 and vals[-2] > vals[-1]:
+            v2, w2, l2 = vals.pop(), wts.pop(), lens.pop()
+            wsum = wts[-1] + w2
+            vals[-1] = (vals[-1] * wts[-1] + v2 * w2) / wsum
+            wts[-1] = wsum
+            lens[-1] += l2
+    return np.repeat(vals, lens)
+
+
+def _smooth(y, w, window: int) -> np.ndarray:
+    """Count-weighted running mean over `window` neighbouring bins."""
+    if window <= 1:
+        return y
+    k = np.ones(int(window))
+    num = np.convolve(y * w, k, mode="same")
+    den = np.convolve(w, k, mode="same")
+    return num / den
+
+
+# -------------------------
+# Proxy
+# -------------------------
+@dataclass
+class ISMProxy:
+    """Monotone [Fe/H](R) proxy with a precomputed inverse table."""
+
+    r: np.ndarray            # knot radii (kpc), increasing
+    feh: np.ndarray          # monotone [Fe/H] at the knots
+    feh_raw: np.ndarray      # binned medians before smoothing / isotonic fit
+    counts: np.ndarray       # stars per knot
+    plateaus: List[Tuple[float, float]] = field(default_factory=list)
+    n_table: int = N_TABLE
+
+    def __post_init__(self):
+        # invertible knots: one per distinct [Fe/H], plateaus -> mid radius
+        f, inv = np.unique(self.feh, return_inverse=True)
+        r_mid = np.zeros(f.size)
+        for j in range(f.size):
+            rr = self.r[inv == j]
+            r_mid[j] = 0.5 * (rr.min() + rr.max())
+        self._f_knots = f
+        self._r_knots = r_mid
+
+        self.feh_min = float(f[0])
+        self.feh_max = float(f[-1])
+
+        # per-segment line R = a + b*[Fe/H] (exact piecewise-linear inverse)
+        if f.size >= 2:
+            self._b = np.diff(r_mid) / np.diff(f)
+            self._a = r_mid[:-1] - self._b * f[:-1]
+        else:
+            self._b = np.zeros(1)
+            self._a = r_mid[:1].copy()
+
+        # uniform [Fe/H] table -> segment index; the table is fine enough that
+        # a cell holds at most one knot, so a single compare fixes the index
+        span = self.feh_max - self.feh_min
+        n_seg = self._b.size
+        if span > 0 and f.size >= 2:
+            n_cells = int(min(max(self.n_table, 2 * span / np.diff(f).min()), 1 << 22))
+            self._inv_step = n_cells / span
+            starts = self.feh_min + np.arange(n_cells + 1) / self._inv_step
+            seg = np.searchsorted(f, starts, side="right") - 1
+            self._lut = np.clip(seg, 0, n_seg - 1).astype(np.intp)
+            self._f_next = np.append(f[1:-1], np.inf)   # upper knot of each segment
+        else:
+            self._inv_step = 0.0
+            self._lut = np.zeros(1, dtype=np.intp)
+            self._f_next = np.array([np.inf])
+
+    @property
+    def gradient(self) -> float:
+        """Least-squares d[Fe/H]/dR of the monotone curve (dex/kpc)."""
+        if self.r.size < 2:
+            return float("nan")
+        return float(np.polyfit(self.r, self.feh, 1)[0])
+
+    def feh_at(self, r) -> np.ndarray:
+        """Forward curve [Fe/H](R), clamped at the ends."""
+        return np.interp(np.asarray(r, dtype=float), self.r, self.feh)
+
+    def invert(self, feh, extrapolate: Extrapolate = "clip") -> np.ndarray:
+        """
+        Birth radius for an array of metallicities via the lookup table.
+
+        extrapolate : 'clip' (notebook behaviour: clamp to the end radii),
+                      'nan'  (outside the proxy range -> NaN),
+                      'linear' (extend the end segments).
+        """
+        x = np.atleast_1d(np.asarray(feh, dtype=float))
+        xc = np.fmin(np.fmax(x, self.feh_min), self.feh_max)   # NaN -> feh_min
+        i = ((xc - self.feh_min) * self._inv_step).astype(np.intp)
+        seg = self._lut[i]
+        seg += xc >= self._f_next[seg]
+        out = self._a[seg] + self._b[seg] * xc
+
+        if extrapolate == "clip":
+            pass
+        elif extrapolate == "nan":
+            out[(x < self.feh_min) | (x > self.feh_max)] = np.nan
+        elif extrapolate == "linear":
+            lo = x < self.feh_min
+            hi = x > self.feh_max
+            out[lo] = self._a[0] + self._b[0] * x[lo]
+            out[hi] = self._a[-1] + self._b[-1] * x[hi]
+        else:
+            raise ValueError("extrapolate must be 'clip', 'nan' or 'linear'")
+        out[np.isnan(x)] = np.nan
+        return out
+
+
+def build_ism_proxy(r, feh, r_bins, *,
+                    min_count: int = 400,
+                    smooth_bins: int = 1,
+                    decreasing: bool = True,
+                    min_knots: int = 5,
+                    n_table: int = N_TABLE) -> ISMProxy:
+    """
+    Build a monotone [Fe/H](R) proxy from raw (R_gal, [Fe/H]) samples.
+
+    Parameters
+    ----------
+    r, feh : array-like
+        Present-day galactocentric radius (kpc) and [Fe/H].
+    r_bins : array-like
+        R bin edges (ANIM_003 uses np.linspace(7.5, 15.5, 17)).
+    min_count : int
+        Bins with fewer stars are dropped (ANIM_003: MIN_BIN_N = 400).
+    smooth_bins : int
+        Count-weighted running mean over this many bins (1 = off).
+    decreasing : bool
+        Expected sign of the gradient; the isotonic fit enforces it.
+    min_knots : int
+        Raise if fewer usable bins remain.
+    """
+    centers, med, counts = binned_medians(r, feh, r_bins, min_count=min_count)
+    ok = np.isfinite(med)
+    if ok.sum() < min_knots:
+        raise RuntimeError(
+            f"Not enough bins to build ISM proxy (need >= {min_knots}, got {int(ok.sum())}). "
+            f"Try lowering min_count={min_count} or adjusting r_bins."
+        )
+    rc, y, w = centers[ok], med[ok], counts[ok].astype(float)
+
+    ys = _smooth(y, w, smooth_bins)
+    ym = isotonic(ys, w, increasing=not decreasing)
+
+    # plateaus = where the isotonic fit had to pool neighbouring bins
+    plateaus = []
+    j = 0
+    while j < ym.size:
+        k = j
+        while k + 1 < ym.size and ym[k + 1] == ym[j]:
+            k += 1
+        if k > j:
+            plateaus.append((float(rc[j]), float(rc[k])))
+        j = k + 1
+
+    return ISMProxy(r=rc, feh=ym, feh_raw=y, counts=counts[ok],
+                    plateaus=plateaus, n_table=n_table)
+
+
+# -------------------------
+# Per-age-slice proxies
+# -------------------------
+@dataclass
+class ISMProxyGrid:
+    """One ISMProxy per age slice; inverts each star against its own slice."""
+
+    age_edges: np.ndarray
+    proxies: List[Optional[ISMProxy]]
+
+    def slice_index(self, age) -> np.ndarray:
+        k = np.searchsorted(self.age_edges, np.asarray(age, dtype=float), side="right") - 1
+        return np.clip(k, 0, len(self.proxies) - 1)
+
+    def invert(self, feh, age, extrapolate: Extrapolate = "clip") -> np.ndarray:
+        feh = np.asarray(feh, dtype=float)
+        k = self.slice_index(age)
+        out = np.full(feh.shape, np.nan)
+        for j, p in enumerate(self.proxies):
+            if p is None:
+                continue
+            sel = k == j
+            if sel.any():
+                out[sel] = p.invert(feh[sel], extrapolate=extrapolate)
+        out[~np.isfinite(np.asarray(age, dtype=float))] = np.nan
+        return out
+
+
+def build_ism_proxy_grid(r, feh, age, r_bins, age_edges, **kwargs) -> ISMProxyGrid:
+    """
+    Build one proxy per age slice [age_edges[i], age_edges[i+1]).
+    Slices without enough data get None (their stars invert to NaN).
+    """
+    r = np.asarray(r, dtype=float)
+    feh = np.asarray(feh, dtype=float)
+    age = np.asarray(age, dtype=float)
+    age_edges = np.asarray(age_edges, dtype=float)
+
+    proxies: List[Optional[ISMProxy]] = []
+    for a0, a1 in zip(age_edges[:-1], age_edges[1:]):
+        sel = (age >= a0) & (age < a1)
+        try:
+            proxies.append(build_ism_proxy(r[sel], feh[sel], r_bins, **kwargs))
+        except RuntimeError:
+            proxies.append(None)
+    return ISMProxyGrid(age_edges=age_edges, proxies=proxies)
+
+
+def proxy_from_frame(df: pd.DataFrame, r_bins, *,
+                     r_col: str = "R_gal",
+                     feh_col: str = "feh",
+                     r_range: Tuple[float, float] = (0.0, 16.0),
+                     feh_range: Tuple[float, float] = (-2.5, 1.0),
+                     **kwargs) -> ISMProxy:
+    """
+    Build the proxy from apogee_gaia_ism_proxy.csv-like frames,
+    with the same stable clips as ANIM_003 Cell C.
+    """
+    missing = [c for c in (r_col, feh_col) if c not in df.columns]
+    if missing:
+        raise KeyError(f"Missing required columns: {missing}")
+    r = pd.to_numeric(df[r_col], errors="coerce").to_numpy(dtype=float)
+    feh = pd.to_numeric(df[feh_col], errors="coerce").to_numpy(dtype=float)
+    m = (r >= r_range[0]) & (r <= r_range[1]) & (feh > feh_range[0]) & (feh < feh_range[1])
+    return build_ism_proxy(r[m], feh[m], r_bins, **kwargs)
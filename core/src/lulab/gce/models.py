@@ -0,0 +1,165 @@
+"""
+models.py
+Illustrative GCE models used to reconstruct stellar birth radii.
+
+Extracted & normalized from ACAP_001_EN.ipynb:
+- ToyModel      (Cell 5: toy ISM model)
+- MinchevModel  (Cell 6: Minchev-like, log growth in lookback time)
+
+Every model exposes the same three methods:
+- feh_sun(age_gyr)   ISM [Fe/H] at R_sun when the star was born
+- grad(age_gyr)      radial [Fe/H] gradient (dex/kpc) at that time
+- rbirth(age, feh)   R_sun + (feh - feh_sun(age)) / grad(age)
+
+Model parameters may be floats or numpy arrays; everything broadcasts,
+so a column of parameter values against a row of stars evaluates a whole
+parameter grid in one pass.
+
+Usage:
+    from lulab.gce.models import get_model
+
+    model = get_model("minchev")
+    rb = model.rbirth(df["age_gyr"], df["[Fe/H]"], clip=(0.0, 20.0))
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, fields, replace
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+from lulab.io.defaults import (
+    R_SUN_KPC,
+    T_DISK_GYR,
+    FEH_EARLY,
+    FEH_TODAY,
+    GRAD_EARLY,
+    GRAD_TODAY,
+    TAU_Z_GYR,
+    TAU_G_GYR,
+)
+
+
+# -------------------------
+# Base
+# -------------------------
+class GCEModel:
+    """Common rbirth inversion shared by all models."""
+
+    name: str = "base"
+
+    def feh_sun(self, age_gyr):
+        raise NotImplementedError
+
+    def grad(self, age_gyr):
+        raise NotImplementedError
+
+    def rbirth(self, age_gyr, feh,
+               clip: Optional[Tuple[float, float]] = None) -> np.ndarray:
+        """
+        Invert the model: birth radius (kpc) from age (Gyr) and [Fe/H].
+
+        Parameters
+        ----------
+        age_gyr, feh : array-like
+            Stellar ages and metallicities (broadcast together).
+        clip : (lo, hi), optional
+            Clip the result into [lo, hi] kpc (as in the notebooks).
+        """
+        age = np.asarray(age_gyr, dtype=float)
+        feh = np.asarray(feh, dtype=float)
+        rb = self.r_sun + (feh - self.feh_sun(age)) / self.grad(age)
+        if clip is not None:
+            rb = np.clip(rb, clip[0], clip[1])
+        return rb
+
+    def params(self) -> Dict[str, Any]:
+        """Model parameters as a plain dict (used for cache keys)."""
+        return {f.name: getattr(self, f.name) for f in fields(self)}  # type: ignore[arg-type]
+
+    def with_params(self, **params):
+        """Return a copy with some parameters replaced."""
+        return replace(self, **params)  # type: ignore[type-var]
+
+
+# -------------------------
+# Toy model (ACAP_001 Cell 5)
+# -------------------------
+@dataclass(frozen=True)
+class ToyModel(GCEModel):
+    """
+    Toy ISM model: [Fe/H](R_sun) grows logarithmically with lookback time,
+    gradient flattens as age / (age + t0).
+    """
+
+    r_sun: float = R_SUN_KPC
+    feh_now: float = 0.0
+    feh_old: float = -0.6
+    tau: float = 3.5
+    t_norm: float = 13.0
+    g_young: float = -0.07
+    g_old: float = -0.15
+    t0: float = 8.0
+
+    name = "toy"
+
+    def feh_sun(self, age_gyr):
+        age = np.asarray(age_gyr, dtype=float)
+        x = np.log1p(age / self.tau) / np.log1p(self.t_norm / self.tau)
+        return self.feh_now + (self.feh_old - self.feh_now) * x
+
+    def grad(self, age_gyr):
+        age = np.asarray(age_gyr, dtype=float)
+        return self.g_young + (self.g_old - self.g_young) * (age / (age + self.t0))
+
+
+# -------------------------
+# Minchev-like model (ACAP_001 Cell 6)
+# -------------------------
+@dataclass(frozen=True)
+class MinchevModel(GCEModel):
+    """
+    Minchev-like model: lookback time = stellar age, both [Fe/H](R_sun)
+    and the gradient follow a normalized log growth over 0..T_DISK.
+    """
+
+    r_sun: float = R_SUN_KPC
+    t_disk: float = T_DISK_GYR
+    feh_today: float = FEH_TODAY
+    feh_early: float = FEH_EARLY
+    grad_today: float = GRAD_TODAY
+    grad_early: float = GRAD_EARLY
+    tau_z: float = TAU_Z_GYR
+    tau_g: float = TAU_G_GYR
+
+    name = "minchev"
+
+    def _log_norm(self, age_gyr, tau_gyr):
+        t = np.asarray(age_gyr, dtype=float)
+        return np.log1p(t / tau_gyr) / np.log1p(self.t_disk / tau_gyr)
+
+    def feh_sun(self, age_gyr):
+        x = self._log_norm(age_gyr, self.tau_z)
+        return self.feh_today + (self.feh_early - self.feh_today) * x
+
+    def grad(self, age_gyr):
+        x = self._log_norm(age_gyr, self.tau_g)
+        return self.grad_today + (self.grad_early - self.grad_today) * x
+
+
+# -------------------------
+# Registry
+# -------------------------
+MODELS: Dict[str, type] = {
+    "toy": ToyModel,
+    "minchev": MinchevModel,
+}
+
+
+def get_model(name: str = "minchev", **params) -> GCEModel:
+    """Instantiate a model by name, e.g. get_model('minchev', tau_z=2.5)."""
+    key = (name or "").strip().lower()
+    if key not in MODELS:
+        raise ValueError(f"Unknown GCE model '{name}'. Available: {sorted(MODELS)}")
+    return MODELS[key](**params)
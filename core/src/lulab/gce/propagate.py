@@ -0,0 +1,318 @@
+"""
+propagate.py
+Monte-Carlo propagation of age / [Fe/H] uncertainties into birth radii.
+
+Each star gets M draws:
+- age  ~ split normal from (age, p16, p84)  or  normal(age, age_err)
+- feh  ~ normal([Fe/H], e[Fe/H])  with an error floor (as in ACAP_001 Cell 3)
+
+Draws are pushed through any lulab.gce model and reduced on the fly, one
+memory-bounded chunk of stars at a time, to:
+- per-star quantiles (default p16 / median / p84)
+- population histograms of all draws (optionally split by group, e.g. host/single)
+
+The full N x M matrix is never materialized.
+
+Usage:
+    from lulab.gce.models import get_model
+    from lulab.gce.propagate import propagate_rbirth
+
+    res = propagate_rbirth(get_model("minchev"), age, feh,
+                           age_p16=p16, age_p84=p84, feh_err=efeh,
+                           n_draws=10_000, seed=42)
+    res.median, res.p16, res.p84, res.hist
+"""
+
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from lulab.io.defaults import (
+    AGE_MIN_GYR,
+    T_DISK_GYR,
+    RBIRTH_HIST_RANGE,
+    RBIRTH_HIST_BINS,
+)
+
+# Error floors (ACAP_001 Cell 3 uses the same [Fe/H] floor)
+FEH_ERR_FLOOR: float = 0.04
+AGE_ERR_FLOOR_GYR: float = 0.0
+
+# Target number of float64 draws held in memory per chunk (~16 MB)
+CHUNK_ELEMS: int = 2_000_000
+
+
+@dataclass
+class PropagationResult:
+    """Per-star quantiles + population histograms of the propagated draws."""
+
+    q: Tuple[float, ...]
+    quantiles: np.ndarray   # (N, len(q))
+    hist: np.ndarray        # (n_groups, n_bins) draw counts / n_draws
+    edges: np.ndarray       # (n_bins + 1,)
+    n_draws: int
+
+    def quantile(self, q: float) -> np.ndarray:
+        try:
+            j = self.q.index(q)
+        except ValueError:
+            raise KeyError(f"Quantile {q} was not computed. Available: {self.q}") from None
+        return self.quantiles[:, j]
+
+    @property
+    def median(self) -> np.ndarray:
+        return self.quantile(0.5)
+
+    @property
+    def p16(self) -> np.ndarray:
+        return self.quantile(0.16)
+
+    @property
+    def p84(self) -> np.ndarray:
+        return self.quantile(0.84)
+
+
+# -------------------------
+# Reductions
+# -------------------------
+def row_quantiles(a: np.ndarray, q: Sequence[float]) -> np.ndarray:
+    """
+    Quantiles along axis=1 with numpy's 'linear' rule, via np.partition.
+
+    Much cheaper than np.quantile for a handful of quantiles over long rows.
+    Rows must not contain NaN.
+    """
+    m = a.shape[1]
+    pos = np.asarray(q, dtype=float) * (m - 1)
+    lo = np.floor(pos).astype(np.intp)
+    hi = np.minimum(lo + 1, m - 1)
+    part = np.partition(a, np.unique(np.concatenate([lo, hi])), axis=1)
+    frac = pos - lo
+    return part[:, lo] * (1.0 - frac) + part[:, hi] * frac
+
+
+def accumulate_hist(hist: np.ndarray, values: np.ndarray, slot,
+                    lo: float, hi: float) -> None:
+    """
+    Add a block of values into hist[(slot, bin)] with one bincount.
+
+    Parameters
+    ----------
+    hist : ndarray, shape (n_slots, n_bins)
+        Integer histogram updated in place.
+    values : ndarray
+        Block of values (any shape).
+    slot : int array broadcastable to values
+        Histogram row per value (e.g. group per star, or parameter index).
+
+    Out-of-range values go to two overflow slots per row that are dropped,
+    which avoids a boolean-mask copy of the whole block.
+    """
+    n_slots, n_bins = hist.shape
+    width = n_bins + 2
+    b = values - lo
+    b *= n_bins / (hi - lo)
+    np.floor(b, out=b)
+    b[values == hi] = n_bins - 1            # right edge inclusive, like np.histogram
+    np.fmax(b, -1.0, out=b)                 # fmax/fmin also map NaN to an overflow slot
+    np.fmin(b, float(n_bins), out=b)
+    flat = b.astype(np.intp)
+    flat += np.asarray(slot, dtype=np.intp) * width + 1
+    counts = np.bincount(flat.ravel(), minlength=n_slots * width)
+    hist += counts.reshape(n_slots, width)[:, 1:-1]
+
+
+# -------------------------
+# Engine
+# -------------------------
+def propagate_rbirth(model, age_gyr, feh, *,
+                     age_p16=None,
+                     age_p84=None,
+                     age_err=None,
+                     feh_err=None,
+                     n_draws: int = 1000,
+                     q: Sequence[float] = (0.16, 0.5, 0.84),
+                     groups=None,
+                     n_groups: Optional[int] = None,
+                     hist_range: Tuple[float, float] = RBIRTH_HIST_RANGE,
+                     hist_bins: int = RBIRTH_HIST_BINS,
+                     age_limits: Tuple[float, float] = (AGE_MIN_GYR, T_DISK_GYR),
+                     clip: Optional[Tuple[float, float]] = None,
+                     feh_err_floor: float = FEH_ERR_FLOOR,
+                     chunk_elems: int = CHUNK_ELEMS,
+                     seed: Optional[int] = 0,
+                     n_jobs: Optional[int] = None) -> PropagationResult:
+    """
+    Draw n_draws samples per star and reduce them chunk by chunk.
+
+    Parameters
+    ----------
+    model : lulab.gce.models.GCEModel
+        Any model exposing rbirth(age, feh).
+    age_gyr, feh : array-like, shape (N,)
+        Point estimates (age is treated as the median).
+    age_p16, age_p84 : array-like, optional
+        Asymmetric age uncertainties (split-normal draws).
+    age_err : array-like or float, optional
+        Symmetric age uncertainty, used when p16/p84 are not given.
+    feh_err : array-like or float, optional
+        [Fe/H] uncertainty; NaN / below-floor values use feh_err_floor.
+    n_draws : int
+        Samples per star (M).
+    q : sequence of float
+        Per-star quantiles to keep.
+    groups : array-like of int, optional
+        Group label per star (e.g. 0 = single, 1 = host) for split histograms.
+    hist_range, hist_bins
+        Population histogram binning (kpc).
+    age_limits : (lo, hi)
+        Age draws are clipped into this range (Gyr).
+    clip : (lo, hi), optional
+        Clip rbirth draws (kpc), as in the notebooks.
+    chunk_elems : int
+        Max draws held in memory at once; sets the star chunk size.
+    seed : int, optional
+        RNG seed. Results are reproducible for a fixed seed and chunk_elems
+        (each chunk draws from its own spawned stream).
+    n_jobs : int, optional
+        Process chunks in a thread pool of this size.
+
+    Returns
+    -------
+    PropagationResult
+        hist is normalized by n_draws, so it sums to the number of stars
+        (inside hist_range) and is directly comparable to a point histogram.
+    """
+    age = np.asarray(age_gyr, dtype=float).ravel()
+    feh = np.asarray(feh, dtype=float).ravel()
+    n = age.size
+    if feh.size != n:
+        raise ValueError("age_gyr and feh must have the same length")
+    if n_draws < 1:
+        raise ValueError("n_draws must be >= 1")
+
+    # --- age spread (split normal: lower / upper sigma) ---
+    if age_p16 is not None and age_p84 is not None:
+        sig_lo = age - np.asarray(age_p16, dtype=float).ravel()
+        sig_hi = np.asarray(age_p84, dtype=float).ravel() - age
+    elif age_err is not None:
+        sig_lo = sig_hi = np.broadcast_to(np.asarray(age_err, dtype=float), (n,))
+    else:
+        sig_lo = sig_hi = np.zeros(n)
+    sig_lo = np.nan_to_num(np.clip(sig_lo, AGE_ERR_FLOOR_GYR, None), nan=AGE_ERR_FLOOR_GYR)
+    sig_hi = np.nan_to_num(np.clip(sig_hi, AGE_ERR_FLOOR_GYR, None), nan=AGE_ERR_FLOOR_GYR)
+
+    # --- [Fe/H] spread ---
+    if feh_err is None:
+        efeh = np.full(n, feh_err_floor)
+    else:
+        efeh = np.broadcast_to(np.asarray(feh_err, dtype=float), (n,))
+        efeh = np.nan_to_num(np.clip(efeh, feh_err_floor, None), nan=feh_err_floor)
+
+    # --- groups ---
+    if groups is None:
+        grp = np.zeros(n, dtype=np.intp)
+        n_groups = 1
+    else:
+        grp = np.asarray(groups).ravel().astype(np.intp)
+        n_groups = int(n_groups or (grp.max() + 1 if n else 1))
+
+    q = tuple(float(x) for x in q)
+    out = np.full((n, len(q)), np.nan)
+    lo, hi = float(hist_range[0]), float(hist_range[1])
+
+    # split normal as pure arithmetic: z*sig_mid + |z|*sig_half
+    sig_mid = 0.5 * (sig_hi + sig_lo)
+    sig_half = 0.5 * (sig_hi - sig_lo)
+
+    idx_valid = np.flatnonzero(np.isfinite(age) & np.isfinite(feh))
+    step = max(1, int(chunk_elems) // n_draws)
+    starts = range(0, idx_valid.size, step)
+    # one independent stream per chunk -> same result for any n_jobs
+    streams = np.random.SeedSequence(seed).spawn(len(starts))
+
+    def run_chunk(s: int, ss: np.random.SeedSequence) -> np.ndarray:
+        idx = idx_valid[s:s + step]
+        rng = np.random.default_rng(ss)
+        c = idx.size
+
+        z = rng.standard_normal((c, n_draws))
+        a = np.abs(z)
+        a *= sig_half[idx, None]
+        z *= sig_mid[idx, None]
+        a += z
+        a += age[idx, None]
+        np.clip(a, age_limits[0], age_limits[1], out=a)
+
+        f = rng.standard_normal((c, n_draws), out=z)
+        f *= efeh[idx, None]
+        f += feh[idx, None]
+
+        rb = model.rbirth(a, f, clip=clip)
+        del a, f, z
+
+        out[idx] = row_quantiles(rb, q)
+        h = np.zeros((n_groups, hist_bins), dtype=np.int64)
+        accumulate_hist(h, rb, grp[idx, None], lo, hi)
+        return h
+
+    hist = np.zeros((n_groups, hist_bins), dtype=np.int64)
+    if n_jobs is not None and n_jobs > 1 and len(starts) > 1:
+        # numpy releases the GIL in the RNG, ufuncs and partition
+        with ThreadPoolExecutor(max_workers=n_jobs) as ex:
+            for h in ex.map(run_chunk, starts, streams):
+                hist += h
+    else:
+        for s, ss in zip(starts, streams):
+            hist += run_chunk(s, ss)
+
+    return PropagationResult(
+        q=q,
+        quantiles=out,
+        hist=hist / float(n_draws),
+        edges=np.linspace(lo, hi, hist_bins + 1),
+        n_draws=int(n_draws),
+    )
+
+
+def propagate_table(df: pd.DataFrame, model, *,
+                    age_col: str = "age_gyr",
+                    feh_col: str = "[Fe/H]",
+                    feh_err_col: Optional[str] = "e[Fe/H]",
+                    age_p16_col: Optional[str] = "age_gyr_p16",
+                    age_p84_col: Optional[str] = "age_gyr_p84",
+                    prefix: str = "rbirth_kpc",
+                    **kwargs) -> Tuple[pd.DataFrame, PropagationResult]:
+    """
+    DataFrame wrapper: adds <prefix>_p16 / _p50 / _p84 columns.
+
+    Optional error columns are used only if present in df.
+    Extra kwargs go to propagate_rbirth().
+    """
+    def col(name):
+        if name is None or name not in df.columns:
+            return None
+        return pd.to_numeric(df[name], errors="coerce").to_numpy(dtype=float)
+
+    for c in (age_col, feh_col):
+        if c not in df.columns:
+            raise KeyError(f"Missing required column: {c}")
+
+    res = propagate_rbirth(
+        model, col(age_col), col(feh_col),
+        age_p16=col(age_p16_col),
+        age_p84=col(age_p84_col),
+        feh_err=col(feh_err_col),
+        **kwargs,
+    )
+
+    out = df.copy()
+    for qq, tag in ((0.16, "p16"), (0.5, "p50"), (0.84, "p84")):
+        if qq in res.q:
+            out[f"{prefix}_{tag}"] = res.quantile(qq)
+    return out, res
@@ -0,0 +1,298 @@
+"""
+service.py
+Local HTTP/JSON "what-if" service for birth-radius histograms.
+
+For live outreach sessions: a slider UI (or curl) asks for the rbirth
+distribution under different GCE parameters and age cuts, and gets the
+binned host / single histograms back in well under 10 ms.
+
+- star arrays (age, [Fe/H], host flag) are loaded once and kept in memory
+- the model kernel is lulab.gce.models (vectorized, no per-star loops)
+- recent parameter sets are kept in an LRU cache
+- stdlib only (http.server); binds to 127.0.0.1 by default
+
+Endpoints:
+    GET  /health                 -> samples loaded, cache stats
+    GET  /params?model=minchev   -> default model parameters
+    GET  /rbirth?sample=sweetcat&model=minchev&grad_today=-0.06&age_max=10
+    POST /rbirth                 (same fields as a JSON object)
+
+Usage:
+    python -m lulab.gce.service --topic TOP_0001_exoplanet_birth_radius --port 8765
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Mapping, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import pandas as pd
+
+from lulab.gce.models import MODELS, get_model
+from lulab.gce.propagate import accumulate_hist
+from lulab.io.defaults import (
+    AGE_MIN_GYR,
+    AGE_MAX_GYR,
+    RBIRTH_HIST_RANGE,
+    RBIRTH_HIST_BINS,
+    DEFAULT_TOPIC_ID,
+)
+from lulab.io.paths import data_processed_dir
+
+HOST: str = "127.0.0.1"
+PORT: int = 8765
+CACHE_SIZE: int = 256
+MAX_BINS: int = 1000
+
+# sample name -> processed CSV (columns: age_gyr, feh, is_host)
+SAMPLE_FILES: Dict[str, str] = {
+    "sweetcat": "sweetcat_rbirth_gce.csv",
+    "harps": "harps_rbirth_gce.csv",
+}
+
+
+@dataclass
+class Sample:
+    """Resident star arrays for one catalog."""
+
+    age: np.ndarray
+    feh: np.ndarray
+    host: np.ndarray   # int 0 = single, 1 = host
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, *,
+                   age_col: str = "age_gyr",
+                   feh_col: str = "feh",
+                   host_col: str = "is_host") -> "Sample":
+        missing = [c for c in (age_col, feh_col, host_col) if c not in df.columns]
+        if missing:
+            raise KeyError(f"Missing required columns: {missing}")
+        age = pd.to_numeric(df[age_col], errors="coerce").to_numpy(dtype=float)
+        feh = pd.to_numeric(df[feh_col], errors="coerce").to_numpy(dtype=float)
+        host = df[host_col].astype(str).str.lower().isin(["true", "1", "host"]).to_numpy()
+        ok = np.isfinite(age) & np.isfinite(feh)
+        return cls(age=age[ok], feh=feh[ok], host=host[ok].astype(np.intp))
+
+
+def load_samples(topic: str = DEFAULT_TOPIC_ID) -> Dict[str, Sample]:
+    """Load every available SAMPLE_FILES table from data/processed."""
+    proc = data_processed_dir(topic, create=False)
+    out: Dict[str, Sample] = {}
+    for name, fname in SAMPLE_FILES.items():
+        p = proc / fname
+        if p.exists():
+            out[name] = Sample.from_frame(pd.read_csv(p))
+    if not out:
+        raise FileNotFoundError(f"No sample tables found in {proc}: {list(SAMPLE_FILES.values())}")
+    return out
+
+
+def _finite(name: str, v: Any) -> float:
+    x = float(v)
+    if not np.isfinite(x):
+        raise ValueError(f"{name} must be a finite number, got {v!r}")
+    return x
+
+
+# -------------------------
+# Kernel + LRU
+# -------------------------
+class WhatIfService:
+    """Model-evaluation kernel over resident samples, with an LRU of results."""
+
+    def __init__(self, samples: Mapping[str, Sample], *, cache_size: int = CACHE_SIZE):
+        self.samples = dict(samples)
+        self.cache_size = int(cache_size)
+        self._cache: "OrderedDict[tuple, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    # --- request normalization ---
+    def normalize(self, req: Mapping[str, Any]) -> tuple:
+        """Validate a request and turn it into a hashable cache key."""
+        sample = str(req.get("sample", "sweetcat"))
+        if sample not in self.samples:
+            raise ValueError(f"Unknown sample '{sample}'. Available: {sorted(self.samples)}")
+        model = str(req.get("model", "minchev")).lower()
+        if model not in MODELS:
+            raise ValueError(f"Unknown model '{model}'. Available: {sorted(MODELS)}")
+
+        fields = set(get_model(model).params())
+        params = tuple(sorted((k, _finite(k, v)) for k, v in req.items() if k in fields))
+
+        age_min = _finite("age_min", req.get("age_min", AGE_MIN_GYR))
+        age_max = _finite("age_max", req.get("age_max", AGE_MAX_GYR))
+        bins = int(_finite("bins", req.get("bins", RBIRTH_HIST_BINS)))
+        if not 1 <= bins <= MAX_BINS:
+            raise ValueError(f"bins must be in 1..{MAX_BINS}")
+        rng = req.get("range", RBIRTH_HIST_RANGE)
+        if isinstance(rng, str):
+            rng = rng.split(",")
+        if len(rng) != 2:
+            raise ValueError("range must be 'lo,hi' with hi > lo")
+        lo, hi = _finite("range", rng[0]), _finite("range", rng[1])
+        if not hi > lo:
+            raise ValueError("range must be 'lo,hi' with hi > lo")
+        density = str(req.get("density", "false")).lower() in ("1", "true", "yes")
+        return (sample, model, params, age_min, age_max, bins, lo, hi, density)
+
+    # --- evaluation ---
+    def _evaluate(self, key: tuple) -> Dict[str, Any]:
+        sample, model, params, age_min, age_max, bins, lo, hi, density = key
+        s = self.samples[sample]
+        sel = (s.age >= age_min) & (s.age <= age_max)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rb = get_model(model, **dict(params)).rbirth(s.age[sel], s.feh[sel])
+        grp = s.host[sel]
+
+        hist = np.zeros((2, bins), dtype=np.int64)
+        accumulate_hist(hist, rb, grp, lo, hi)
+        counts = hist.astype(float)
+        if density:
+            width = (hi - lo) / bins
+            tot = counts.sum(axis=1, keepdims=True)
+            counts = np.divide(counts, tot * width, out=np.zeros_like(counts), where=tot > 0)
+
+        def med(x):
+            x = x[np.isfinite(x)]                 # a zero gradient gives inf rbirth
+            return float(np.median(x)) if x.size else None
+
+        return {
+            "sample": sample,
+            "model": model,
+            "params": get_model(model, **dict(params)).params(),
+            "age_range": [age_min, age_max],
+            "edges": np.linspace(lo, hi, bins + 1).tolist(),
+            "single": counts[0].tolist(),
+            "host": counts[1].tolist(),
+            "n": {"single": int((grp == 0).sum()), "host": int((grp == 1).sum())},
+            "median": {"single": med(rb[grp == 0]), "host": med(rb[grp == 1])},
+        }
+
+    def rbirth(self, req: Mapping[str, Any]) -> Dict[str, Any]:
+        """Binned host / single rbirth distribution for one parameter set."""
+        t0 = time.perf_counter()
+        key = self.normalize(req)
+        with self._lock:
+            hit = self._cache.get(key)
+            if hit is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+        cached = hit is not None
+        if hit is None:
+            hit = self._evaluate(key)
+            with self._lock:
+                self.misses += 1
+                self._cache[key] = hit
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        out = dict(hit)
+        out["cached"] = cached
+        out["ms"] = round(1e3 * (time.perf_counter() - t0), 3)
+        return out
+
+    def health(self) -> Dict[str, Any]:
+        return {
+            "ok": True,
+            "samples": {k: int(v.age.size) for k, v in self.samples.items()},
+            "cache": {"size": len(self._cache), "max": self.cache_size,
+                      "hits": self.hits, "misses": self.misses},
+        }
+
+
+# -------------------------
+# HTTP layer
+# -------------------------
+def _make_handler(service: WhatIfService):
+    class Handler(BaseHTTPRequestHandler):
+        server_version = "lulab-whatif/0.1"
+
+        def _send(self, code: int, payload: Dict[str, Any]) -> None:
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("Access-Control-Allow-Origin", "*")   # local slider pages
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _route(self, path: str, req: Dict[str, Any]) -> None:
+            try:
+                if path == "/rbirth":
+                    self._send(200, service.rbirth(req))
+                elif path == "/health":
+                    self._send(200, service.health())
+                elif path == "/params":
+                    model = str(req.get("model", "minchev"))
+                    self._send(200, {"model": model, "params": get_model(model).params()})
+                else:
+                    self._send(404, {"error": f"Unknown endpoint: {path}"})
+            except (ValueError, KeyError, TypeError, OverflowError) as e:
+                self._send(400, {"error": str(e)})
+
+        def do_GET(self) -> None:  # noqa: N802
+            u = urlparse(self.path)
+            req = {k: v[-1] for k, v in parse_qs(u.query).items()}
+            self._route(u.path, req)
+
+        def do_POST(self) -> None:  # noqa: N802
+            n = int(self.headers.get("Content-Length") or 0)
+            try:
+                req = json.loads(self.rfile.read(n) or b"{}")
+                if not isinstance(req, dict):
+                    raise ValueError("JSON body must be an object")
+            except ValueError as e:
+                self._send(400, {"error": f"Bad JSON: {e}"})
+                return
+            self._route(urlparse(self.path).path, req)
+
+        def log_message(self, fmt: str, *args) -> None:
+            pass   # keep the notebook / terminal quiet
+
+    return Handler
+
+
+def make_server(service: WhatIfService, host: str = HOST, port: int = PORT) -> ThreadingHTTPServer:
+    """Build (but do not start) the HTTP server; port=0 picks a free port."""
+    return ThreadingHTTPServer((host, port), _make_handler(service))
+
+
+def serve_in_thread(service: WhatIfService, host: str = HOST, port: int = PORT
+                    ) -> Tuple[ThreadingHTTPServer, threading.Thread]:
+    """Start the server in a daemon thread (handy inside a notebook)."""
+    srv = make_server(service, host, port)
+    th = threading.Thread(target=srv.serve_forever, daemon=True)
+    th.start()
+    return srv, th
+
+
+def main(argv: Optional[list] = None) -> None:
+    ap = argparse.ArgumentParser(description="Local birth-radius what-if service")
+    ap.add_argument("--topic", default=DEFAULT_TOPIC_ID)
+    ap.add_argument("--host", default=HOST)
+    ap.add_argument("--port", type=int, default=PORT)
+    ap.add_argument("--cache-size", type=int, default=CACHE_SIZE)
+    args = ap.parse_args(argv)
+
+    service = WhatIfService(load_samples(args.topic), cache_size=args.cache_size)
+    srv = make_server(service, args.host, args.port)
+    print(f"Serving on http://{args.host}:{srv.server_port}  samples={service.health()['samples']}")
+    try:
+        srv.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        srv.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+"""
+sweep.py
+Cached GCE parameter sweeps: rbirth histograms over a Cartesian parameter grid.
+
+One call evaluates the rbirth inversion for every star at every grid point
+(model parameters broadcast as a column against the star row), reduces it
+to a histogram / summary cube and stores the cube in the topic cache,
+keyed by the input snapshot and the grid. Figures and animations then
+slice the cube instead of recomputing.
+
+Cube layout:
+    hist     (*grid_shape, n_groups, n_bins)   star counts per rbirth bin
+    summary  (*grid_shape, n_groups, len(q))   rbirth quantiles (default p16/p50/p84)
+
+Usage:
+    from lulab.gce.sweep import sweep_rbirth
+
+    cube = sweep_rbirth(age, feh, {
+        "grad_today": np.linspace(-0.10, -0.04, 13),
+        "feh_early":  np.linspace(-0.8, -0.5, 7),
+        "tau_z":      [2.0, 3.0, 4.0],
+    }, groups=is_host.astype(int), topic=TOPIC)
+
+    h = cube.hist_at(grad_today=-0.07, feh_early=-0.65, tau_z=3.0)
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from itertools import product
+from typing import Dict, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from lulab.gce.models import get_model
+from lulab.gce.propagate import accumulate_hist, row_quantiles
+from lulab.io.cache import cache_dir, digest, load_npz, save_npz
+from lulab.io.defaults import RBIRTH_HIST_RANGE, RBIRTH_HIST_BINS
+
+# Max rbirth evaluations held in memory at once (grid rows x stars)
+CHUNK_ELEMS: int = 4_000_000
+
+
+@dataclass
+class SweepCube:
+    """Histogram / summary cube over a parameter grid."""
+
+    names: Tuple[str, ...]
+    axes: Tuple[np.ndarray, ...]
+    edges: np.ndarray
+    hist: np.ndarray
+    q: Tuple[float, ...]
+    summary: np.ndarray
+    key: str = ""
+
+    @property
+    def centers(self) -> np.ndarray:
+        return 0.5 * (self.edges[:-1] + self.edges[1:])
+
+    def index(self, **params) -> tuple:
+        """
+        Grid index for the given parameter values (nearest grid point).
+        Parameters not given keep their whole axis.
+        """
+        unknown = set(params) - set(self.names)
+        if unknown:
+            raise KeyError(f"Not a sweep axis: {sorted(unknown)}. Axes: {self.names}")
+        ix = []
+        for name, ax in zip(self.names, self.axes):
+            if name in params:
+                ix.append(int(np.argmin(np.abs(ax - float(params[name])))))
+            else:
+                ix.append(slice(None))
+        return tuple(ix)
+
+    def hist_at(self, **params) -> np.ndarray:
+        """Histogram(s) at the nearest grid point: (..., n_groups, n_bins)."""
+        return self.hist[self.index(**params)]
+
+    def summary_at(self, **params) -> np.ndarray:
+        """Quantiles at the nearest grid point: (..., n_groups, len(q))."""
+        return self.summary[self.index(**params)]
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        out = {
+            "names": np.array(self.names, dtype=str),
+            "edges": self.edges,
+            "hist": self.hist,
+            "q": np.array(self.q, dtype=float),
+            "summary": self.summary,
+        }
+        for name, ax in zip(self.names, self.axes):
+            out[f"axis_{name}"] = ax
+        return out
+
+    @classmethod
+    def from_arrays(cls, arrays: Mapping[str, np.ndarray], key: str = "") -> "SweepCube":
+        names = tuple(str(x) for x in arrays["names"])
+        return cls(
+            names=names,
+            axes=tuple(np.asarray(arrays[f"axis_{n}"]) for n in names),
+            edges=np.asarray(arrays["edges"]),
+            hist=np.asarray(arrays["hist"]),
+            q=tuple(float(x) for x in arrays["q"]),
+            summary=np.asarray(arrays["summary"]),
+            key=key,
+        )
+
+
+def sweep_rbirth(age_gyr, feh, grid: Mapping[str, Sequence[float]], *,
+                 model: str = "minchev",
+                 base_params: Optional[Mapping[str, float]] = None,
+                 groups=None,
+                 n_groups: Optional[int] = None,
+                 hist_range: Tuple[float, float] = RBIRTH_HIST_RANGE,
+                 hist_bins: int = RBIRTH_HIST_BINS,
+                 q: Sequence[float] = (0.16, 0.5, 0.84),
+                 clip: Optional[Tuple[float, float]] = None,
+                 topic: Optional[str] = None,
+                 cache: bool = True,
+                 chunk_elems: int = CHUNK_ELEMS) -> SweepCube:
+    """
+    Evaluate rbirth over a Cartesian parameter grid and reduce to a cube.
+
+    Parameters
+    ----------
+    age_gyr, feh : array-like, shape (N,)
+        Star inputs; rows with NaN are dropped.
+    grid : mapping name -> values
+        Model parameters to sweep (field names of the model dataclass,
+        e.g. grad_today, feh_early, tau_z for 'minchev'); non-empty.
+    model : str
+        Model name from lulab.gce.models.MODELS.
+    base_params : mapping, optional
+        Fixed overrides for parameters not swept.
+    groups : array-like of int, optional
+        Group label per star (e.g. 0 = single, 1 = host).
+    topic : str, optional
+        Topic used for the cache location (data/interim/cache/sweeps).
+    cache : bool
+        Read / write the cube cache.
+
+    Returns
+    -------
+    SweepCube
+    """
+    age = np.asarray(age_gyr, dtype=float).ravel()
+    feh = np.asarray(feh, dtype=float).ravel()
+    if age.size != feh.size:
+        raise ValueError("age_gyr and feh must have the same length")
+    grp = (np.zeros(age.size, dtype=np.intp) if groups is None
+           else np.asarray(groups).ravel().astype(np.intp))
+    ok = np.isfinite(age) & np.isfinite(feh)
+    age, feh, grp = age[ok], feh[ok], grp[ok]
+    n_groups = int(n_groups or (grp.max() + 1 if grp.size else 1))
+
+    names = tuple(grid)
+    axes = tuple(np.asarray(grid[n], dtype=float).ravel() for n in names)
+    if not names or any(ax.size == 0 for ax in axes):
+        raise ValueError("grid must map at least one parameter to at least one value, "
+                         f"got {dict(zip(names, (ax.size for ax in axes)))}")
+    base = get_model(model, **dict(base_params or {}))
+    missing = set(names) - set(base.params())
+    if missing:
+        raise KeyError(f"Model '{model}' has no parameters {sorted(missing)}")
+    q = tuple(float(x) for x in q)
+
+    key = digest("sweep_rbirth", model, base.params(), names, axes, age, feh, grp,
+                 n_groups, tuple(hist_range), hist_bins, q, clip)
+    where = cache_dir(topic, sub="sweeps", create=False)
+    if cache:
+        hit = load_npz(key, where)
+        if hit is not None:
+            return SweepCube.from_arrays(hit, key=key)
+
+    # --- flatten grid: one row per parameter combination ---
+    shape = tuple(ax.size for ax in axes)
+    combos = np.array(list(product(*axes)), dtype=float).reshape(-1, len(names))
+    n_points = combos.shape[0]
+
+    lo, hi = float(hist_range[0]), float(hist_range[1])
+    hist = np.zeros((n_points * n_groups, hist_bins), dtype=np.int64)
+    summary = np.full((n_points, n_groups, len(q)), np.nan)
+    cols = [np.flatnonzero(grp == g) for g in range(n_groups)]
+    slot_g = grp[None, :]
+
+    step = max(1, int(chunk_elems) // max(1, age.size))
+    for s in range(0, n_points, step):
+        rows = combos[s:s + step]
+        m = base.with_params(**{n: rows[:, j:j + 1] for j, n in enumerate(names)})
+        rb = m.rbirth(age[None, :], feh[None, :], clip=clip)   # (rows, N)
+
+        slot = (np.arange(s, s + rows.shape[0])[:, None] * n_groups) + slot_g
+        accumulate_hist(hist, rb, slot, lo, hi)
+        for g, c in enumerate(cols):
+            if c.size:
+                summary[s:s + rows.shape[0], g] = row_quantiles(rb[:, c], q)
+
+    cube = SweepCube(
+        names=names,
+        axes=axes,
+        edges=np.linspace(lo, hi, hist_bins + 1),
+        hist=hist.reshape(shape + (n_groups, hist_bins)),
+        q=q,
+        summary=summary.reshape(shape + (n_groups, len(q))),
+        key=key,
+    )
+    if cache:
+        save_npz(key, cube.to_arrays(), where)
+    return cube
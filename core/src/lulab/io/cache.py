@@ -0,0 +1,163 @@
+# lulab/io/cache.py
+"""
+Content-addressed cache for derived arrays (sweep cubes, density cubes, tables).
+
+Keys are short hex digests of the inputs (arrays, frames, files, params),
+so a cache entry is reused only while the input snapshot is unchanged.
+Entries are stored as .npz under <topic>/data/interim/cache/ and are
+also memoized in-process, so repeated lookups from a notebook are free.
+
+Usage:
+    from lulab.io.cache import digest, cache_dir, load_npz, save_npz
+
+    key = digest("sweep", age, feh, {"grad_today": grid})
+    arrays = load_npz(key, cache_dir(TOPIC))
+    if arrays is None:
+        arrays = {...}
+        save_npz(key, arrays, cache_dir(TOPIC))
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from lulab.io.paths import get_topic_root
+
+# in-process memo: (dir, key) -> dict of arrays
+_MEMO: Dict[tuple, Dict[str, np.ndarray]] = {}
+_MEMO_MAX = 64
+
+
+# -----------------------------
+# Hashing
+# -----------------------------
+def _update(h, obj: Any) -> None:
+    """Feed one object into a hashlib object in a type-tagged, stable way."""
+    if obj is None:
+        h.update(b"N")
+    elif isinstance(obj, (bytes, bytearray, memoryview)):
+        h.update(b"B")
+        h.update(bytes(obj))
+    elif isinstance(obj, str):
+        h.update(b"S")
+        h.update(obj.encode("utf-8"))
+    elif isinstance(obj, Path):
+        h.update(b"F")
+        h.update(file_digest(obj).encode("ascii"))
+    elif isinstance(obj, (bool, int, float, np.generic)):
+        h.update(b"V")
+        h.update(repr(obj.item() if isinstance(obj, np.generic) else obj).encode("ascii"))
+    elif isinstance(obj, np.ndarray):
+        a = np.ascontiguousarray(obj)
+        h.update(b"A")
+        h.update(f"{a.dtype.str}{a.shape}".encode("ascii"))
+        if a.dtype.hasobject:
+            h.update(json.dumps(a.tolist(), default=str).encode("utf-8"))
+        else:
+            h.update(a.view(np.uint8).ravel() if a.size else b"")
+    elif isinstance(obj, dict):
+        h.update(b"D")
+        for k in sorted(obj, key=str):
+            _update(h, str(k))
+            _update(h, obj[k])
+    elif isinstance(obj, (list, tuple)):
+        h.update(b"L")
+        h.update(str(len(obj)).encode("ascii"))
+        for x in obj:
+            _update(h, x)
+    elif hasattr(obj, "to_numpy") and hasattr(obj, "columns"):   # DataFrame
+        h.update(b"T")
+        for c in obj.columns:
+            _update(h, str(c))
+            _update(h, obj[c].to_numpy())
+    elif hasattr(obj, "to_numpy"):                                # Series
+        _update(h, obj.to_numpy())
+    else:
+        h.update(b"R")
+        h.update(repr(obj).encode("utf-8"))
+
+
+def digest(*objs: Any, length: int = 16) -> str:
+    """Hex digest of any mix of arrays, frames, paths, dicts and scalars."""
+    h = hashlib.blake2b(digest_size=max(4, min(64, length)))
+    for obj in objs:
+        _update(h, obj)
+    return h.hexdigest()
+
+
+def file_digest(path: Path, *, chunk: int = 1 << 20) -> str:
+    """Content hash of a file (streamed; mtime is ignored on purpose)."""
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(chunk), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+# -----------------------------
+# Storage
+# -----------------------------
+def cache_dir(topic_name: Optional[str] = None, *, sub: str = "",
+              create: bool = True) -> Path:
+    """
+    Path to data/interim/cache[/sub] inside a topic.
+
+    Falls back to ~/.cache/lulab when no topic is given.
+    """
+    if topic_name:
+        p = get_topic_root(topic_name) / "data" / "interim" / "cache"
+    else:
+        p = Path.home() / ".cache" / "lulab"
+    if sub:
+        p = p / sub
+    if create:
+        p.mkdir(parents=True, exist_ok=True)
+    return p
+
+
+def load_npz(key: str, directory: Path) -> Optional[Dict[str, np.ndarray]]:
+    """Return cached arrays for key, or None on a miss."""
+    directory = Path(directory)
+    memo_key = (str(directory.resolve()), key)
+    if memo_key in _MEMO:
+        return _MEMO[memo_key]
+
+    p = directory / f"{key}.npz"
+    if not p.exists():
+        return None
+    try:
+        with np.load(p, allow_pickle=False) as z:
+            arrays = {k: z[k] for k in z.files}
+    except Exception:
+        return None   # corrupt / partial entry -> treat as a miss
+
+    _remember(memo_key, arrays)
+    return arrays
+
+
+def save_npz(key: str, arrays: Dict[str, np.ndarray], directory: Path) -> Path:
+    """Write arrays atomically (tmp file + rename) and memoize them."""
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    p = directory / f"{key}.npz"
+    tmp = directory / f".{key}.{os.getpid()}.tmp.npz"
+    np.savez(tmp, **arrays)
+    os.replace(tmp, p)
+    _remember((str(directory.resolve()), key), dict(arrays))
+    return p
+
+
+def _remember(memo_key: tuple, arrays: Dict[str, np.ndarray]) -> None:
+    if len(_MEMO) >= _MEMO_MAX:
+        _MEMO.pop(next(iter(_MEMO)))
+    _MEMO[memo_key] = arrays
+
+
+def clear_memo() -> None:
+    """Drop the in-process memo (files on disk are kept)."""
+    _MEMO.clear()
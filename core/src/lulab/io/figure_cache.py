@@ -0,0 +1,270 @@
+"""
+figure_cache.py
+Content-hash render cache for figures: skip rendering when nothing changed.
+
+build_figures.py and save_fig rewrote every PNG / PDF on every run, which
+also bumped mtimes and made latexmk rebuild the PDFs. A figure's key is
+a digest of what can change its pixels:
+- the input data (a digest of the frame / arrays, computed once per build)
+- the plotting function's source, plus the source of the same-module
+  helpers it calls (tr, _require_cols, ..., transitively) and the
+  module constants they read (TRANSLATIONS, ...)
+- the sources of the lulab package itself: plots draw through
+  lulab.viz.scatter, lulab.viz.export, lulab.io.theme, ..., whose code
+  and constants (MAX_VECTOR_POINTS, ...) change the output too
+- lang, theme, the output formats / dpi
+- the rcParams that affect drawing (backend / keymap / GUI keys excluded)
+On a hit (same key, every output present and byte-identical to what was
+recorded) nothing is rendered and the files are not touched.
+
+Each output base keeps a small record in <out_dir>/.render/<name>.json
+(written by whichever process rendered it, so pool workers never share
+a file); collect_manifest() merges them into <figures>/manifest.json:
+which inputs produced each figure.
+
+Usage:
+    from lulab.io.figure_cache import cached_render
+
+    paths, hit = cached_render(OUT / "en" / "FIG_001", plots.plot_feh_histogram, df,
+                               lang="en", data_key=digest(df))
+"""
+
+from __future__ import annotations
+
+import inspect
+import json
+import os
+import types
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import matplotlib as mpl
+
+from lulab.io.cache import digest, file_digest
+
+RECORD_DIR: str = ".render"
+MANIFEST: str = "manifest.json"
+
+# rcParams that never change the saved pixels
+_RC_SKIP_PREFIXES: Tuple[str, ...] = (
+    "backend", "interactive", "toolbar", "timezone", "keymap.", "webagg.",
+    "tk.", "macosx.", "animation.", "date.epoch", "figure.max_open_warning",
+    "figure.raise_window", "savefig.directory",
+)
+
+
+# -------------------------
+# Key ingredients
+# -------------------------
+def rc_fingerprint() -> str:
+    """Digest of the drawing-relevant rcParams."""
+    rc = {k: v for k, v in mpl.rcParams.items() if not k.startswith(_RC_SKIP_PREFIXES)}
+    return digest({k: repr(v) for k, v in rc.items()})
+
+
+def _source(obj: Any) -> str:
+    try:
+        return inspect.getsource(obj)
+    except (OSError, TypeError):
+        code = getattr(obj, "__code__", None)
+        return repr(code.co_code) if code is not None else repr(obj)
+
+
+def function_fingerprint(fn: Callable) -> str:
+    """Source of fn and of the same-module functions / constants it references (transitively)."""
+    fn = inspect.unwrap(fn)
+    module = getattr(fn, "__module__", None)
+    seen: Dict[str, str] = {}
+    stack = [fn]
+    while stack:
+        f = stack.pop()
+        name = f"{f.__module__}.{f.__qualname__}"
+        if name in seen:
+            continue
+        seen[name] = _source(f)
+        code = getattr(f, "__code__", None)
+        if code is None:
+            continue
+        names = set(code.co_names)
+        for c in code.co_consts:                       # nested functions / lambdas
+            if isinstance(c, types.CodeType):
+                names.update(c.co_names)
+        for n in names:
+            g = f.__globals__.get(n)
+            if isinstance(g, types.FunctionType) and g.__module__ == module:
+                stack.append(g)
+            elif isinstance(g, (dict, list, tuple, str, int, float)):
+                seen.setdefault(f"{module}.{n}", repr(g))   # module constants, e.g. TRANSLATIONS
+    return digest(sorted(seen.items()))
+
+
+# lulab source file -> ((mtime_ns, size), digest); files are re-hashed only when they change
+_SRC_MEMO: Dict[str, Tuple[Tuple[int, int], str]] = {}
+
+
+def package_fingerprint() -> str:
+    """Digest of every lulab source file (path + content)."""
+    import lulab
+
+    root = Path(lulab.__file__).resolve().parent
+    items = []
+    for p in sorted(root.rglob("*.py")):
+        st = p.stat()
+        stamp = (st.st_mtime_ns, st.st_size)
+        memo = _SRC_MEMO.get(str(p))
+        if memo is None or memo[0] != stamp:
+            memo = _SRC_MEMO[str(p)] = (stamp, file_digest(p))
+        items.append((p.relative_to(root).as_posix(), memo[1]))
+    return digest(items)
+
+
+def current_theme() -> str:
+    from lulab.io.theme import THEME
+    return str(THEME)
+
+
+def render_key(fn: Optional[Callable], data_key: Any, *, lang: str,
+               formats: Sequence[str], dpi: int,
+               theme: Optional[str] = None,
+               extra: Any = None) -> Tuple[str, Dict[str, Any]]:
+    """(key, inputs) for one figure; inputs is what the manifest records."""
+    inputs = {
+        "data": data_key if isinstance(data_key, str) else digest(data_key),
+        "function": None if fn is None else f"{fn.__module__}.{fn.__qualname__}",
+        "function_src": None if fn is None else function_fingerprint(fn),
+        "lulab_src": package_fingerprint(),
+        "lang": lang,
+        "theme": theme or current_theme(),
+        "rc": rc_fingerprint(),
+        "formats": list(formats),
+        "dpi": int(dpi),
+        "extra": None if extra is None else digest(extra),
+    }
+    return digest(inputs), inputs
+
+
+# -------------------------
+# Records
+# -------------------------
+def _record_path(outbase: Path) -> Path:
+    outbase = Path(outbase)
+    return outbase.parent / RECORD_DIR / f"{outbase.name}.json"
+
+
+def read_record(outbase: Path) -> Optional[Dict[str, Any]]:
+    try:
+        return json.loads(_record_path(outbase).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+def is_fresh(outbase: Path, key: str) -> bool:
+    """True if outbase was rendered from key and its files are unchanged since."""
+    rec = read_record(outbase)
+    if not rec or rec.get("key") != key:
+        return False
+    for name, h in rec.get("outputs", {}).items():
+        p = Path(outbase).parent / name
+        if not p.exists() or file_digest(p) != h:
+            return False
+    return bool(rec.get("outputs"))
+
+
+def write_record(outbase: Path, key: str, inputs: Dict[str, Any],
+                 paths: Sequence[Path]) -> Path:
+    rp = _record_path(outbase)
+    outputs = {Path(p).name: file_digest(Path(p)) for p in paths}
+    old = read_record(outbase)
+    if old and old.get("key") == key and old.get("outputs") == outputs:
+        return rp                                   # nothing changed: keep the record as is
+    rec = {
+        "key": key,
+        "inputs": inputs,
+        "outputs": outputs,
+        "rendered": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    }
+    _write_json(rp, rec)
+    return rp
+
+
+def replace_output_digest(path: Path, old: str, new: str) -> bool:
+    """
+    Point the record of path's figure at new content (e.g. after lossless
+    PNG recompression), if it still records old. True if updated.
+    """
+    path = Path(path)
+    outbase = path.with_suffix("")
+    rec = read_record(outbase)
+    if not rec or rec.get("outputs", {}).get(path.name) != old:
+        return False
+    rec["outputs"][path.name] = new
+    _write_json(_record_path(outbase), rec)
+    return True
+
+
+def _write_json(rp: Path, rec: Dict[str, Any]) -> None:
+    rp.parent.mkdir(parents=True, exist_ok=True)
+    tmp = rp.with_name(f".{rp.name}.{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(rec, indent=2) + "\n", encoding="utf-8")
+    os.replace(tmp, rp)
+
+
+def collect_manifest(figures_root: Path) -> Path:
+    """
+    Merge every .render record under figures_root into figures_root/manifest.json.
+
+    The file is rewritten only when its content changes (mtime stays put).
+    """
+    figures_root = Path(figures_root)
+    entries = {}
+    for rp in sorted(figures_root.rglob(f"{RECORD_DIR}/*.json")):
+        try:
+            rec = json.loads(rp.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            continue
+        rel = (rp.parent.parent / rp.stem).relative_to(figures_root).as_posix()
+        entries[rel] = {k: rec.get(k) for k in ("key", "inputs", "outputs", "rendered")}
+    out = figures_root / MANIFEST
+    text = json.dumps(entries, indent=2, sort_keys=True) + "\n"
+    if not out.exists() or out.read_text(encoding="utf-8") != text:
+        figures_root.mkdir(parents=True, exist_ok=True)
+        out.write_text(text, encoding="utf-8")
+    return out
+
+
+# -------------------------
+# Render through the cache
+# -------------------------
+def cached_render(outbase: Path, fn: Callable, data: Any, *,
+                  lang: str = "en",
+                  formats: Sequence[str] = ("pdf", "png"),
+                  dpi: int = 200,
+                  data_key: Any = None,
+                  theme: Optional[str] = None,
+                  force: bool = False,
+                  save: Optional[Callable[..., List[Path]]] = None) -> Tuple[List[Path], bool]:
+    """
+    fn(data, lang=lang) -> (fig, ax), saved as outbase.<fmt>, unless fresh.
+
+    data_key : precomputed digest of data (pass it when rendering many
+               figures from one dataset); defaults to digest(data).
+    Returns (paths, hit).
+    """
+    import matplotlib.pyplot as plt
+
+    if save is None:
+        from lulab.viz.export import save_figure as save
+    outbase = Path(outbase)
+    key, inputs = render_key(fn, data if data_key is None else data_key,
+                             lang=lang, formats=formats, dpi=dpi, theme=theme)
+    if not force and is_fresh(outbase, key):
+        return [outbase.with_suffix(f".{f}") for f in formats], True
+
+    fig, _ = fn(data, lang=lang)
+    try:
+        paths = save(fig, outbase, formats=tuple(formats), dpi=dpi)
+    finally:
+        plt.close(fig)
+    write_record(outbase, key, inputs, paths)
+    return list(paths), False
@@ -0,0 +1,299 @@
+"""
+png_opt.py
+Lossless recompression of saved PNGs (figures, animation frames) in a process pool.
+
+Figures leave matplotlib / export.save_figure as 8-bit RGBA PNGs at the
+default zlib setting and are then embedded in every PDF and copied into
+formats/. This post-save stage rewrites each PNG losslessly:
+- RGBA without transparency -> RGB; grey-only images -> L / LA
+- at most 256 distinct colours -> an exact palette (P, with tRNS for alpha)
+- every candidate encoded at zlib level 9 with a few strategies; the
+  smallest wins, and only if it is smaller than the file on disk
+- decoded pixels are compared with the original before replacing it
+dpi and text chunks are kept. Files are processed in a process pool.
+
+Each directory keeps <dir>/.render/png_opt.json: per file the content
+hash before / after and the bytes saved. A file whose hash equals the
+recorded result is skipped, so re-runs only touch new or re-rendered
+PNGs. lulab.io.figure_cache records are updated to the new hash, so an
+optimized figure still counts as up to date.
+
+Usage:
+    from lulab.io.png_opt import optimize_pngs, savings_report
+
+    results = optimize_pngs([TOPIC_DIR / "figures"], workers=4)
+    print(savings_report(results))
+
+    python -m lulab.io.png_opt topics/TOP_0001_exoplanet_birth_radius/figures
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import io
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from lulab.io.cache import file_digest
+from lulab.io.figure_cache import RECORD_DIR, replace_output_digest
+
+MANIFEST: str = "png_opt.json"
+
+# zlib strategies tried per candidate: default, filtered, RLE
+ZLIB_STRATEGIES: Tuple[int, ...] = (0, 1, 3)
+ZLIB_LEVEL: int = 9
+
+# modes that round-trip through 8-bit RGBA exactly
+LOSSLESS_MODES: Tuple[str, ...] = ("RGBA", "RGB", "LA", "L", "P")
+
+
+@dataclass
+class PngResult:
+    path: str
+    before: int
+    after: int
+    mode: str = ""              # mode written (or kept)
+    digest_in: str = ""
+    digest_out: str = ""
+    skipped: bool = False       # already optimized, nothing read or written
+    seconds: float = 0.0
+    error: Optional[str] = None
+
+    @property
+    def saved(self) -> int:
+        return self.before - self.after
+
+
+def _bytes_digest(data: bytes) -> str:
+    """Same hash as file_digest() of a file holding data."""
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+# -------------------------
+# Manifest (one per directory)
+# -------------------------
+def _manifest_path(directory: Path) -> Path:
+    return Path(directory) / RECORD_DIR / MANIFEST
+
+
+def read_manifest(directory: Path) -> Dict[str, dict]:
+    try:
+        return json.loads(_manifest_path(directory).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_manifest(directory: Path, entries: Dict[str, dict]) -> None:
+    mp = _manifest_path(directory)
+    text = json.dumps(entries, indent=2, sort_keys=True) + "\n"
+    if mp.exists() and mp.read_text(encoding="utf-8") == text:
+        return
+    mp.parent.mkdir(parents=True, exist_ok=True)
+    tmp = mp.with_name(f".{mp.name}.{os.getpid()}.tmp")
+    tmp.write_text(text, encoding="utf-8")
+    os.replace(tmp, mp)
+
+
+def optimized_from(path: Path, raw: bytes) -> bool:
+    """True if path is the optimized version of exactly these PNG bytes."""
+    path = Path(path)
+    e = read_manifest(path.parent).get(path.name)
+    return (bool(e) and path.exists() and e.get("in") == _bytes_digest(raw)
+            and file_digest(path) == e.get("out"))
+
+
+# -------------------------
+# One file
+# -------------------------
+def _candidates(img) -> List:
+    """Lossless re-encodings of img worth trying (smallest mode first)."""
+    from PIL import Image
+
+    rgba = np.asarray(img.convert("RGBA"))
+    opaque = bool((rgba[..., 3] == 255).all())
+    grey = bool((rgba[..., 0] == rgba[..., 1]).all() and (rgba[..., 1] == rgba[..., 2]).all())
+    out = []
+
+    packed = np.ascontiguousarray(rgba).view(np.uint32).ravel()
+    uniq, inv = np.unique(packed, return_inverse=True)
+    if uniq.size <= 256:
+        pal = uniq.view(np.uint8).reshape(-1, 4)
+        order = np.argsort(pal[:, 3] == 255, kind="stable")    # translucent entries first (short tRNS)
+        rank = np.empty_like(order)
+        rank[order] = np.arange(order.size)
+        p = Image.fromarray(rank[inv.ravel()].astype(np.uint8).reshape(rgba.shape[:2]), "P")
+        p.putpalette(pal[order, :3].ravel().tobytes(), rawmode="RGB")
+        if not opaque:
+            n_tr = int((pal[:, 3] < 255).sum())
+            p.info["transparency"] = pal[order[:n_tr], 3].tobytes()
+        out.append(p)
+    if grey:
+        out.append(Image.fromarray(rgba[..., 0], "L") if opaque
+                   else Image.fromarray(np.ascontiguousarray(rgba[..., [0, 3]]), "LA"))
+    out.append(Image.fromarray(np.ascontiguousarray(rgba[..., :3]), "RGB") if opaque
+               else Image.fromarray(rgba, "RGBA"))
+    return out
+
+
+def _encode(img, info: dict, strategy: int) -> bytes:
+    from PIL import PngImagePlugin
+
+    meta = PngImagePlugin.PngInfo()
+    for k, v in (info.get("text") or {}).items():
+        meta.add_text(k, v)
+    kw = {"pnginfo": meta, "compress_level": ZLIB_LEVEL, "compress_type": strategy}
+    if "dpi" in info:
+        kw["dpi"] = info["dpi"]
+    if "transparency" in img.info:
+        kw["transparency"] = img.info["transparency"]
+    buf = io.BytesIO()
+    img.save(buf, format="PNG", **kw)
+    return buf.getvalue()
+
+
+def optimize_png(path: Path, *, verify: bool = True) -> PngResult:
+    """Recompress one PNG in place if a lossless re-encoding is smaller."""
+    from PIL import Image
+
+    t0 = time.perf_counter()
+    path = Path(path)
+    raw = path.read_bytes()
+    h_in = _bytes_digest(raw)
+    with Image.open(io.BytesIO(raw)) as im:
+        im.load()
+        info = {"text": dict(getattr(im, "text", {}) or {})}
+        if "dpi" in im.info:
+            info["dpi"] = im.info["dpi"]
+        mode = im.mode
+        best, best_mode = raw, mode
+        # 16-bit / CMYK / ... would not survive the 8-bit RGBA round trip
+        cands = _candidates(im) if mode in LOSSLESS_MODES else []
+        ref = np.asarray(im.convert("RGBA")) if verify and cands else None
+        for cand in cands:
+            for strategy in ZLIB_STRATEGIES:
+                data = _encode(cand, info, strategy)
+                if len(data) < len(best):
+                    best, best_mode = data, cand.mode
+
+    if best is not raw:
+        if verify:
+            with Image.open(io.BytesIO(best)) as chk:
+                if not np.array_equal(np.asarray(chk.convert("RGBA")), ref):
+                    raise ValueError(f"Re-encoded PNG differs from the original: {path}")
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        tmp.write_bytes(best)
+        os.replace(tmp, path)
+    return PngResult(str(path), len(raw), len(best), best_mode, h_in, _bytes_digest(best),
+                     seconds=time.perf_counter() - t0)
+
+
+def _run(path: str, verify: bool) -> PngResult:
+    try:
+        return optimize_png(Path(path), verify=verify)
+    except Exception as e:                      # report and go on with the rest
+        size = os.path.getsize(path) if os.path.exists(path) else 0
+        return PngResult(path, size, size, error=f"{type(e).__name__}: {e}")
+
+
+# -------------------------
+# Trees of files
+# -------------------------
+def find_pngs(paths: Iterable[Path]) -> List[Path]:
+    out = []
+    for p in map(Path, paths):
+        if p.is_dir():
+            out += sorted(q for q in p.rglob("*.png")
+                          if RECORD_DIR not in q.parts and not q.name.startswith("."))
+        elif p.suffix.lower() == ".png":
+            out.append(p)
+    return out
+
+
+def optimize_pngs(paths: Iterable[Path], *,
+                  workers: Optional[int] = None,
+                  force: bool = False,
+                  verify: bool = True,
+                  verbose: bool = False) -> List[PngResult]:
+    """
+    Optimize every PNG under paths (files or directories).
+
+    Files whose content hash matches their manifest entry are skipped
+    unless force; workers=1 runs in-process.
+    """
+    files = find_pngs(paths)
+    manifests: Dict[Path, Dict[str, dict]] = {}
+    results: Dict[int, PngResult] = {}
+    todo: List[int] = []
+    for i, f in enumerate(files):
+        m = manifests.setdefault(f.parent, read_manifest(f.parent))
+        e = m.get(f.name)
+        if not force and e and file_digest(f) == e.get("out"):
+            results[i] = PngResult(str(f), e["before"], e["after"], e.get("mode", ""),
+                                   e["in"], e["out"], skipped=True)
+        else:
+            todo.append(i)
+
+    workers = max(1, min(len(todo), os.cpu_count() or 1)) if workers is None else max(1, int(workers))
+    if workers == 1 or len(todo) <= 1:
+        done = [_run(str(files[i]), verify) for i in todo]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            done = list(pool.map(_run, [str(files[i]) for i in todo], [verify] * len(todo),
+                                 chunksize=max(1, len(todo) // (4 * workers))))
+
+    dirty = set()
+    for i, r in zip(todo, done):
+        results[i] = r
+        if r.error is not None:
+            continue
+        f = files[i]
+        dirty.add(f.parent)
+        manifests[f.parent][f.name] = {"in": r.digest_in, "out": r.digest_out,
+                                       "before": r.before, "after": r.after, "mode": r.mode}
+        if r.digest_out != r.digest_in:
+            replace_output_digest(f, r.digest_in, r.digest_out)
+        if verbose:
+            print(f"{'Optimized' if r.saved else 'Kept'}: {f} "
+                  f"({r.before / 1024:.0f} -> {r.after / 1024:.0f} KB)")
+    for d in dirty:
+        _write_manifest(d, manifests[d])
+    return [results[i] for i in range(len(files))]
+
+
+def savings_report(results: Sequence[PngResult]) -> str:
+    before = sum(r.before for r in results)
+    after = sum(r.after for r in results)
+    n_skip = sum(r.skipped for r in results)
+    n_bad = sum(r.error is not None for r in results)
+    pct = 100.0 * (before - after) / before if before else 0.0
+    lines = [f"FAILED: {r.path}: {r.error}" for r in results if r.error is not None]
+    lines.append(f"{len(results)} PNGs ({n_skip} already optimized, {n_bad} failed): "
+                 f"{before / 2**20:.2f} -> {after / 2**20:.2f} MB ({pct:.1f}% smaller)")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    ap = argparse.ArgumentParser(description="Lossless PNG recompression (figures, frames)")
+    ap.add_argument("paths", nargs="+", type=Path, help="PNG files or directories")
+    ap.add_argument("--workers", type=int, default=None)
+    ap.add_argument("--force", action="store_true", help="re-run on already optimized files")
+    ap.add_argument("--no-verify", action="store_true", help="skip the decoded-pixel check")
+    args = ap.parse_args(argv)
+
+    results = optimize_pngs(args.paths, workers=args.workers, force=args.force,
+                            verify=not args.no_verify, verbose=True)
+    print(savings_report(results))
+    if any(r.error is not None for r in results):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,269 @@
+"""
+pyramid.py
+Resolution pyramid (thumbnail / web / print) for figures and animation posters.
+
+formats/ deliverables (posts, episodes, lectures) referenced the full
+200-dpi figure PNGs whatever size they were shown at. Here every source
+image gets a set of levels:
+- thumb / web: downsampled once with Pillow's Lanczos filter
+  (reducing_gap for a fast, alias-free pre-reduction), written as WebP;
+  a level is never upsampled, so small sources just get fewer levels
+- print: the original file itself (referenced, not copied)
+Animations (.gif / .mp4) contribute a poster frame (the last frame, where
+reveal animations are complete), which then gets the same levels.
+
+Work is spread over a process pool. A source is only redone when its
+content hash or the level settings change. <out_dir>/index.json lists
+every source with its levels (path, size in px and bytes), and pick()
+returns the smallest level that is at least as wide as needed.
+
+Usage:
+    from lulab.io.pyramid import build_pyramid, load_index, pick
+
+    index = build_pyramid([TOPIC_DIR / "figures", TOPIC_DIR / "animations"],
+                          TOPIC_DIR / "figures" / "pyramid")
+    pick(index, "figures/en/FIG_001_feh_histogram.png", min_width=600)
+    # -> {"path": "figures/pyramid/figures/en/FIG_001_feh_histogram@web.webp", ...}
+
+    python -m lulab.io.pyramid topics/TOP_.../figures topics/TOP_.../animations \
+        --out topics/TOP_.../figures/pyramid
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from lulab.io.cache import digest, file_digest
+
+INDEX: str = "index.json"
+
+IMAGE_SUFFIXES: Tuple[str, ...] = (".png", ".jpg", ".jpeg", ".webp")
+ANIM_SUFFIXES: Tuple[str, ...] = (".gif", ".mp4")
+
+
+@dataclass(frozen=True)
+class Level:
+    name: str
+    max_width: Optional[int]    # None: the original (print)
+    fmt: str = "webp"
+    quality: int = 88
+
+
+LEVELS: Tuple[Level, ...] = (
+    Level("thumb", 360, "webp", 80),
+    Level("web", 1280, "webp", 88),
+    Level("print", None),
+)
+
+
+# -------------------------
+# Sources
+# -------------------------
+def find_sources(paths: Iterable[Path], exclude: Optional[Path] = None) -> List[Path]:
+    """
+    Images and animations under paths, skipping exclude (the pyramid itself).
+
+    One source per name: FIG.png wins over FIG.webp, anim.gif over anim.mp4.
+    """
+    exclude = None if exclude is None else Path(exclude).resolve()
+    rank = {s: i for i, s in enumerate(IMAGE_SUFFIXES + ANIM_SUFFIXES)}
+    best: Dict[Path, Path] = {}
+    for p in map(Path, paths):
+        files = sorted(p.rglob("*")) if p.is_dir() else [p]
+        for f in files:
+            if f.suffix.lower() not in IMAGE_SUFFIXES + ANIM_SUFFIXES or f.name.startswith("."):
+                continue
+            if any(part.startswith(".") for part in f.parts[len(p.parts):]):
+                continue                                  # .render/ and friends
+            if exclude is not None and exclude in f.resolve().parents:
+                continue
+            key = f.with_suffix("")
+            if key not in best or rank[f.suffix.lower()] < rank[best[key].suffix.lower()]:
+                best[key] = f
+    return sorted(best.values())
+
+
+def _poster(src: Path, dst: Path) -> Path:
+    """Last frame of a GIF / MP4 as PNG."""
+    from PIL import Image
+
+    if src.suffix.lower() == ".gif":
+        with Image.open(src) as im:
+            im.seek(getattr(im, "n_frames", 1) - 1)
+            im.convert("RGBA").save(dst, format="PNG")
+        return dst
+    import matplotlib as mpl
+
+    ffmpeg = mpl.rcParams["animation.ffmpeg_path"]
+    if shutil.which(ffmpeg) is None:
+        raise RuntimeError(f"ffmpeg not found ({ffmpeg}); cannot extract a poster from {src}")
+    subprocess.run([ffmpeg, "-y", "-loglevel", "error", "-sseof", "-0.5", "-i", str(src),
+                    "-update", "1", "-frames:v", "1", str(dst)], check=True)
+    return dst
+
+
+# -------------------------
+# One source
+# -------------------------
+def _rel(p: Path, root: Path) -> str:
+    try:
+        return Path(os.path.relpath(p, root)).as_posix()
+    except ValueError:
+        return Path(p).as_posix()
+
+
+def _render_levels(src: str, out_stem: str, levels: Sequence[Level], root: str) -> Dict[str, Any]:
+    """Levels of one source; paths in the entry are relative to root."""
+    from PIL import Image
+
+    t0 = time.perf_counter()
+    src_p, stem, root_p = Path(src), Path(out_stem), Path(root)
+    stem.parent.mkdir(parents=True, exist_ok=True)
+    base = src_p
+    if src_p.suffix.lower() in ANIM_SUFFIXES:
+        base = _poster(src_p, stem.with_name(stem.name + "@poster.png"))
+
+    entry: Dict[str, Any] = {"levels": {}}
+    with Image.open(base) as im:
+        im.load()
+        w, h = im.size
+        entry["width"], entry["height"] = w, h
+        if im.mode not in ("RGB", "RGBA"):
+            im = im.convert("RGBA" if "A" in im.getbands() or "transparency" in im.info else "RGB")
+        for lv in levels:
+            if lv.max_width is None:
+                entry["levels"][lv.name] = {"path": _rel(base, root_p), "width": w, "height": h,
+                                            "bytes": base.stat().st_size}
+                continue
+            if lv.max_width >= w:
+                continue                                  # never upsample
+            size = (lv.max_width, max(1, round(h * lv.max_width / w)))
+            small = im.resize(size, Image.Resampling.LANCZOS, reducing_gap=3.0)
+            out = stem.with_name(f"{stem.name}@{lv.name}.{lv.fmt}")
+            tmp = out.with_name(f".{out.name}.{os.getpid()}.tmp")
+            kw = {"quality": lv.quality}
+            if lv.fmt == "webp":
+                kw["method"] = 6
+            elif lv.fmt in ("jpg", "jpeg"):
+                small = small.convert("RGB")
+                kw["optimize"] = True
+            small.save(tmp, format={"jpg": "JPEG"}.get(lv.fmt, lv.fmt.upper()), **kw)
+            os.replace(tmp, out)
+            entry["levels"][lv.name] = {"path": _rel(out, root_p), "width": size[0],
+                                        "height": size[1], "bytes": out.stat().st_size}
+    entry["seconds"] = round(time.perf_counter() - t0, 3)
+    return entry
+
+
+def _run(args: Tuple[str, str, Sequence[Level], str]) -> Dict[str, Any]:
+    try:
+        return _render_levels(*args)
+    except Exception as e:                                # report and go on with the rest
+        return {"error": f"{type(e).__name__}: {e}"}
+
+
+# -------------------------
+# Index
+# -------------------------
+def load_index(out_dir: Path) -> Dict[str, Any]:
+    try:
+        return json.loads((Path(out_dir) / INDEX).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+
+def pick(index: Dict[str, Any], source: str, min_width: int) -> Optional[Dict[str, Any]]:
+    """Smallest level of source at least min_width px wide (else the widest)."""
+    entry = index.get(source)
+    if not entry or not entry.get("levels"):
+        return None
+    levels = sorted(entry["levels"].values(), key=lambda lv: lv["width"])
+    for lv in levels:
+        if lv["width"] >= min_width:
+            return lv
+    return levels[-1]
+
+
+def build_pyramid(paths: Iterable[Path], out_dir: Path, *,
+                  levels: Sequence[Level] = LEVELS,
+                  root: Optional[Path] = None,
+                  workers: Optional[int] = None,
+                  force: bool = False,
+                  verbose: bool = False) -> Dict[str, Any]:
+    """
+    Build (or refresh) the pyramid of every image / animation under paths.
+
+    Index keys and level paths are relative to root (default
+    out_dir.parent.parent: the topic for <topic>/figures/pyramid).
+    Returns the index.
+    """
+    out_dir = Path(out_dir)
+    root = Path(root) if root is not None else out_dir.parent.parent
+    level_key = digest([asdict(lv) for lv in levels])
+    old = load_index(out_dir)
+    index: Dict[str, Any] = {}
+    todo: List[Tuple[str, Tuple[str, str, Sequence[Level], str]]] = []
+
+    for src in find_sources(paths, exclude=out_dir):
+        rel = _rel(src, root)
+        h = file_digest(src)
+        e = old.get(rel)
+        fresh = (not force and e and "error" not in e and e.get("hash") == h
+                 and e.get("levels_key") == level_key
+                 and all((root / lv["path"]).exists() for lv in e["levels"].values()))
+        if fresh:
+            index[rel] = e
+            continue
+        stem = out_dir / Path(rel).with_suffix("")
+        index[rel] = {"hash": h, "levels_key": level_key}
+        todo.append((rel, (str(src), str(stem), tuple(levels), str(root))))
+
+    workers = max(1, min(len(todo), os.cpu_count() or 1)) if workers is None else max(1, int(workers))
+    if workers == 1 or len(todo) <= 1:
+        done = [_run(a) for _, a in todo]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            done = list(pool.map(_run, [a for _, a in todo]))
+    for (rel, _), entry in zip(todo, done):
+        index[rel].update(entry)
+        if verbose:
+            state = f"FAILED: {entry['error']}" if "error" in entry else ", ".join(
+                f"{k} {v['width']}px" for k, v in entry["levels"].items())
+            print(f"Pyramid: {rel} ({state})")
+
+    text = json.dumps(index, indent=2, sort_keys=True) + "\n"
+    ip = out_dir / INDEX
+    if not ip.exists() or ip.read_text(encoding="utf-8") != text:
+        out_dir.mkdir(parents=True, exist_ok=True)
+        ip.write_text(text, encoding="utf-8")
+    return index
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    ap = argparse.ArgumentParser(description="Thumbnail / web / print pyramid for figures and animations")
+    ap.add_argument("paths", nargs="+", type=Path, help="figure / animation files or directories")
+    ap.add_argument("--out", type=Path, required=True, help="pyramid directory (index.json goes here)")
+    ap.add_argument("--root", type=Path, default=None, help="base for the paths in the index")
+    ap.add_argument("--workers", type=int, default=None)
+    ap.add_argument("--force", action="store_true")
+    args = ap.parse_args(argv)
+
+    index = build_pyramid(args.paths, args.out, root=args.root, workers=args.workers,
+                          force=args.force, verbose=True)
+    bad = [k for k, e in index.items() if "error" in e]
+    print(f"{len(index)} sources, {len(bad)} failed. Index: {args.out / INDEX}")
+    if bad:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
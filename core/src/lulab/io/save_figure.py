@@ -1,12 +1,17 @@
 # lulab/io/save_figure.py
 from __future__ import annotations
 
+import io
+import os
 from pathlib import Path
-from typing import Optional
+from typing import Any, Optional
 
 import matplotlib.pyplot as plt
 
+from lulab.io.cache import digest
+from lulab.io.figure_cache import rc_fingerprint, write_record
 from lulab.io.paths import figures_dir
+from lulab.io.png_opt import optimized_from
 from lulab.io.theme import THEME
 
 
@@ -18,6 +23,8 @@ def save_fig(
     fig=None,
     dpi: int = 200,
     transparent: bool = False,
+    inputs: Any = None,
+    force: bool = False,
 ) -> Path:
     """
     Save a matplotlib figure into figures/<lang>/ of a given topic,
@@ -37,6 +44,17 @@ def save_fig(
         Output DPI.
     transparent : bool
         Force transparent background (overrides theme).
+    inputs : optional
+        Anything the figure was computed from (arrays, frames, params);
+        its digest is recorded in the figure manifest.
+    force : bool
+        Write even when the bytes are unchanged.
+
+    The PNG is always rendered (to memory): the figure's labels, limits
+    or drawing code may have changed while the inputs did not. The file
+    is only rewritten when its bytes change (or when the file on disk is
+    no longer the lulab.io.png_opt-optimized version of them), so
+    unchanged figures keep their mtime.
 
     Returns
     -------
@@ -56,12 +74,33 @@ def save_fig(
         else plt.rcParams.get("figure.facecolor", "white")
     )
 
+    record = {
+        "inputs": None if inputs is None else digest(inputs),
+        "lang": lang,
+        "theme": THEME,
+        "rc": rc_fingerprint(),
+        "dpi": int(dpi),
+        "transparent": bool(transparent),
+    }
+    key = digest("save_fig", name, record)
+
+    buf = io.BytesIO()
     fig.savefig(
-        out_path,
+        buf,
+        format="png",
         dpi=dpi,
         bbox_inches="tight",
         facecolor=facecolor,
     )
+    data = buf.getvalue()
 
-    print(f"Saved figure: {out_path.resolve()}")
-    return out_path
\ No newline at end of file
+    if not force and out_path.exists() and (out_path.read_bytes() == data
+                                            or optimized_from(out_path, data)):
+        print(f"Unchanged figure: {out_path.resolve()}")
+    else:
+        tmp = out_path.with_name(f".{out_path.name}.{os.getpid()}.tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, out_path)
+        print(f"Saved figure: {out_path.resolve()}")
+    write_record(out_dir / name, key, record, [out_path])
+    return out_path
@@ -0,0 +1,195 @@
+"""
+density.py
+Cached 2D / 3D density cubes (histograms) from linearized bincount.
+
+MISC_001 rebuilds a 220 x 180 R_gal x [Fe/H] histogram from the full
+point set every time the cell runs (and ANIM / ACAP panels do the same).
+Here the histogram is
+- computed chunk by chunk: per-axis bin index -> one linear index ->
+  a single np.bincount (out-of-range / NaN rows go to a dropped slot)
+- stored in the topic cache, keyed on the data snapshot and the binning
+- re-cropped, re-binned or projected from the cube, without the points
+
+Bin rule matches np.histogramdd: [lo, hi) per bin, last bin closed.
+
+Usage:
+    from lulab.stats.density import density_cube
+
+    cube = density_cube({"R_gal": R, "feh": F},
+                        {"R_gal": np.linspace(0, 16, 221),
+                         "feh": np.linspace(-1.6, 0.7, 181)}, topic=TOPIC)
+    H, extent = cube.image("R_gal", "feh")          # for imshow(origin="lower")
+    H2, _ = cube.crop(R_gal=(4, 14)).rebin(R_gal=2).image("R_gal", "feh")
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Dict, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from lulab.io.cache import cache_dir, digest, load_npz, save_npz
+from lulab.stats.binned import bin_index
+
+# Rows per chunk (index arrays are intp, so ~8 bytes x n_axes per row)
+CHUNK_ROWS: int = 1 << 20
+
+
+@dataclass
+class DensityCube:
+    """N-d histogram with named axes."""
+
+    names: Tuple[str, ...]
+    edges: Tuple[np.ndarray, ...]
+    counts: np.ndarray          # shape = (n_bins per axis)
+    key: str = ""
+
+    def axis(self, name: str) -> int:
+        if name not in self.names:
+            raise KeyError(f"Not a cube axis: {name}. Axes: {self.names}")
+        return self.names.index(name)
+
+    def centers(self, name: str) -> np.ndarray:
+        e = self.edges[self.axis(name)]
+        return 0.5 * (e[:-1] + e[1:])
+
+    @property
+    def total(self) -> float:
+        return float(self.counts.sum())
+
+    def crop(self, **ranges: Tuple[float, float]) -> "DensityCube":
+        """Keep whole bins that lie inside (lo, hi) on the given axes."""
+        sl = [slice(None)] * len(self.names)
+        edges = list(self.edges)
+        for name, (lo, hi) in ranges.items():
+            i = self.axis(name)
+            e = edges[i]
+            a = int(np.searchsorted(e, lo, side="left"))
+            b = int(np.searchsorted(e, hi, side="right")) - 1
+            a, b = min(a, e.size - 1), max(b, a)
+            sl[i] = slice(a, b)
+            edges[i] = e[a:b + 1]
+        return DensityCube(self.names, tuple(edges), self.counts[tuple(sl)], self.key)
+
+    def rebin(self, **factors: int) -> "DensityCube":
+        """Merge every f adjacent bins on the given axes (trailing remainder dropped)."""
+        counts, edges = self.counts, list(self.edges)
+        for name, f in factors.items():
+            i = self.axis(name)
+            if not f >= 1:
+                raise ValueError(f"rebin factor for {name} must be >= 1, got {f}")
+            f = int(f)
+            n = (counts.shape[i] // f) * f
+            counts = np.take(counts, np.arange(n), axis=i)
+            shape = counts.shape[:i] + (n // f, f) + counts.shape[i + 1:]
+            counts = counts.reshape(shape).sum(axis=i + 1)
+            edges[i] = edges[i][:n + 1:f]
+        return DensityCube(self.names, tuple(edges), counts, self.key)
+
+    def project(self, *keep: str) -> "DensityCube":
+        """Sum out every axis not in keep (order of keep is preserved)."""
+        idx = [self.axis(n) for n in keep]
+        drop = tuple(i for i in range(len(self.names)) if i not in idx)
+        counts = self.counts.sum(axis=drop) if drop else self.counts
+        order = np.argsort(np.argsort(idx))
+        counts = np.transpose(counts, order)
+        return DensityCube(tuple(keep), tuple(self.edges[i] for i in idx), counts, self.key)
+
+    def select(self, name: str, lo: float, hi: float) -> "DensityCube":
+        """Sum the bins of one axis over [lo, hi) and drop that axis (e.g. an age slice)."""
+        c = self.crop(**{name: (lo, hi)})
+        return c.project(*[n for n in self.names if n != name])
+
+    def image(self, x: str, y: str, *, density: bool = False,
+              zero_nan: bool = False) -> Tuple[np.ndarray, list]:
+        """
+        (H, extent) of the x-y projection for imshow(origin="lower").
+
+        H is (ny, nx). density divides by total * bin area; zero_nan turns
+        empty bins into NaN (LogNorm-friendly).
+        """
+        p = self.project(y, x)
+        H = p.counts.astype(float)
+        ey, ex = p.edges
+        if density:
+            area = np.outer(np.diff(ey), np.diff(ex))
+            H /= max(H.sum(), 1.0) * area
+        if zero_nan:
+            H[H <= 0] = np.nan
+        return H, [float(ex[0]), float(ex[-1]), float(ey[0]), float(ey[-1])]
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        out = {"names": np.array(self.names, dtype=str), "counts": self.counts}
+        for name, e in zip(self.names, self.edges):
+            out[f"edges_{name}"] = e
+        return out
+
+    @classmethod
+    def from_arrays(cls, arrays: Mapping[str, np.ndarray], key: str = "") -> "DensityCube":
+        names = tuple(str(x) for x in arrays["names"])
+        return cls(names=names,
+                   edges=tuple(np.asarray(arrays[f"edges_{n}"]) for n in names),
+                   counts=np.asarray(arrays["counts"]),
+                   key=key)
+
+
+def histogram_nd(columns: Sequence[np.ndarray], edges: Sequence[np.ndarray], *,
+                 weights: Optional[np.ndarray] = None,
+                 chunk_rows: int = CHUNK_ROWS) -> np.ndarray:
+    """np.histogramdd equivalent via linearized indices and chunked bincount."""
+    cols = [np.asarray(c).ravel() for c in columns]
+    edges = [np.asarray(e, dtype=float) for e in edges]
+    shape = tuple(e.size - 1 for e in edges)
+    size = int(np.prod(shape))
+    strides = np.cumprod((1,) + shape[::-1])[:-1][::-1]
+    w = None if weights is None else np.asarray(weights, dtype=float).ravel()
+
+    out = np.zeros(size + 1, dtype=np.int64 if w is None else np.float64)
+    n = cols[0].size
+    for s in range(0, n, chunk_rows):
+        lin = np.zeros(min(chunk_rows, n - s), dtype=np.intp)
+        bad = np.zeros(lin.size, dtype=bool)
+        for c, e, st in zip(cols, edges, strides):
+            x = c[s:s + chunk_rows]
+            i = bin_index(x, e)
+            i[x == e[-1]] = e.size - 2                  # last bin is closed
+            bad |= i < 0
+            lin += i * st
+        lin[bad] = size                                 # dropped slot
+        out += np.bincount(lin, weights=None if w is None else w[s:s + chunk_rows],
+                           minlength=size + 1)
+    return out[:size].reshape(shape)
+
+
+def density_cube(columns: Mapping[str, np.ndarray],
+                 edges: Mapping[str, Sequence[float]], *,
+                 weights: Optional[np.ndarray] = None,
+                 topic: Optional[str] = None,
+                 cache: bool = True,
+                 chunk_rows: int = CHUNK_ROWS) -> DensityCube:
+    """
+    2D / 3D (any-D) histogram cube over named columns, cached on disk.
+
+    The cache key covers the column values, weights and edges, so a new
+    data snapshot or binning recomputes; anything downstream (crop,
+    rebin, norm, colormap) reuses the stored cube.
+    """
+    names = tuple(columns)
+    if set(names) != set(edges):
+        raise KeyError(f"columns and edges must have the same names: {names} vs {tuple(edges)}")
+    cols = [np.asarray(columns[n]) for n in names]
+    eds = tuple(np.asarray(edges[n], dtype=float) for n in names)
+
+    key = digest("density_cube", names, *cols, *eds, weights)
+    where = cache_dir(topic, sub="density", create=False)
+    if cache:
+        hit = load_npz(key, where)
+        if hit is not None:
+            return DensityCube.from_arrays(hit, key=key)
+
+    cube = DensityCube(names, eds, histogram_nd(cols, eds, weights=weights,
+                                                chunk_rows=chunk_rows), key)
+    if cache:
+        save_npz(key, cube.to_arrays(), where)
+    return cube
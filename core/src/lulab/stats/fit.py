@@ -0,0 +1,176 @@
+"""
+fit.py
+Batched weighted polynomial least squares via stacked normal equations.
+
+MISC_001 fits its "global fit" and "binned median fit" (and the
+EXTRAP_METHOD linear / quadratic extrapolation to R = 0) one np.polyfit
+at a time. Here S fits of degree d share one code path:
+- design powers of (x - x0) / scale for conditioning
+- A = sum w v v^T and b = sum w v y for all slices at once (einsum, or
+  one bincount per moment when points carry a slice label)
+- one batched np.linalg.inv for coefficients and covariances
+- coefficients and covariances mapped back to plain powers of x,
+  highest power first (np.polyfit / np.polyval order)
+NaN values and zero weights drop out; slices with fewer than d + 1
+usable points are NaN.
+
+Usage:
+    from lulab.stats.fit import polyfit_rows, extrapolation_degree
+
+    # count-weighted fits to binned medians, one row per age slice
+    fit = polyfit_rows(centers, med, extrapolation_degree(EXTRAP_METHOD), weights=counts)
+    y, sig = fit(R_draw), fit.sigma(R_draw)     # (S, M) curves and 1-sigma bands
+    fit.at(0.0)                                 # [Fe/H] extrapolated to R = 0, per slice
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from math import comb
+from typing import Tuple
+
+import numpy as np
+
+EXTRAP_DEGREES = {"linear": 1, "quadratic": 2}
+
+
+def extrapolation_degree(method: str) -> int:
+    """EXTRAP_METHOD ("linear" / "quadratic") -> polynomial degree."""
+    if method not in EXTRAP_DEGREES:
+        raise ValueError(f"Unknown EXTRAP_METHOD '{method}'. Use one of {sorted(EXTRAP_DEGREES)}.")
+    return EXTRAP_DEGREES[method]
+
+
+@dataclass
+class PolyFit:
+    """S polynomial fits: coef (S, d + 1) highest power first, cov (S, d + 1, d + 1)."""
+
+    coef: np.ndarray
+    cov: np.ndarray
+    n: np.ndarray           # usable points per slice
+    chi2: np.ndarray        # weighted residual sum of squares
+
+    @property
+    def deg(self) -> int:
+        return self.coef.shape[1] - 1
+
+    @property
+    def slope(self) -> np.ndarray:
+        """Coefficient of x (the gradient for deg=1)."""
+        return self.coef[:, -2]
+
+    def _vander(self, x) -> np.ndarray:
+        return np.vander(np.atleast_1d(np.asarray(x, dtype=float)), self.deg + 1)
+
+    def __call__(self, x) -> np.ndarray:
+        """(S, M) fitted curves at x."""
+        return self.coef @ self._vander(x).T
+
+    def sigma(self, x) -> np.ndarray:
+        """(S, M) 1-sigma of the fitted curve at x (from cov)."""
+        v = self._vander(x)
+        return np.sqrt(np.maximum(np.einsum("mi,sij,mj->sm", v, self.cov, v), 0.0))
+
+    def at(self, x0: float) -> np.ndarray:
+        """(S,) value at one point, e.g. the R = 0 extrapolation."""
+        return self(np.array([x0]))[:, 0]
+
+
+def _to_powers(x0: float, scale: float, deg: int) -> np.ndarray:
+    """T with c_x = T @ c_u, for p(x) = sum c_u[k] ((x - x0) / scale)^k (ascending)."""
+    t = np.zeros((deg + 1, deg + 1))
+    for k in range(deg + 1):
+        for j in range(k + 1):
+            t[j, k] = comb(k, j) * (-x0) ** (k - j) / scale ** k
+    return t
+
+
+def _solve(A: np.ndarray, b: np.ndarray, syy: np.ndarray,
+           n: np.ndarray, deg: int, x0: float, scale: float,
+           absolute_sigma: bool) -> PolyFit:
+    m = deg + 1
+    good = n >= m
+    coef = np.full((A.shape[0], m), np.nan)
+    cov = np.full((A.shape[0], m, m), np.nan)
+    chi2 = np.full(A.shape[0], np.nan)
+    if good.any():
+        Ag = A[good]
+        # singular slices (e.g. all x equal) -> NaN instead of an exception
+        d = np.sqrt(np.einsum("sii->si", Ag))
+        d[d == 0] = 1.0
+        ok = np.abs(np.linalg.det(Ag / (d[:, :, None] * d[:, None, :]))) > 1e-12
+        idx = np.flatnonzero(good)[ok]
+        inv = np.linalg.inv(Ag[ok])
+        c = np.einsum("sij,sj->si", inv, b[idx])
+        # chi2 = sum w y^2 - 2 c.b + c.A.c
+        r2 = syy[idx] - 2 * np.einsum("si,si->s", c, b[idx]) + np.einsum("si,sij,sj->s", c, Ag[ok], c)
+        r2 = np.maximum(r2, 0.0)
+        if not absolute_sigma:
+            dof = np.maximum(n[idx] - m, 1)
+            inv = inv * (r2 / dof)[:, None, None]
+        t = _to_powers(x0, scale, deg)
+        coef[idx] = (c @ t.T)[:, ::-1]
+        cov[idx] = (t @ inv @ t.T)[:, ::-1, ::-1]
+        chi2[idx] = r2
+    return PolyFit(coef=coef, cov=cov, n=n, chi2=chi2)
+
+
+def _conditioning(x: np.ndarray) -> Tuple[float, float]:
+    fin = x[np.isfinite(x)]
+    if not fin.size:
+        return 0.0, 1.0
+    x0 = float(0.5 * (fin.min() + fin.max()))
+    scale = float(0.5 * (fin.max() - fin.min())) or 1.0
+    return x0, scale
+
+
+def polyfit_rows(x, Y, deg: int = 1, *, weights=None,
+                 absolute_sigma: bool = False) -> PolyFit:
+    """
+    Fit every row of Y (S, P) against x (P,) or (S, P) in one batch.
+
+    weights (S, P) or (P,), e.g. bin counts, multiply the squared residuals
+    (np.polyfit's w is their square root). With absolute_sigma=False the
+    covariance is scaled by chi2 / (n - deg - 1) as in curve_fit.
+    """
+    Y = np.atleast_2d(np.asarray(Y, dtype=float))
+    x = np.broadcast_to(np.asarray(x, dtype=float), Y.shape)
+    W = np.ones(Y.shape) if weights is None else np.broadcast_to(np.asarray(weights, dtype=float), Y.shape)
+    ok = np.isfinite(Y) & np.isfinite(x) & np.isfinite(W) & (W > 0)
+    W = np.where(ok, W, 0.0)
+    Yz = np.where(ok, Y, 0.0)
+    x0, scale = _conditioning(np.where(ok, x, np.nan))
+    u = np.where(ok, (x - x0) / scale, 0.0)
+    V = u[..., None] ** np.arange(deg + 1)                   # (S, P, m)
+
+    A = np.einsum("sp,spi,spj->sij", W, V, V)
+    b = np.einsum("sp,spi->si", W * Yz, V)
+    return _solve(A, b, (W * Yz * Yz).sum(1), ok.sum(1), deg, x0, scale, absolute_sigma)
+
+
+def polyfit_groups(x, y, groups, n_groups: int, deg: int = 1, *, weights=None,
+                   absolute_sigma: bool = False) -> PolyFit:
+    """
+    One fit per integer group label (e.g. age slice) straight from the points.
+
+    Moments are accumulated with one bincount each, so hundreds of slices
+    cost about as much as one np.polyfit over all points.
+    """
+    x = np.asarray(x, dtype=float).ravel()
+    y = np.asarray(y, dtype=float).ravel()
+    g = np.asarray(groups).ravel()
+    w = np.ones(x.size) if weights is None else np.asarray(weights, dtype=float).ravel()
+    ok = (g >= 0) & (g < n_groups) & np.isfinite(x) & np.isfinite(y) & np.isfinite(w) & (w > 0)
+    x, y, g, w = x[ok], y[ok], g[ok].astype(np.intp), w[ok]
+    x0, scale = _conditioning(x)
+    u = (x - x0) / scale
+    m = deg + 1
+
+    def moment(v):
+        return np.bincount(g, weights=v, minlength=n_groups)
+
+    pw = [moment(w * u ** k) for k in range(2 * m - 1)]      # sum w u^k
+    A = np.stack([np.stack([pw[i + j] for j in range(m)], -1) for i in range(m)], -2)
+    b = np.stack([moment(w * y * u ** k) for k in range(m)], -1)
+    n = np.bincount(g, minlength=n_groups)
+    return _solve(A, b, moment(w * y * y), n, deg, x0, scale, absolute_sigma)
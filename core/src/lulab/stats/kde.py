@@ -0,0 +1,349 @@
+"""
+kde.py
+Binned FFT kernel-density estimates with bandwidth rules and mode finding.
+
+Replaces scipy.stats.gaussian_kde in ACAP_001 Figure 7 (O(N x G) direct
+evaluation on a 1200-point grid):
+- linear binning of the data onto a fine uniform grid (two bincounts)
+- one FFT convolution with the sampled Gaussian kernel
+- bandwidths: "scott" / "silverman" (same factors as gaussian_kde, so the
+  curves match it), "isj" (Botev et al. 2010 improved Sheather-Jones), or
+  an absolute bandwidth in data units
+- optional weights and reflection at bounds (e.g. rbirth >= 0)
+- several samples at once (one row per group) and vectorized peak / mode
+  finding with parabolic refinement
+
+Usage:
+    from lulab.stats.kde import kde, find_peaks
+
+    x = np.linspace(0.0, 10.0, 1200)
+    res = kde(rbirth, x, bounds=(0.0, None))
+    res.density, res.mode, res.bw
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Optional, Tuple, Union
+
+import numpy as np
+
+Bandwidth = Union[str, float]
+
+# Internal grid spacing must be <= bw / GRID_PER_BW (binning error ~ (dx / bw)^2)
+GRID_PER_BW: int = 10
+# Kernel support in bandwidths
+CUT: float = 4.0
+# ISJ grid size (power of two) and max fixed-point order
+ISJ_GRID: int = 1 << 14
+ISJ_L: int = 7
+
+
+@dataclass
+class KDEResult:
+    """KDE on a grid; density is (G,) for one sample or (K, G) for K groups."""
+
+    x: np.ndarray
+    density: np.ndarray
+    bw: np.ndarray          # () or (K,)
+
+    @property
+    def mode(self):
+        m = modes(self.density, self.x)
+        return float(m) if np.ndim(m) == 0 else m
+
+
+# -------------------------
+# Bandwidth rules
+# -------------------------
+def _weighted_std_neff(x: np.ndarray, w: Optional[np.ndarray]) -> Tuple[float, float]:
+    """std and effective N with gaussian_kde's (np.cov aweights) convention."""
+    if w is None:
+        return float(np.std(x, ddof=1)) if x.size > 1 else 0.0, float(x.size)
+    sw = w.sum()
+    sw2 = (w * w).sum()
+    mu = (w * x).sum() / sw
+    var = (w * (x - mu) ** 2).sum() / (sw - sw2 / sw)
+    return float(np.sqrt(var)), float(sw * sw / sw2)
+
+
+def _dct2(a: np.ndarray) -> np.ndarray:
+    """Unnormalized DCT-II (scipy.fft.dct type 2 convention) via one FFT."""
+    n = a.size
+    v = np.concatenate([a[::2], a[1::2][::-1]])
+    k = np.arange(n)
+    return 2.0 * np.real(np.fft.fft(v) * np.exp(-0.5j * np.pi * k / n))
+
+
+def _isj_fixed_point(t: float, n: float, i2: np.ndarray, a2: np.ndarray) -> float:
+    f = 2.0 * np.pi ** (2 * ISJ_L) * np.sum(i2 ** ISJ_L * a2 * np.exp(-i2 * np.pi ** 2 * t))
+    for s in range(ISJ_L - 1, 1, -1):
+        k0 = np.prod(np.arange(1, 2 * s, 2)) / np.sqrt(2.0 * np.pi)
+        const = (1.0 + 0.5 ** (s + 0.5)) / 3.0
+        time = (2.0 * const * k0 / (n * f)) ** (2.0 / (3.0 + 2.0 * s))
+        f = 2.0 * np.pi ** (2 * s) * np.sum(i2 ** s * a2 * np.exp(-i2 * np.pi ** 2 * time))
+    return t - (2.0 * n * np.sqrt(np.pi) * f) ** (-0.4)
+
+
+def isj_bandwidth(x, weights=None) -> float:
+    """
+    Improved Sheather-Jones bandwidth (Botev, Grotowski & Kroese 2010).
+
+    Robust for multimodal data where Scott over-smooths. Falls back to
+    Scott when the fixed-point equation has no root (tiny / discrete data).
+    """
+    x = np.asarray(x, dtype=float)
+    w = None if weights is None else np.asarray(weights, dtype=float)
+    lo, hi = x.min(), x.max()
+    span = hi - lo
+    if not span > 0:
+        return scott_bandwidth(x, w)
+    lo, span = lo - 0.1 * span, 1.2 * span
+
+    counts = _linear_bin(x, w, lo, span / (ISJ_GRID - 1), ISJ_GRID)
+    counts /= counts.sum()
+    a = _dct2(counts)
+    i2 = np.arange(1, ISJ_GRID, dtype=float) ** 2
+    a2 = (a[1:] / 2.0) ** 2
+    n = _weighted_std_neff(x, w)[1]
+
+    # bracket the root on a log grid, then bisect
+    ts = np.logspace(-12, -1, 56)
+    fs = np.array([_isj_fixed_point(t, n, i2, a2) for t in ts])
+    sign = np.flatnonzero(np.signbit(fs[:-1]) != np.signbit(fs[1:]))
+    if not sign.size or not np.all(np.isfinite(fs[sign[0]:sign[0] + 2])):
+        return scott_bandwidth(x, w)
+    a_t, b_t = ts[sign[0]], ts[sign[0] + 1]
+    fa = fs[sign[0]]
+    for _ in range(60):
+        m = np.sqrt(a_t * b_t)
+        fm = _isj_fixed_point(m, n, i2, a2)
+        if np.signbit(fm) == np.signbit(fa):
+            a_t, fa = m, fm
+        else:
+            b_t = m
+    return float(np.sqrt(np.sqrt(a_t * b_t)) * span)
+
+
+def scott_bandwidth(x, weights=None) -> float:
+    sd, n = _weighted_std_neff(np.asarray(x, dtype=float), weights)
+    return sd * n ** (-0.2)
+
+
+def silverman_bandwidth(x, weights=None) -> float:
+    sd, n = _weighted_std_neff(np.asarray(x, dtype=float), weights)
+    return sd * (n * 0.75) ** (-0.2)
+
+
+BANDWIDTHS = {
+    "scott": scott_bandwidth,
+    "silverman": silverman_bandwidth,
+    "isj": isj_bandwidth,
+}
+
+
+def bandwidth(x, bw: Bandwidth = "scott", weights=None) -> float:
+    """Absolute bandwidth from a rule name or a number (data units)."""
+    if isinstance(bw, str):
+        if bw.lower() not in BANDWIDTHS:
+            raise ValueError(f"Unknown bandwidth rule '{bw}'. Use one of {sorted(BANDWIDTHS)} or a number.")
+        return float(BANDWIDTHS[bw.lower()](x, weights))
+    return float(bw)
+
+
+# -------------------------
+# Binning + convolution
+# -------------------------
+def _linear_bin(x, w, lo: float, dx: float, m: int, slot=None, n_rows: int = 1) -> np.ndarray:
+    """Linear binning onto m points lo + k dx; points outside are dropped."""
+    f = (np.asarray(x, dtype=float) - lo) / dx
+    k = np.floor(f)
+    frac = f - k
+    k = k.astype(np.intp)
+    wt = np.ones_like(f) if w is None else np.asarray(w, dtype=float)
+    base = 0 if slot is None else np.asarray(slot, dtype=np.intp) * m
+    out = np.zeros(n_rows * m + 1)
+    size = n_rows * m
+    for kk, ww in ((k, wt * (1.0 - frac)), (k + 1, wt * frac)):
+        idx = np.where((kk >= 0) & (kk < m), base + kk, size)
+        out += np.bincount(idx, weights=ww, minlength=size + 1)
+    return out[:size].reshape(n_rows, m) if n_rows > 1 or slot is not None else out[:size]
+
+
+def _fft_smooth(counts: np.ndarray, dx: float, bw: np.ndarray) -> np.ndarray:
+    """Convolve each row of counts with a Gaussian of width bw[row] (grid units dx)."""
+    rows, m = counts.shape
+    half = int(np.ceil(CUT * bw.max() / dx))
+    size = 1 << int(np.ceil(np.log2(m + 2 * half + 1)))
+    off = np.arange(-half, half + 1) * dx
+    kern = np.exp(-0.5 * (off[None, :] / bw[:, None]) ** 2)
+    kern /= bw[:, None] * np.sqrt(2.0 * np.pi)
+    # kernel centred at index 0 (wrap-around), data zero-padded: no aliasing
+    kpad = np.zeros((rows, size))
+    kpad[:, :half + 1] = kern[:, half:]
+    kpad[:, size - half:] = kern[:, :half]
+    out = np.fft.irfft(np.fft.rfft(counts, size, axis=1) * np.fft.rfft(kpad, axis=1),
+                       size, axis=1)
+    return out[:, :m]
+
+
+def kde(data, grid, *,
+        weights=None,
+        bw: Bandwidth = "scott",
+        bounds: Tuple[Optional[float], Optional[float]] = (None, None),
+        groups=None,
+        n_groups: Optional[int] = None) -> KDEResult:
+    """
+    Gaussian KDE of data evaluated on grid (binned + FFT).
+
+    Parameters
+    ----------
+    data : array-like (N,)
+    grid : array-like (G,)
+        Evaluation points. A uniform grid is hit exactly; any other grid
+        is interpolated from the internal uniform grid.
+    weights : array-like (N,), optional
+    bw : "scott" | "silverman" | "isj" | float
+        Rule name (per group) or absolute bandwidth in data units.
+    bounds : (lo, hi)
+        Reflect at finite bounds (density is zero outside them), e.g.
+        (0.0, None) for rbirth >= 0. Integrates to 1 over the bounded domain.
+    groups, n_groups : optional
+        Integer group per point: one KDE row per group, all in one FFT.
+    """
+    x = np.asarray(data, dtype=float).ravel()
+    w = None if weights is None else np.asarray(weights, dtype=float).ravel()
+    ok = np.isfinite(x) if w is None else np.isfinite(x) & np.isfinite(w)
+    lo_b, hi_b = bounds
+    if lo_b is not None:
+        ok &= x >= lo_b
+    if hi_b is not None:
+        ok &= x <= hi_b
+    g = None if groups is None else np.asarray(groups).ravel().astype(np.intp)
+    x = x[ok]
+    w = None if w is None else w[ok]
+    g = None if g is None else g[ok]
+    k = 1 if g is None else int(n_groups or (g.max() + 1 if g.size else 1))
+
+    # per-group bandwidth and total weight
+    bws = np.empty(k)
+    tot = np.empty(k)
+    for j in range(k):
+        sel = slice(None) if g is None else (g == j)
+        xj = x[sel]
+        wj = None if w is None else w[sel]
+        tot[j] = xj.size if wj is None else wj.sum()
+        bws[j] = bandwidth(xj, bw, wj) if xj.size > 1 else np.nan
+    good = np.isfinite(bws) & (bws > 0) & (tot > 0)
+
+    grid = np.asarray(grid, dtype=float)
+    dens = np.zeros((k, grid.size))
+    if good.any():
+        h_min = bws[good].min()
+        step = np.diff(grid)
+        uniform = grid.size > 1 and np.allclose(step, step[0], rtol=1e-9, atol=0.0)
+        # internal uniform grid: the output grid subsampled by r, padded for the kernel
+        d0 = step[0] if uniform else (grid.max() - grid.min()) / max(grid.size - 1, 1)
+        r = max(1, int(np.ceil(d0 * GRID_PER_BW / h_min)))
+        dx = d0 / r
+        pad = int(np.ceil(CUT * bws[good].max() / dx))
+        lo = grid.min() - pad * dx
+        m = (grid.size - 1) * r + 1 + 2 * pad
+
+        # reflection = mirrored copies of the data at each finite bound
+        xs, ws, gs = [x], [w], [g]
+        for b in (lo_b, hi_b):
+            if b is not None:
+                xs.append(2.0 * b - x)
+                ws.append(w)
+                gs.append(g)
+        xx = np.concatenate(xs)
+        ww = None if w is None else np.concatenate(ws)
+        gg = None if g is None else np.concatenate(gs)
+
+        counts = _linear_bin(xx, ww, lo, dx, m, slot=gg if gg is not None else np.zeros(xx.size, np.intp),
+                             n_rows=k)
+        counts[~good] = 0.0
+        bw_rows = np.where(good, bws, h_min)
+        y = _fft_smooth(counts, dx, bw_rows) / np.where(good, tot, 1.0)[:, None]
+        y[~good] = np.nan
+        np.maximum(y, 0.0, out=y)                      # FFT round-off
+
+        if uniform:
+            dens = y[:, pad:pad + (grid.size - 1) * r + 1:r]
+        else:
+            xi = lo + dx * np.arange(m)
+            dens = np.vstack([np.interp(grid, xi, row) for row in y])
+        if lo_b is not None:
+            dens[:, grid < lo_b] = 0.0
+        if hi_b is not None:
+            dens[:, grid > hi_b] = 0.0
+    dens[~good] = np.nan
+
+    if g is None:
+        return KDEResult(x=grid, density=dens[0], bw=np.asarray(bws[0]))
+    return KDEResult(x=grid, density=dens, bw=bws)
+
+
+# -------------------------
+# Peaks / modes
+# -------------------------
+def _parabolic(y: np.ndarray, i: np.ndarray, x: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Vertex of the parabola through (i-1, i, i+1) for each row.
+
+    Uses the actual spacing on each side, so x need not be uniform; the
+    vertex is kept within half a cell of x[i]. A peak on the first / last
+    grid point (e.g. density piling up at a boundary) is returned as that
+    point, unrefined.
+    """
+    rows = np.arange(y.shape[0])
+    n = y.shape[1]
+    edge = (i <= 0) | (i >= n - 1)
+    j = np.clip(i, 1, n - 2)
+    ym, y0, yp = y[rows, j - 1], y[rows, j], y[rows, j + 1]
+    hm, hp = x[j] - x[j - 1], x[j + 1] - x[j]
+    # y0 + b t + a t^2 in t = x - x[j]
+    dm, dp = (y0 - ym) / hm, (yp - y0) / hp
+    a = (dp - dm) / (hm + hp)
+    b = dm + a * hm
+    with np.errstate(invalid="ignore", divide="ignore"):
+        t = np.where(a < 0, -0.5 * b / a, 0.0)
+    t = np.clip(t, -0.5 * hm, 0.5 * hp)
+    pos = np.where(edge, x[i], x[j] + t)
+    top = np.where(edge, y[rows, i], y0 + t * (b + a * t))
+    return pos, top
+
+
+def modes(density: np.ndarray, x: np.ndarray) -> np.ndarray:
+    """Global mode of each row (or of a 1D curve), refined between grid points."""
+    y = np.atleast_2d(density)
+    x = np.asarray(x, dtype=float)
+    filled = np.where(np.isfinite(y), y, -np.inf)
+    i = filled.argmax(axis=1)
+    pos, _ = _parabolic(np.where(np.isfinite(y), y, 0.0), i, x) if x.size >= 3 else (x[i], None)
+    pos = np.where(np.isfinite(y).any(axis=1), pos, np.nan)
+    return pos[0] if np.ndim(density) == 1 else pos
+
+
+def find_peaks(density: np.ndarray, x: np.ndarray, *,
+               min_rel_height: float = 0.05,
+               max_peaks: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Local maxima of one curve above min_rel_height * max, highest first.
+
+    Returns (positions, heights), parabola-refined.
+    """
+    y = np.asarray(density, dtype=float)
+    x = np.asarray(x, dtype=float)
+    if y.size < 3 or not np.isfinite(y).any():
+        return np.empty(0), np.empty(0)
+    yy = np.where(np.isfinite(y), y, -np.inf)
+    inner = (yy[1:-1] > yy[:-2]) & (yy[1:-1] >= yy[2:])
+    inner &= yy[1:-1] >= min_rel_height * np.nanmax(y)
+    i = np.flatnonzero(inner) + 1
+    if not i.size:
+        return np.empty(0), np.empty(0)
+    pos, h = _parabolic(np.repeat(np.nan_to_num(y)[None, :], i.size, axis=0), i, x)
+    order = np.argsort(-h, kind="stable")[:max_peaks]
+    return pos[order], h[order]
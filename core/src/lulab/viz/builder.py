@@ -0,0 +1,258 @@
+"""
+builder.py
+Parallel figure builds: a process pool of headless Agg workers.
+
+build_figures.build_set rendered the figure plan serially, one language
+after the other, in one process. Here
+- every (figure, lang) pair is one job
+- each worker process starts once: Agg backend, matplotlib + lulab
+  imported, the dataset loaded by the given loader (not per job)
+- jobs are handed out as workers free up, so wall time scales with cores
+- a failing figure is reported (with its traceback) and the rest go on
+- every job is timed; timing_report() prints the per-figure table
+- with cache=True (default) a figure whose data, plot source, lang, theme
+  and rcParams are unchanged is not re-rendered and its files are left
+  untouched (lulab.io.figure_cache); the manifest is refreshed at the end
+
+workers=1 runs the same jobs in-process (no pool), e.g. for debugging; the
+caller's backend is kept and the dataset is not held afterwards.
+
+Usage:
+    from lulab.io.loaders import load_topic_dataset
+    from lulab.viz.builder import build_figures, timing_report
+
+    results = build_figures(plan, ("ru", "en"), OUT,
+                            loader=load_topic_dataset, loader_args=(TOPIC_DIR,))
+    print(timing_report(results))
+"""
+
+from __future__ import annotations
+
+import os
+import time
+import traceback
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from multiprocessing import get_context
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# plan entry: (figure name, plot function(df, lang=...) -> (fig, ax))
+PlotFn = Callable[..., Tuple[Any, Any]]
+PlanItem = Tuple[str, PlotFn]
+
+FORMATS: Tuple[str, ...] = ("pdf", "png")
+DPI: int = 200
+
+
+@dataclass
+class FigureJob:
+    name: str
+    fn: PlotFn
+    lang: str
+    out_dir: Path
+    formats: Tuple[str, ...] = FORMATS
+    dpi: int = DPI
+    cache: bool = True
+    force: bool = False
+
+
+@dataclass
+class JobResult:
+    name: str
+    lang: str
+    seconds: float
+    paths: List[Path] = field(default_factory=list)
+    error: Optional[str] = None
+    pid: int = 0
+    cached: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+# -------------------------
+# Worker side
+# -------------------------
+_DATA: Dict[str, Any] = {}
+
+
+def _load(loader: Callable[..., Any], loader_args: tuple) -> None:
+    from lulab.io.cache import digest
+    _DATA["df"] = loader(*loader_args)
+    _DATA["key"] = digest(_DATA["df"])
+
+
+def _init_worker(loader: Callable[..., Any], loader_args: tuple) -> None:
+    """Warm up one pool worker: headless backend, imports, dataset."""
+    import matplotlib
+    matplotlib.use("Agg", force=True)
+    import matplotlib.pyplot  # noqa: F401
+    import lulab.viz.export  # noqa: F401
+    _load(loader, loader_args)
+
+
+@contextmanager
+def _in_process(loader: Callable[..., Any], loader_args: tuple) -> Iterator[None]:
+    """
+    Run jobs in the caller's process: save_figure draws through an Agg
+    canvas anyway, so the backend is left alone, and the dataset is
+    released afterwards.
+    """
+    _load(loader, loader_args)
+    try:
+        yield
+    finally:
+        _DATA.clear()
+
+
+def _run_job(job: FigureJob) -> JobResult:
+    import matplotlib.pyplot as plt
+    from lulab.io.figure_cache import cached_render
+    from lulab.viz.export import save_figure
+
+    t0 = time.perf_counter()
+    outbase = Path(job.out_dir) / job.lang / job.name
+    fig = None
+    try:
+        if job.cache:
+            paths, hit = cached_render(outbase, job.fn, _DATA["df"], lang=job.lang,
+                                       formats=job.formats, dpi=job.dpi,
+                                       data_key=_DATA["key"], force=job.force)
+        else:
+            fig, _ = job.fn(_DATA["df"], lang=job.lang)
+            paths, hit = save_figure(fig, outbase, formats=job.formats, dpi=job.dpi), False
+        return JobResult(job.name, job.lang, time.perf_counter() - t0, list(paths),
+                         pid=os.getpid(), cached=hit)
+    except Exception:
+        return JobResult(job.name, job.lang, time.perf_counter() - t0,
+                         error=traceback.format_exc(), pid=os.getpid())
+    finally:
+        if fig is not None:
+            plt.close(fig)
+
+
+# -------------------------
+# Driver
+# -------------------------
+def make_jobs(plan: Sequence[PlanItem], langs: Sequence[str], out_dir: Path, *,
+              formats: Sequence[str] = FORMATS, dpi: int = DPI,
+              cache: bool = True, force: bool = False) -> List[FigureJob]:
+    """(figure, lang) jobs, figure-major so each figure's languages start together."""
+    return [FigureJob(name, fn, lang, Path(out_dir), tuple(formats), dpi, cache, force)
+            for name, fn in plan for lang in langs]
+
+
+def default_workers(n_jobs: int) -> int:
+    return max(1, min(n_jobs, os.cpu_count() or 1))
+
+
+def run_jobs(jobs: Sequence[FigureJob], *,
+             loader: Callable[..., Any],
+             loader_args: tuple = (),
+             workers: Optional[int] = None,
+             verbose: bool = True) -> List[JobResult]:
+    """Run figure jobs; results come back in job order."""
+    workers = default_workers(len(jobs)) if workers is None else max(1, int(workers))
+    results: Dict[int, JobResult] = {}
+
+    def report(r: JobResult) -> None:
+        if verbose:
+            state = "FAILED" if not r.ok else ("Up to date" if r.cached else "Saved")
+            print(f"{state} [{r.lang}]: {r.name} ({r.seconds:.2f} s)")
+
+    if workers == 1 or len(jobs) <= 1:
+        with _in_process(loader, loader_args):
+            for i, job in enumerate(jobs):
+                results[i] = _run_job(job)
+                report(results[i])
+    else:
+        # spawn: fresh interpreters, no inherited GUI backend state
+        with ProcessPoolExecutor(max_workers=workers, mp_context=get_context("spawn"),
+                                 initializer=_init_worker,
+                                 initargs=(loader, loader_args)) as pool:
+            futs = {pool.submit(_run_job, job): i for i, job in enumerate(jobs)}
+            for fut in as_completed(futs):
+                i = futs[fut]
+                try:
+                    r = fut.result()
+                except Exception:
+                    # worker crashed / could not start: isolate this job
+                    r = JobResult(jobs[i].name, jobs[i].lang, 0.0, error=traceback.format_exc())
+                results[i] = r
+                report(r)
+    return [results[i] for i in range(len(jobs))]
+
+
+def build_figures(plan: Sequence[PlanItem], langs: Sequence[str], out_dir: Path, *,
+                  loader: Callable[..., Any],
+                  loader_args: tuple = (),
+                  formats: Sequence[str] = FORMATS,
+                  dpi: int = DPI,
+                  workers: Optional[int] = None,
+                  cache: bool = True,
+                  force: bool = False,
+                  verbose: bool = True) -> List[JobResult]:
+    """
+    Render plan x langs into out_dir/<lang>/<name>.<fmt> in a worker pool.
+
+    cache skips unchanged figures; force re-renders them anyway (and
+    refreshes their records).
+    """
+    jobs = make_jobs(plan, langs, out_dir, formats=formats, dpi=dpi, cache=cache, force=force)
+    fresh = _fresh_jobs(jobs, loader, loader_args) if cache and not force else {}
+    if verbose:
+        for r in fresh.values():
+            print(f"Up to date [{r.lang}]: {r.name}")
+    todo = [i for i in range(len(jobs)) if i not in fresh]
+    done = run_jobs([jobs[i] for i in todo], loader=loader, loader_args=loader_args,
+                    workers=workers, verbose=verbose) if todo else []
+    results = dict(fresh)
+    results.update(zip(todo, done))
+    if cache:
+        from lulab.io.figure_cache import collect_manifest
+        collect_manifest(out_dir)
+    return [results[i] for i in range(len(jobs))]
+
+
+def _fresh_jobs(jobs: Sequence[FigureJob], loader: Callable[..., Any],
+                loader_args: tuple) -> Dict[int, JobResult]:
+    """Jobs whose outputs are already up to date, checked before any worker starts."""
+    from lulab.io.cache import digest
+    from lulab.io.figure_cache import is_fresh, render_key
+
+    t0 = time.perf_counter()
+    data_key = digest(loader(*loader_args))
+    out: Dict[int, JobResult] = {}
+    for i, job in enumerate(jobs):
+        key, _ = render_key(job.fn, data_key, lang=job.lang, formats=job.formats, dpi=job.dpi)
+        outbase = Path(job.out_dir) / job.lang / job.name
+        if is_fresh(outbase, key):
+            out[i] = JobResult(job.name, job.lang, 0.0,
+                               [outbase.with_suffix(f".{f}") for f in job.formats],
+                               pid=os.getpid(), cached=True)
+    if out:
+        share = (time.perf_counter() - t0) / len(out)
+        for r in out.values():
+            r.seconds = share
+    return out
+
+
+def timing_report(results: Sequence[JobResult], wall: Optional[float] = None) -> str:
+    """Per-figure table (slowest first), failures with their last traceback line."""
+    rows = sorted(results, key=lambda r: -r.seconds)
+    width = max([len(r.name) for r in rows] + [6])
+    lines = [f"{'figure':<{width}}  lang  seconds  status"]
+    for r in rows:
+        status = ("cached" if r.cached else "ok") if r.ok else "FAILED: " + r.error.strip().splitlines()[-1]
+        lines.append(f"{r.name:<{width}}  {r.lang:<4}  {r.seconds:7.2f}  {status}")
+    total = sum(r.seconds for r in results)
+    n_bad = sum(not r.ok for r in results)
+    n_hit = sum(r.cached for r in results)
+    tail = f"{len(results)} jobs, {n_hit} cached, {n_bad} failed, {total:.2f} s of rendering"
+    if wall is not None:
+        tail += f" in {wall:.2f} s wall"
+    lines.append(tail)
+    return "\n".join(lines)
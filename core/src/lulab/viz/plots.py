@@ -3,51 +3,55 @@ from __future__ import annotations
 import matplotlib.pyplot as plt
 import pandas as pd
 
+from lulab.viz.scatter import dense_scatter
+
 
 def _num(s: pd.Series) -> pd.Series:
     return pd.to_numeric(s, errors="coerce")
 
 
+TRANSLATIONS = {
+    "en": {
+        "feh": "[Fe/H] (dex)",
+        "count": "Count",
+        "dist": "Distance (pc)",
+        "teff": "Teff (K)",
+        "logg": "log g",
+        "mass": "Planet mass (Mj)",
+        "radius": "Planet radius (R⊕)",
+        "period": "Orbital period (days)",
+
+        "title_feh_hist": "Host-star metallicity distribution ([Fe/H])",
+        "title_feh_dist": "[Fe/H] vs distance (selection/bias check)",
+        "title_feh_teff": "[Fe/H] vs Teff (host-star parameters)",
+        "title_feh_logg": "[Fe/H] vs log g (host-star evolutionary stage)",
+        "title_feh_mass": "[Fe/H] vs planet mass",
+        "title_feh_radius": "[Fe/H] vs planet radius",
+        "title_mass_vs_period": "Planet mass vs orbital period",
+    },
+    "ru": {
+        "feh": "[Fe/H] (декс)",
+        "count": "Число",
+        "dist": "Расстояние (пк)",
+        "teff": "Teff (K)",
+        "logg": "log g",
+        "mass": "Масса планеты (Mj)",
+        "radius": "Радиус планеты (R⊕)",
+        "period": "Период орбиты (сутки)",
+
+        "title_feh_hist": "Распределение металличности звёзд-хостов ([Fe/H])",
+        "title_feh_dist": "[Fe/H] vs расстояние (проверка селекции)",
+        "title_feh_teff": "[Fe/H] vs Teff (параметры звёзд-хостов)",
+        "title_feh_logg": "[Fe/H] vs log g (эволюционное состояние)",
+        "title_feh_mass": "[Fe/H] vs масса планеты",
+        "title_feh_radius": "[Fe/H] vs радиус планеты",
+        "title_mass_vs_period": "Масса планеты vs период орбиты",
+    },
+}
+
+
 def tr(lang: str, key: str) -> str:
-    T = {
-        "en": {
-            "feh": "[Fe/H] (dex)",
-            "count": "Count",
-            "dist": "Distance (pc)",
-            "teff": "Teff (K)",
-            "logg": "log g",
-            "mass": "Planet mass (Mj)",
-            "radius": "Planet radius (R⊕)",
-            "period": "Orbital period (days)",
-
-            "title_feh_hist": "Host-star metallicity distribution ([Fe/H])",
-            "title_feh_dist": "[Fe/H] vs distance (selection/bias check)",
-            "title_feh_teff": "[Fe/H] vs Teff (host-star parameters)",
-            "title_feh_logg": "[Fe/H] vs log g (host-star evolutionary stage)",
-            "title_feh_mass": "[Fe/H] vs planet mass",
-            "title_feh_radius": "[Fe/H] vs planet radius",
-            "title_mass_vs_period": "Planet mass vs orbital period",
-        },
-        "ru": {
-            "feh": "[Fe/H] (декс)",
-            "count": "Число",
-            "dist": "Расстояние (пк)",
-            "teff": "Teff (K)",
-            "logg": "log g",
-            "mass": "Масса планеты (Mj)",
-            "radius": "Радиус планеты (R⊕)",
-            "period": "Период орбиты (сутки)",
-
-            "title_feh_hist": "Распределение металличности звёзд-хостов ([Fe/H])",
-            "title_feh_dist": "[Fe/H] vs расстояние (проверка селекции)",
-            "title_feh_teff": "[Fe/H] vs Teff (параметры звёзд-хостов)",
-            "title_feh_logg": "[Fe/H] vs log g (эволюционное состояние)",
-            "title_feh_mass": "[Fe/H] vs масса планеты",
-            "title_feh_radius": "[Fe/H] vs радиус планеты",
-            "title_mass_vs_period": "Масса планеты vs период орбиты",
-        },
-    }
-    d = T.get(lang, T["en"])
+    d = TRANSLATIONS.get(lang, TRANSLATIONS["en"])
     return d.get(key, key)
 
 
@@ -100,7 +104,7 @@ def plot_feh_vs_distance(df: pd.DataFrame, lang: str = "en"):
     m = feh.notna() & dist.notna()
 
     fig, ax = plt.subplots()
-    ax.scatter(dist[m], feh[m], s=10)
+    dense_scatter(ax, dist[m], feh[m], s=10)
     ax.set_xlabel(tr(lang, "dist"))
     ax.set_ylabel(tr(lang, "feh"))
     ax.set_title(tr(lang, "title_feh_dist"))
@@ -116,7 +120,7 @@ def plot_feh_vs_teff(df: pd.DataFrame, lang: str = "en"):
     m = feh.notna() & teff.notna()
 
     fig, ax = plt.subplots()
-    ax.scatter(teff[m], feh[m], s=10)
+    dense_scatter(ax, teff[m], feh[m], s=10)
     ax.set_xlabel(tr(lang, "teff"))
     ax.set_ylabel(tr(lang, "feh"))
     ax.set_title(tr(lang, "title_feh_teff"))
@@ -132,7 +136,7 @@ def plot_feh_vs_logg(df: pd.DataFrame, lang: str = "en"):
     m = feh.notna() & logg.notna()
 
     fig, ax = plt.subplots()
-    ax.scatter(logg[m], feh[m], s=10)
+    dense_scatter(ax, logg[m], feh[m], s=10)
     ax.set_xlabel(tr(lang, "logg"))
     ax.set_ylabel(tr(lang, "feh"))
     ax.set_title(tr(lang, "title_feh_logg"))
@@ -148,7 +152,7 @@ def plot_feh_vs_planet_mass(df: pd.DataFrame, lang: str = "en"):
     m = feh.notna() & mj.notna()
 
     fig, ax = plt.subplots()
-    ax.scatter(mj[m], feh[m], s=10)
+    dense_scatter(ax, mj[m], feh[m], s=10)
     ax.set_xlabel(tr(lang, "mass"))
     ax.set_ylabel(tr(lang, "feh"))
     ax.set_title(tr(lang, "title_feh_mass"))
@@ -164,7 +168,7 @@ def plot_feh_vs_planet_radius(df: pd.DataFrame, lang: str = "en"):
     m = feh.notna() & rade.notna()
 
     fig, ax = plt.subplots()
-    ax.scatter(rade[m], feh[m], s=10)
+    dense_scatter(ax, rade[m], feh[m], s=10)
     ax.set_xlabel(tr(lang, "radius"))
     ax.set_ylabel(tr(lang, "feh"))
     ax.set_title(tr(lang, "title_feh_radius"))
@@ -180,7 +184,7 @@ def plot_period_vs_mass(df: pd.DataFrame, lang: str = "en"):
     m = per.notna() & mj.notna()
 
     fig, ax = plt.subplots()
-    ax.scatter(per[m], mj[m], s=10)
+    dense_scatter(ax, per[m], mj[m], s=10)
     ax.set_xlabel(tr(lang, "period"))
     ax.set_ylabel(tr(lang, "mass"))
     ax.set_title(tr(lang, "title_mass_vs_period"))
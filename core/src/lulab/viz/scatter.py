@@ -0,0 +1,155 @@
+"""
+scatter.py
+Density-aware scatter: dense point layers become images inside vector output.
+
+ax.scatter writes every marker as a vector path into PDF / SVG, so the
+MISC_001 APOGEE panels (N_SCAT = 120_000) and the viz.plots scatters
+give multi-megabyte PDFs that are slow in latexmk and in viewers. Here
+- up to max_points points are drawn exactly as ax.scatter would
+- above that the point layer is rasterized (at the dpi the figure is
+  saved with); axes, ticks, text and lines stay vector
+- mode="density" draws a binned 2D count image instead (counts from one
+  bincount) and keeps the points of sparse bins (< min_count) as
+  individual markers, so outliers stay visible
+PNG output of "auto" is the same as before; only vector files change.
+
+Usage:
+    from lulab.viz.scatter import dense_scatter
+
+    dense_scatter(ax, samp["R_gal"], samp["feh"], s=3, alpha=0.15, linewidths=0)
+    dense_scatter(ax, R, F, mode="density", bins=(220, 180), min_count=5, s=3)
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from lulab.stats.binned import bin_index
+
+MODES: Tuple[str, ...] = ("auto", "points", "raster", "density")
+
+# above this many points the layer is rasterized in vector output
+MAX_VECTOR_POINTS: int = 5_000
+
+DENSITY_BINS: int = 200
+DENSITY_MIN_COUNT: int = 5
+
+
+@dataclass
+class DenseScatter:
+    mode: str                   # what was drawn: points / raster / density
+    n_points: int
+    points: Any = None          # PathCollection (all points, or the outliers)
+    mesh: Any = None            # QuadMesh of counts (density mode)
+    n_outliers: int = 0
+
+
+def _finite_xy(x, y) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Finite x, y and the mask that selected them."""
+    x = np.asarray(x, dtype=float).ravel()
+    y = np.asarray(y, dtype=float).ravel()
+    if x.shape != y.shape:
+        raise ValueError(f"x and y must have the same length, got {x.size} and {y.size}")
+    ok = np.isfinite(x) & np.isfinite(y)
+    return x[ok], y[ok], ok
+
+
+def _per_point(v: Any, n: int) -> bool:
+    """v is a per-point scatter argument (c=, s=, edgecolors=, ... of length n)."""
+    if n <= 1 or isinstance(v, (str, tuple)) or np.ndim(v) == 0:
+        return False                                  # scalars, colour names, RGB(A) tuples
+    return len(v) == n
+
+
+def _select_kw(kw: dict, n: int, mask: np.ndarray) -> dict:
+    """scatter_kw with per-point arrays reduced to the points in mask."""
+    return {k: (np.asarray(v)[mask] if _per_point(v, n) else v) for k, v in kw.items()}
+
+
+def _edges(v: np.ndarray, n: int, lim: Optional[Tuple[float, float]], log: bool) -> np.ndarray:
+    """n + 1 bin edges over lim (default: data range); geometric on a log axis."""
+    if log:
+        v = v[v > 0]
+    lo, hi = (float(v.min()), float(v.max())) if lim is None else map(float, lim)
+    if hi <= lo:
+        hi = lo + (abs(lo) or 1.0) * 1e-6
+    return np.geomspace(lo, hi, n + 1) if log else np.linspace(lo, hi, n + 1)
+
+
+def _counts(x, y, xe, ye, xlog: bool, ylog: bool):
+    """(ny, nx) counts and the flat bin of every point (-1 outside)."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ix = bin_index(np.log10(x) if xlog else x, np.log10(xe) if xlog else xe)
+        iy = bin_index(np.log10(y) if ylog else y, np.log10(ye) if ylog else ye)
+    nx, ny = xe.size - 1, ye.size - 1
+    flat = np.where((ix >= 0) & (iy >= 0), iy * nx + ix, -1)
+    H = np.bincount(flat[flat >= 0], minlength=nx * ny).reshape(ny, nx)
+    return H, flat
+
+
+def dense_scatter(ax, x, y, *,
+                  mode: str = "auto",
+                  max_points: int = MAX_VECTOR_POINTS,
+                  bins: Union[int, Sequence[int]] = DENSITY_BINS,
+                  extent: Optional[Tuple[float, float, float, float]] = None,
+                  min_count: int = DENSITY_MIN_COUNT,
+                  cmap=None,
+                  norm=None,
+                  mesh_alpha: Optional[float] = None,
+                  **scatter_kw) -> DenseScatter:
+    """
+    Scatter x, y on ax; rasterized or binned when there are many points.
+
+    mode       : "auto" (vector up to max_points, rasterized above),
+                 "points" (always vector), "raster", "density"
+    bins       : density mode, n or (nx, ny) bins over extent
+    extent     : density mode, (x0, x1, y0, y1); default the data range.
+                 Set a log scale on ax first to get geometric bins.
+    min_count  : density mode, bins with fewer points are drawn as points
+    cmap, norm : density mode colours (default image.cmap, LogNorm)
+    scatter_kw : passed to ax.scatter (s, alpha, color, linewidths, ...);
+                 per-point arrays (c=, s=, ...) follow the points that are
+                 drawn (non-finite x / y dropped, density-mode outliers)
+    """
+    if mode not in MODES:
+        raise ValueError(f"Unknown mode '{mode}'. Use one of {list(MODES)}.")
+    n_in = np.size(x)
+    x, y, ok = _finite_xy(x, y)
+    n = x.size
+    if not ok.all():
+        scatter_kw = _select_kw(scatter_kw, n_in, ok)
+    if mode == "auto":
+        mode = "points" if n <= max_points else "raster"
+
+    if mode != "density":
+        pts = ax.scatter(x, y, rasterized=(mode == "raster"), **scatter_kw)
+        return DenseScatter(mode, n, points=pts)
+
+    from matplotlib.colors import LogNorm
+
+    nx, ny = (bins, bins) if np.isscalar(bins) else bins
+    xlog, ylog = ax.get_xscale() == "log", ax.get_yscale() == "log"
+    xe = _edges(x, int(nx), None if extent is None else extent[:2], xlog)
+    ye = _edges(y, int(ny), None if extent is None else extent[2:], ylog)
+    H, flat = _counts(x, y, xe, ye, xlog, ylog)
+
+    dense = H >= max(int(min_count), 1)
+    sparse = np.ones(n, dtype=bool)
+    inside = flat >= 0
+    sparse[inside] = ~dense.ravel()[flat[inside]]
+
+    mesh = None
+    if dense.any():
+        if norm is None:
+            norm = LogNorm(vmin=max(int(min_count), 1), vmax=max(int(H.max()), int(min_count) + 1))
+        mesh = ax.pcolormesh(xe, ye, np.ma.masked_where(~dense, H), cmap=cmap, norm=norm,
+                             alpha=mesh_alpha, shading="flat", rasterized=True)
+    pts = None
+    n_out = int(sparse.sum())
+    if n_out:
+        pts = ax.scatter(x[sparse], y[sparse], rasterized=n_out > max_points,
+                         **_select_kw(scatter_kw, n, sparse))
+    return DenseScatter("density", n, points=pts, mesh=mesh, n_outliers=n_out)
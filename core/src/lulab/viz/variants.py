@@ -0,0 +1,293 @@
+"""
+variants.py
+Render every (lang x theme) variant of a figure from one set of artists.
+
+Each figure exists in EN / RU and in the light / dark theme; producing a
+variant meant calling the plot function again: data prepared, artists
+created and laid out from scratch. Here the figure is built once (first
+lang, first theme) and each variant only
+- swaps the text of the artists whose string is a known translation
+  (labels, titles, legend entries) for the target language
+- maps every colour through a source -> target theme table: rcParams
+  colours (faces, edges, text, ticks, grid), the prop_cycle by position
+  and, with palette=True, the semantic colours of lulab.io.theme; alpha
+  is kept, colormapped collections / images are left alone
+- is saved under the target theme's rcParams (lulab.viz.export)
+Colours are always mapped from the values recorded at build time, so
+variants do not drift. The remaining per-variant cost is the draw itself.
+
+With cache=True each variant gets a lulab.io.figure_cache record; when
+every variant is up to date the plot function is not even called.
+
+Usage:
+    from lulab.viz.variants import render_variants
+
+    res = render_variants(plots.plot_feh_vs_teff, df, OUT, "FIG_003_feh_vs_teff",
+                          langs=("en", "ru"), themes=("light", "dark"))
+    # -> OUT/en/FIG_003_feh_vs_teff_light.png, OUT/ru/..._dark.png, ...
+"""
+
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence, Tuple
+
+import matplotlib as mpl
+import numpy as np
+from matplotlib.colors import to_rgba
+
+PATTERN: str = "{lang}/{name}_{theme}"
+
+# rcParams whose colours are mapped between themes (earlier keys win on clashes)
+THEME_COLOR_KEYS: Tuple[str, ...] = (
+    "figure.facecolor", "axes.facecolor", "axes.edgecolor", "axes.labelcolor",
+    "text.color", "xtick.color", "ytick.color", "grid.color",
+    "patch.edgecolor", "patch.facecolor", "lines.color",
+)
+_RC_SKIP: Tuple[str, ...] = ("backend", "interactive")
+
+Rgb = Tuple[float, float, float]
+
+
+@dataclass
+class VariantResult:
+    lang: str
+    theme: str
+    seconds: float
+    paths: List[Path] = field(default_factory=list)
+    cached: bool = False
+
+
+# -------------------------
+# Themes as rcParams
+# -------------------------
+_THEME_RC: Dict[str, Dict[str, Any]] = {}
+
+
+def theme_rc(theme: str) -> Dict[str, Any]:
+    """rcParams apply_theme(theme) would set, without touching the global state."""
+    if theme not in _THEME_RC:
+        from lulab.io.theme import apply_theme
+
+        with mpl.rc_context():
+            apply_theme(theme)
+            _THEME_RC[theme] = {k: v for k, v in mpl.rcParams.items()
+                                if not k.startswith(_RC_SKIP)}
+    return _THEME_RC[theme]
+
+
+def _key(c) -> Optional[Rgb]:
+    try:
+        r, g, b, _ = to_rgba(c)
+    except (ValueError, TypeError):
+        return None
+    return round(r, 4), round(g, 4), round(b, 4)
+
+
+def color_map(src: str, dst: str, *, palette: bool = False) -> Dict[Rgb, Rgb]:
+    """RGB in theme src -> RGB in theme dst (identity for src == dst)."""
+    if src == dst:
+        return {}
+    a, b = theme_rc(src), theme_rc(dst)
+    pairs: List[Tuple[Any, Any]] = [(a[k], b[k]) for k in THEME_COLOR_KEYS]
+    if palette:
+        from lulab.io.theme import get_colors
+
+        pa, pb = get_colors(src), get_colors(dst)
+        pairs += [(pa[k], pb[k]) for k in pa if k in pb]
+    ca = a["axes.prop_cycle"].by_key().get("color", [])
+    cb = b["axes.prop_cycle"].by_key().get("color", [])
+    pairs += list(zip(ca, cb))
+
+    # "C0"-style rc values refer to each theme's own cycle
+    with mpl.rc_context(a):
+        ka_ = [_key(x) for x, _ in pairs]
+    with mpl.rc_context(b):
+        kb_ = [_key(y) for _, y in pairs]
+    out: Dict[Rgb, Rgb] = {}
+    for ka, kb in zip(ka_, kb_):
+        if ka is not None and kb is not None:
+            out.setdefault(ka, kb)
+    return out
+
+
+def _resolved(c):
+    """RGBA for a concrete colour; 'none' / 'auto' / None as given."""
+    if c is None or (isinstance(c, str) and c.lower() in ("none", "auto", "inherit")):
+        return c
+    try:
+        return to_rgba(c)
+    except (ValueError, TypeError):
+        return c
+
+
+def _map_rgba(c, cmap: Dict[Rgb, Rgb]):
+    """One colour through cmap; alpha kept (RGB when opaque, so artist alpha still applies)."""
+    k = _key(c) if isinstance(c, tuple) else None
+    if k is None:
+        return c
+    rgb = cmap.get(k, tuple(c[:3]))
+    return rgb if c[3] == 1 else (*rgb, c[3])
+
+
+def _map_array(colors: np.ndarray, cmap: Dict[Rgb, Rgb]) -> np.ndarray:
+    colors = np.asarray(colors, dtype=float)
+    if not cmap or colors.size == 0:
+        return colors
+    uniq, inv = np.unique(np.round(colors[:, :3], 4), axis=0, return_inverse=True)
+    inv = inv.ravel()
+    hit = np.array([tuple(u) in cmap for u in uniq.tolist()])
+    new = np.array([cmap.get(tuple(u), tuple(u)) for u in uniq.tolist()])
+    out = colors.copy()
+    out[:, :3] = np.where(hit[inv, None], new[inv], colors[:, :3])
+    return out
+
+
+# -------------------------
+# What a variant changes
+# -------------------------
+@dataclass
+class _Slots:
+    """Text artists to translate and colour properties recorded at build time."""
+
+    texts: List[Tuple[Any, str]]                              # (Text, key)
+    colors: List[Tuple[Callable[[Any], Any], Any, bool]]      # (setter, value, is_array)
+    axes: List[Tuple[Any, Dict[str, Any]]]                    # (Axes, tick colours)
+
+
+def _record(fig, strings: Mapping[str, str]) -> _Slots:
+    from matplotlib.collections import Collection
+    from matplotlib.lines import Line2D
+    from matplotlib.patches import Patch
+    from matplotlib.text import Text
+
+    reverse = {v: k for k, v in strings.items()}
+    texts, colors = [], []
+    for a in fig.findobj():
+        if isinstance(a, Text):
+            if a.get_text() in reverse:
+                texts.append((a, reverse[a.get_text()]))
+            colors.append((a.set_color, _resolved(a.get_color()), False))
+        elif isinstance(a, Line2D):
+            colors += [(a.set_color, _resolved(a.get_color()), False),
+                       (a.set_markerfacecolor, _resolved(a.get_markerfacecolor()), False),
+                       (a.set_markeredgecolor, _resolved(a.get_markeredgecolor()), False)]
+        elif isinstance(a, Patch):
+            colors += [(a.set_facecolor, _resolved(a.get_facecolor()), False),
+                       (a.set_edgecolor, _resolved(a.get_edgecolor()), False)]
+        elif isinstance(a, Collection):
+            if a.get_array() is None:                         # colormapped: data, not theme
+                colors.append((a.set_facecolor, np.array(a.get_facecolor()), True))
+            colors.append((a.set_edgecolor, np.array(a.get_edgecolor()), True))
+
+    axes = []
+    for ax in fig.axes:
+        ticks = {}
+        for name in ("x", "y"):
+            kw = getattr(ax, f"{name}axis")._major_tick_kw
+            ticks[name] = {k: _resolved(kw[k]) for k in ("color", "labelcolor", "grid_color")
+                           if k in kw}
+        axes.append((ax, ticks))
+    return _Slots(texts, colors, axes)
+
+
+def _apply(slots: _Slots, lang: str, cmap: Dict[Rgb, Rgb],
+           text: Callable[[str, str], str], rc: Mapping[str, Any]) -> None:
+    for artist, key in slots.texts:
+        artist.set_text(text(lang, key))
+    for setter, value, is_array in slots.colors:
+        setter(_map_array(value, cmap) if is_array else _map_rgba(value, cmap))
+    # ticks are re-created lazily from the axis' tick keywords
+    for ax, ticks in slots.axes:
+        for name, kw in ticks.items():
+            color = kw.get("color", _resolved(rc[f"{name}tick.color"]))
+            label = kw.get("labelcolor", color)
+            grid = kw.get("grid_color", _resolved(rc["grid.color"]))
+            ax.tick_params(axis=name, which="both", color=_map_rgba(color, cmap),
+                           labelcolor=_map_rgba(label, cmap), grid_color=_map_rgba(grid, cmap))
+
+
+# -------------------------
+# Driver
+# -------------------------
+def render_variants(fn: Callable[..., Tuple[Any, Any]], data: Any, out_dir: Path, name: str, *,
+                    langs: Sequence[str] = ("en", "ru"),
+                    themes: Sequence[str] = ("light", "dark"),
+                    formats: Sequence[str] = ("pdf", "png"),
+                    dpi: int = 200,
+                    pattern: str = PATTERN,
+                    translations: Optional[Mapping[str, Mapping[str, str]]] = None,
+                    text: Optional[Callable[[str, str], str]] = None,
+                    palette: bool = False,
+                    cache: bool = True,
+                    force: bool = False,
+                    data_key: Any = None) -> List[VariantResult]:
+    """
+    fn(data, lang=langs[0]) once, then one output per (lang, theme).
+
+    translations : {lang: {key: string}} used to find the translatable
+                   texts; default lulab.viz.plots.TRANSLATIONS.
+    text         : (lang, key) -> string for the target language; default
+                   a lookup in translations (use lulab.i18n.plot_text for
+                   topic YAML labels).
+    palette      : also map the semantic colours (get_colors) between themes.
+    Outputs go to out_dir / pattern.format(lang=, theme=, name=) + suffix.
+    """
+    import matplotlib.pyplot as plt
+
+    from lulab.viz.export import save_figure
+
+    if translations is None:
+        from lulab.viz.plots import TRANSLATIONS as translations
+    if text is None:
+        def text(lang: str, key: str) -> str:
+            return translations.get(lang, {}).get(key, key)
+
+    out_dir = Path(out_dir)
+    src_lang, src_theme = langs[0], themes[0]
+    todo: List[Tuple[str, str, Path, Optional[Tuple[str, dict]]]] = []
+    results: Dict[Tuple[str, str], VariantResult] = {}
+
+    t0 = time.perf_counter()
+    if cache:
+        from lulab.io.cache import digest
+        from lulab.io.figure_cache import is_fresh, render_key
+
+        data_key = digest(data) if data_key is None else data_key
+    for lang in langs:
+        for theme in themes:
+            outbase = out_dir / pattern.format(lang=lang, theme=theme, name=name)
+            rec = None
+            if cache:
+                with mpl.rc_context(theme_rc(theme)):
+                    rec = render_key(fn, data_key, lang=lang, formats=formats, dpi=dpi,
+                                     theme=theme, extra="variant")
+                if not force and is_fresh(outbase, rec[0]):
+                    results[lang, theme] = VariantResult(
+                        lang, theme, 0.0, [outbase.with_suffix(f".{f}") for f in formats], True)
+                    continue
+            todo.append((lang, theme, outbase, rec))
+    if not todo:
+        return [results[lang, theme] for lang in langs for theme in themes]
+
+    with mpl.rc_context(theme_rc(src_theme)):
+        fig, _ = fn(data, lang=src_lang)
+    try:
+        with mpl.rc_context(theme_rc(src_theme)):
+            slots = _record(fig, translations.get(src_lang, {}))
+        build = time.perf_counter() - t0
+        for lang, theme, outbase, rec in todo:
+            t1 = time.perf_counter()
+            _apply(slots, lang, color_map(src_theme, theme, palette=palette), text, theme_rc(src_theme))
+            with mpl.rc_context(theme_rc(theme)):
+                paths = save_figure(fig, outbase, formats=tuple(formats), dpi=dpi)
+            if rec is not None:
+                from lulab.io.figure_cache import write_record
+                write_record(outbase, rec[0], rec[1], paths)
+            results[lang, theme] = VariantResult(lang, theme, time.perf_counter() - t1, list(paths))
+        results[todo[0][0], todo[0][1]].seconds += build      # the build is paid once
+    finally:
+        plt.close(fig)
+    return [results[lang, theme] for lang in langs for theme in themes]
@@ -0,0 +1,176 @@
+import io
+import random
+import sys
+import textwrap
+
+import matplotlib
+
+matplotlib.use("Agg")
+
+import matplotlib.pyplot as plt  # noqa: E402
+import numpy as np  # noqa: E402
+import pytest  # noqa: E402
+from matplotlib.animation import FuncAnimation, PillowWriter  # noqa: E402
+from PIL import Image, ImageSequence  # noqa: E402
+
+from lulab.anim import parallel  # noqa: E402
+from lulab.anim.blit import BlitAnimation  # noqa: E402
+from lulab.anim.parallel import SegmentedAnimation, frame_rng, save_segmented  # noqa: E402
+from lulab.anim.pipe import RawPipeWriter  # noqa: E402
+
+N_FRAMES = 12
+
+
+def make():
+    fig, ax = plt.subplots(figsize=(3, 2.2), dpi=80)
+    ax.set_xlim(0, 1)
+    ax.set_ylim(-3, 3)
+    ax.grid(True)
+    ax.set_title("title")
+    x = np.linspace(0, 1, 200)
+    (ln,) = ax.plot([], [], lw=2)
+    sc = ax.scatter([], [], s=5)
+
+    def update(frame):
+        ln.set_data(x, np.sin(2 * np.pi * (x + frame / N_FRAMES)))
+        pts = frame_rng(frame).normal(size=(40, 2))
+        pts[:, 0] = np.abs(pts[:, 0]) % 1
+        sc.set_offsets(pts)
+        return ln, sc
+
+    return fig, update
+
+
+def full_redraws():
+    fig, update = make()
+    out = []
+    for f in range(N_FRAMES):
+        update(f)
+        fig.canvas.draw()
+        out.append(np.asarray(fig.canvas.buffer_rgba()).astype(int))
+    plt.close(fig)
+    return out
+
+
+def gif_frames(path):
+    with Image.open(path) as im:
+        return [np.asarray(f.convert("RGB")).astype(int) for f in ImageSequence.Iterator(im)]
+
+
+def test_blit_matches_full_redraw():
+    ref = full_redraws()
+    fig, update = make()
+    got = [f.astype(int) for f in BlitAnimation(fig, update, N_FRAMES).iter_frames(fig.dpi)]
+    plt.close(fig)
+    assert len(got) == len(ref)
+    assert max(np.abs(a - b).max() for a, b in zip(got, ref)) <= 3
+
+
+def test_from_func_animation_reports_missing_internals():
+    fig, update = make()
+    anim = FuncAnimation(fig, update, frames=N_FRAMES)
+    assert len(list(BlitAnimation.from_func_animation(anim).iter_frames())) == N_FRAMES
+    del anim._save_count
+    with pytest.raises(TypeError):
+        BlitAnimation.from_func_animation(anim)
+    plt.close(fig)
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_segmented_gif_matches_serial(tmp_path, workers):
+    fig, update = make()
+    FuncAnimation(fig, update, frames=N_FRAMES).save(tmp_path / "serial.gif",
+                                                     writer=PillowWriter(fps=10), dpi=80)
+    plt.close(fig)
+    out = save_segmented(SegmentedAnimation(make, N_FRAMES), tmp_path / "seg.gif",
+                         fmt="gif", fps=10, dpi=80, workers=workers, verbose=False)
+    a, b = gif_frames(tmp_path / "serial.gif"), gif_frames(out)
+    assert len(a) == len(b) == N_FRAMES
+    assert all(np.array_equal(x, y) for x, y in zip(a, b))
+
+
+def test_in_process_keeps_backend_and_rng(tmp_path):
+    backend = matplotlib.get_backend()
+    np.random.seed(7)
+    random.seed(7)
+    expect = (np.random.rand(), random.random())
+    np.random.seed(7)
+    random.seed(7)
+    save_segmented(SegmentedAnimation(make, 3), tmp_path / "x.gif", fmt="gif", fps=10, dpi=40,
+                   workers=1, verbose=False)
+    assert (np.random.rand(), random.random()) == expect
+    assert matplotlib.get_backend() == backend
+    assert not parallel._SPEC
+
+
+@pytest.mark.parametrize("platform, method", [("linux", "fork"), ("darwin", "spawn"),
+                                              ("win32", "spawn")])
+def test_fork_only_on_linux(monkeypatch, platform, method):
+    monkeypatch.setattr(parallel.sys, "platform", platform)
+    assert parallel._start_method() == method
+
+
+def test_split_frames_covers_range():
+    segs = parallel.split_frames(10, 4)
+    assert segs[0][0] == 0 and segs[-1][1] == 10
+    assert all(a[1] == b[0] for a, b in zip(segs, segs[1:]))
+
+
+# -------------------------
+# MP4 through a stand-in ffmpeg
+# -------------------------
+@pytest.fixture
+def stub_ffmpeg(tmp_path, monkeypatch):
+    """ffmpeg_path stand-in: stores the raw rgba stream; concat joins the parts."""
+    exe = tmp_path / "ffmpeg"
+    exe.write_text(f"#!{sys.executable}\n" + textwrap.dedent("""
+        import sys
+        args = sys.argv[1:]
+        with open(args[-1], "wb") as out:
+            if "concat" in args:
+                for line in open(args[args.index("-i") + 1]):
+                    out.write(open(line.strip()[len("file '"):-1], "rb").read())
+            else:
+                out.write(sys.stdin.buffer.read())
+    """))
+    exe.chmod(0o755)
+    monkeypatch.setitem(matplotlib.rcParams, "animation.ffmpeg_path", str(exe))
+
+
+def savefig_frames(n=N_FRAMES, dpi=80):
+    fig, update = make()
+    out = []
+    for f in range(n):
+        update(f)
+        buf = io.BytesIO()
+        fig.savefig(buf, format="rgba", dpi=dpi)
+        out.append(buf.getvalue())
+    plt.close(fig)
+    return b"".join(out)
+
+
+def test_pipe_writer_streams_savefig_pixels(stub_ffmpeg, tmp_path):
+    fig, update = make()
+    FuncAnimation(fig, update, frames=N_FRAMES).save(tmp_path / "a.mp4", dpi=80,
+                                                     writer=RawPipeWriter(fps=10, queue_size=2))
+    plt.close(fig)
+    assert (tmp_path / "a.mp4").read_bytes() == savefig_frames()
+
+
+def test_pipe_writer_takes_blitted_frames(stub_ffmpeg, tmp_path):
+    fig, update = make()
+    BlitAnimation(fig, update, N_FRAMES).save(tmp_path / "b.mp4", writer=RawPipeWriter(fps=10),
+                                              dpi=80)
+    plt.close(fig)
+    fig, update = make()
+    ref = b"".join(f.tobytes() for f in BlitAnimation(fig, update, N_FRAMES).iter_frames(80))
+    plt.close(fig)
+    assert (tmp_path / "b.mp4").read_bytes() == ref
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_segmented_mp4_concatenates_in_order(stub_ffmpeg, tmp_path, workers):
+    out = save_segmented(SegmentedAnimation(make, N_FRAMES), tmp_path / "c.mp4", fmt="mp4",
+                         fps=10, dpi=80, workers=workers, verbose=False)
+    assert out.read_bytes() == savefig_frames()
+
@@ -0,0 +1,27 @@
+import numpy as np
+import pytest
+
+from lulab.coords.galactic import galactocentric_rz, icrs_to_galactic, validate_against_astropy
+
+
+def test_matches_astropy():
+    pytest.importorskip("astropy")
+    err = validate_against_astropy(2_000, seed=1)
+    assert err["lb_mas"] < 1e-3
+    assert err["xyz_pc"] < 1e-6
+
+
+def test_float32_stays_float32():
+    ra = np.array([10.0, 200.0], dtype=np.float32)
+    dec = np.array([-30.0, 45.0], dtype=np.float32)
+    l, b = icrs_to_galactic(ra, dec)
+    assert l.dtype == np.float32 and b.dtype == np.float32
+    R, z = galactocentric_rz(ra, dec, np.float32([1.0, 2.0]))
+    assert R.dtype == np.float32
+
+
+def test_galactic_centre_direction():
+    # Sgr A* lies at l ~ 359.94, b ~ -0.05
+    l, b = icrs_to_galactic([266.41683], [-29.00781])
+    assert abs(((l[0] + 180) % 360) - 180 + 0.056) < 0.01
+    assert abs(b[0] + 0.046) < 0.01
@@ -0,0 +1,118 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from lulab.gce.gradients import _gaia_int, join_ages_positions
+from lulab.gce.models import get_model
+from lulab.gce.propagate import accumulate_hist, propagate_rbirth, row_quantiles
+from lulab.gce.service import Sample, WhatIfService
+from lulab.gce.sweep import sweep_rbirth
+
+
+@pytest.fixture
+def rng():
+    return np.random.default_rng(0)
+
+
+# -------------------------
+# propagate
+# -------------------------
+def test_row_quantiles_matches_numpy(rng):
+    a = rng.normal(size=(50, 101))
+    q = (0.16, 0.5, 0.84)
+    np.testing.assert_allclose(row_quantiles(a, q), np.quantile(a, q, axis=1).T)
+
+
+def test_accumulate_hist_matches_histogram(rng):
+    v = rng.normal(0, 3, (40, 30))
+    v[0, :3] = [np.nan, -10.0, 2.0]                     # NaN, underflow, right edge
+    slot = rng.integers(0, 2, (40, 1))
+    hist = np.zeros((2, 16), dtype=np.int64)
+    accumulate_hist(hist, v, slot, -2.0, 2.0)
+    for k in range(2):
+        rows = v[slot[:, 0] == k]
+        ref, _ = np.histogram(rows[np.isfinite(rows)], bins=16, range=(-2.0, 2.0))
+        np.testing.assert_array_equal(hist[k], ref)
+
+
+def test_propagate_rbirth_same_for_any_n_jobs(rng):
+    n = 300
+    age, feh = rng.uniform(1, 10, n), rng.normal(0, 0.2, n)
+    age[5] = np.nan
+    kw = dict(age_err=0.5, feh_err=0.05, n_draws=200, groups=rng.integers(0, 2, n),
+              seed=3, chunk_elems=10_000)
+    model = get_model("minchev")
+    a = propagate_rbirth(model, age, feh, **kw)
+    b = propagate_rbirth(model, age, feh, n_jobs=4, **kw)
+    np.testing.assert_array_equal(a.quantiles, b.quantiles)
+    np.testing.assert_array_equal(a.hist, b.hist)
+    ok = np.arange(n) != 5
+    assert np.isnan(a.median[5]) and np.isfinite(a.median[ok]).all()
+    assert (a.p16[ok] <= a.median[ok]).all() and (a.median[ok] <= a.p84[ok]).all()
+    assert a.hist.sum() <= n - 1 + 1e-9
+
+
+# -------------------------
+# sweep
+# -------------------------
+def test_sweep_rejects_empty_grid():
+    with pytest.raises(ValueError):
+        sweep_rbirth([1.0, 2.0], [0.0, 0.1], {}, cache=False)
+    cube = sweep_rbirth([1.0, 2.0], [0.0, 0.1], {"grad_today": [-0.07, -0.05]}, cache=False)
+    assert cube.hist.shape[0] == 2
+
+
+# -------------------------
+# gradients
+# -------------------------
+def test_gaia_ids_keep_all_19_digits():
+    ids = pd.Series(["4295806720123456789", " 4295806720123456788 ", np.nan, None])
+    assert _gaia_int(ids).tolist()[:2] == [4295806720123456789, 4295806720123456788]
+    assert _gaia_int(ids).isna().tolist() == [False, False, True, True]
+    ints = pd.Series([4295806720123456789, 4295806720123456788])
+    assert _gaia_int(ints).tolist() == ints.tolist()
+
+
+@pytest.mark.parametrize("ids", [pd.Series([4342806982510019456.0, np.nan]),
+                                 pd.Series(["Gaia DR3 4342806982510019456"]),
+                                 pd.Series(["4.342806982510019e+18"]),
+                                 pd.Series(["x", "4342806982510019456"])])
+def test_gaia_ids_reject_lossy_or_unparsed_values(ids):
+    with pytest.raises(ValueError):
+        _gaia_int(ids)
+
+
+def test_join_does_not_merge_neighbouring_ids():
+    ages = pd.DataFrame({"gaia_id": ["4295806720123456789", "4295806720123456788", None],
+                         "age": [1.0, 2.0, 3.0]})
+    ism = pd.DataFrame({"gaia_id": [4295806720123456789, 4295806720123456788],
+                        "R_gal": [8.0, 9.0], "feh": [0.1, 0.2]})
+    out = join_ages_positions(ages, ism).sort_values("age")
+    assert out["R_gal"].tolist() == [8.0, 9.0]
+
+
+# -------------------------
+# service
+# -------------------------
+@pytest.fixture
+def service():
+    rng = np.random.default_rng(0)
+    n = 500
+    return WhatIfService({"sweetcat": Sample(rng.uniform(0, 10, n), rng.normal(0, 0.2, n),
+                                             rng.integers(0, 2, n))})
+
+
+@pytest.mark.parametrize("req", [{"range": "5"}, {"range": "0,nan"}, {"grad_today": "nan"},
+                                 {"age_max": "inf"}, {"bins": 0},
+                                 {"bins": float("inf")}, {"bins": "1e400"}])
+def test_service_rejects_bad_requests(service, req):
+    with pytest.raises(ValueError):
+        service.rbirth(req)
+
+
+def test_service_caches_and_stays_finite(service):
+    a = service.rbirth({"grad_today": -0.07})
+    b = service.rbirth({"grad_today": "-0.07"})
+    assert not a["cached"] and b["cached"]
+    flat = service.rbirth({"grad_today": 0.0, "grad_early": 0.0})
+    assert flat["median"] == {"single": None, "host": None}
@@ -0,0 +1,23 @@
+import lulab
+from lulab.io.figure_cache import render_key
+
+
+def _plot(df, lang="en"):
+    return None, None
+
+
+def _key():
+    return render_key(_plot, "data", lang="en", formats=("png",), dpi=100)[0]
+
+
+def test_render_key_follows_lulab_sources(tmp_path, monkeypatch):
+    pkg = tmp_path / "lulab"
+    (pkg / "viz").mkdir(parents=True)
+    (pkg / "__init__.py").write_text("")
+    scatter = pkg / "viz" / "scatter.py"
+    scatter.write_text("MAX_VECTOR_POINTS = 5000\n")
+    monkeypatch.setattr(lulab, "__file__", str(pkg / "__init__.py"))
+    k0 = _key()
+    assert _key() == k0
+    scatter.write_text("MAX_VECTOR_POINTS = 20000\n")
+    assert _key() != k0
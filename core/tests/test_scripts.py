@@ -0,0 +1,41 @@
+import importlib.util
+import sys
+from pathlib import Path
+
+import pytest
+
+SCRIPT = (Path(__file__).resolve().parents[2] / "topics" / "TOP_0001_exoplanet_birth_radius"
+          / "scripts" / "build_figures.py")
+
+
+@pytest.fixture
+def build_script(monkeypatch):
+    if not SCRIPT.exists():
+        pytest.skip("topic scripts not in this checkout")
+    spec = importlib.util.spec_from_file_location("build_figures_script", SCRIPT)
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    calls = {}
+
+    def fake_build(plan, langs, out, **kw):
+        calls["build"] = (plan, tuple(langs), kw)
+        return []
+
+    def fake_optimize(paths, **kw):
+        calls["optimize"] = (paths, kw)
+        return []
+
+    monkeypatch.setattr(mod, "build_figures", fake_build)
+    monkeypatch.setattr("lulab.io.png_opt.optimize_pngs", fake_optimize)
+    return mod, calls
+
+
+@pytest.mark.parametrize("extra", [[], ["--optimize-png"]])
+def test_build_figures_main_parses_and_runs(build_script, monkeypatch, extra):
+    mod, calls = build_script
+    monkeypatch.setattr(sys, "argv", ["build_figures.py", "--workers", "1", "--only", "FIG_001",
+                                      "--lang", "en", *extra])
+    mod.main()
+    plan, langs, kw = calls["build"]
+    assert [n for n, _ in plan] == ["FIG_001_feh_histogram"] and langs == ("en",)
+    assert ("optimize" in calls) == bool(extra)
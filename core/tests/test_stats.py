@@ -0,0 +1,94 @@
+import numpy as np
+import pytest
+
+from lulab.stats.density import DensityCube, histogram_nd
+from lulab.stats.fit import polyfit_groups, polyfit_rows
+from lulab.stats.kde import kde, modes
+
+
+@pytest.fixture
+def rng():
+    return np.random.default_rng(42)
+
+
+# -------------------------
+# density
+# -------------------------
+def test_histogram_nd_matches_histogramdd(rng):
+    cols = [rng.normal(size=50_000), rng.uniform(-1, 2, 50_000), rng.normal(size=50_000)]
+    cols[0][:10] = np.nan
+    edges = [np.linspace(-2, 2, 21), np.linspace(-1, 2, 16), np.linspace(-3, 3, 7)]
+    cols[1][10:20] = 2.0                                # right edge lands in the last bin
+    ref, _ = np.histogramdd(np.column_stack(cols), bins=edges)
+    np.testing.assert_array_equal(histogram_nd(cols, edges, chunk_rows=7_000), ref)
+
+    w = rng.uniform(size=50_000)
+    ref_w, _ = np.histogramdd(np.column_stack(cols), bins=edges, weights=w)
+    np.testing.assert_allclose(histogram_nd(cols, edges, weights=w), ref_w)
+
+
+def test_density_cube_rebin(rng):
+    edges = (np.linspace(0, 10, 11), np.linspace(-1, 1, 5))
+    cube = DensityCube(("R_gal", "feh"), edges, rng.integers(0, 9, (10, 4)).astype(float))
+    r = cube.rebin(R_gal=3)
+    np.testing.assert_array_equal(r.edges[0], [0, 3, 6, 9])
+    np.testing.assert_array_equal(r.counts, cube.counts[:9].reshape(3, 3, 4).sum(axis=1))
+    for f in (0, -2, 0.5):
+        with pytest.raises(ValueError):
+            cube.rebin(R_gal=f)
+
+
+# -------------------------
+# kde
+# -------------------------
+def test_kde_matches_gaussian_kde(rng):
+    stats = pytest.importorskip("scipy.stats")
+    x = np.concatenate([rng.normal(4, 1.0, 3_000), rng.normal(9, 1.5, 2_000)])
+    grid = np.linspace(-2, 16, 1_024)
+    ref = stats.gaussian_kde(x)(grid)                   # Scott's rule, as the default
+    got = kde(x, grid).density
+    assert np.abs(got - ref).max() < 1e-3 * ref.max()
+
+
+def test_kde_bounded_mode_at_edge(rng):
+    x = np.abs(rng.exponential(2.0, 5_000))
+    grid = np.linspace(0, 15, 301)
+    res = kde(x, grid, bounds=(0.0, None))
+    assert res.mode == grid[0]
+    np.testing.assert_allclose(np.trapezoid(res.density, grid), 1.0, atol=1e-2)
+
+
+def test_modes_refines_interior_peak():
+    x = np.linspace(0, 10, 101)
+    y = np.exp(-(x - 3.33) ** 2)
+    assert abs(modes(y, x) - 3.33) < 0.01
+
+
+@pytest.mark.parametrize("centre", [2.8, 3.05, 3.33])
+def test_modes_on_non_uniform_grid(centre):
+    x = np.concatenate([np.linspace(0, 3, 7), np.linspace(3.1, 10, 40)])
+    assert abs(modes(-(x - centre) ** 2, x) - centre) < 1e-9
+
+
+# -------------------------
+# fit
+# -------------------------
+@pytest.mark.parametrize("deg", [1, 2, 3])
+def test_polyfit_rows_matches_numpy(rng, deg):
+    x = rng.uniform(4, 15, 300)
+    Y = 0.3 - 0.07 * x + rng.normal(0, 0.1, (5, x.size))
+    w = rng.uniform(0.5, 2.0, (5, x.size))
+    fit = polyfit_rows(x, Y, deg, weights=w)
+    for s in range(Y.shape[0]):
+        ref = np.polyfit(x, Y[s], deg, w=np.sqrt(w[s]))
+        np.testing.assert_allclose(fit.coef[s], ref, rtol=1e-8, atol=1e-10)
+
+
+def test_polyfit_groups_matches_rows(rng):
+    x = rng.uniform(4, 15, 2_000)
+    g = rng.integers(0, 4, x.size)
+    y = -0.06 * x + 0.01 * g + rng.normal(0, 0.1, x.size)
+    fit = polyfit_groups(x, y, g, 4)
+    for k in range(4):
+        ref = np.polyfit(x[g == k], y[g == k], 1)
+        np.testing.assert_allclose(fit.coef[k], ref, rtol=1e-8, atol=1e-10)
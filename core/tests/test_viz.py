@@ -0,0 +1,94 @@
+import io
+
+import matplotlib
+
+matplotlib.use("Agg")
+
+import matplotlib.pyplot as plt  # noqa: E402
+import numpy as np  # noqa: E402
+import pytest  # noqa: E402
+from PIL import Image  # noqa: E402
+
+from lulab.viz import builder  # noqa: E402
+from lulab.viz.export import save_figure  # noqa: E402
+from lulab.viz.scatter import dense_scatter  # noqa: E402
+
+
+@pytest.fixture
+def ax():
+    fig, ax = plt.subplots()
+    yield ax
+    plt.close(fig)
+
+
+@pytest.mark.parametrize("mode", ["auto", "points", "raster", "density"])
+def test_dense_scatter_filters_per_point_kwargs(ax, mode):
+    rng = np.random.default_rng(0)
+    x, y = rng.normal(size=20_000), rng.normal(size=20_000)
+    x[3] = np.nan
+    c, s = rng.random(x.size), rng.random(x.size) * 4
+    out = dense_scatter(ax, x, y, mode=mode, c=c, s=s, color=None)
+    assert out.n_points == x.size - 1
+    assert len(out.points.get_array()) == len(out.points.get_offsets())
+
+
+def _figure(layout):
+    fig, axs = plt.subplots(2, 1, figsize=(4.5, 6.1), layout=layout)
+    rng = np.random.default_rng(0)
+    for a in axs:
+        fig.colorbar(a.imshow(rng.random((20, 20))), ax=a)
+        a.set_title("title")
+    fig.suptitle("Sup")
+    return fig
+
+
+@pytest.mark.parametrize("layout", [None, "constrained", "tight"])
+def test_export_png_has_savefig_size(tmp_path, layout):
+    fig = _figure(layout)
+    buf = io.BytesIO()
+    fig.savefig(buf, format="png", dpi=150, bbox_inches="tight")
+    plt.close(fig)
+
+    fig = _figure(layout)
+    engine = type(fig.get_layout_engine())
+    png, pdf = save_figure(fig, tmp_path / "fig", formats=("png", "pdf"), dpi=150)
+    assert Image.open(png).size == Image.open(buf).size
+    assert pdf.stat().st_size > 0
+    assert type(fig.get_layout_engine()) is engine       # restored after the vector pass
+    plt.close(fig)
+
+
+@pytest.mark.parametrize("rc", [{"savefig.facecolor": "red"}, {"savefig.transparent": True}])
+def test_export_follows_savefig_rcparams(tmp_path, rc):
+    with matplotlib.rc_context(rc):
+        fig = _figure(None)
+        buf = io.BytesIO()
+        fig.savefig(buf, format="png", dpi=80, bbox_inches="tight")
+        (png,) = save_figure(fig, tmp_path / "fig", formats=("png",), dpi=80)
+        plt.close(fig)
+    ref = np.asarray(Image.open(buf).convert("RGBA"))
+    got = np.asarray(Image.open(png).convert("RGBA"))
+    assert got.shape == ref.shape
+    np.testing.assert_array_equal(got[0, 0], ref[0, 0])
+
+
+def _plot(df, lang="en"):
+    fig, ax = plt.subplots(figsize=(2, 2))
+    ax.plot(df["x"], df["y"])
+    ax.set_title(lang)
+    return fig, ax
+
+
+def test_in_process_build_keeps_backend_and_releases_data(tmp_path):
+    backend = matplotlib.get_backend()
+    matplotlib.use("svg")
+    try:
+        res = builder.build_figures([("FIG_x", _plot)], ("en",), tmp_path,
+                                    loader=lambda: {"x": [0, 1], "y": [1, 0]},
+                                    formats=("png",), dpi=50, workers=1, cache=False,
+                                    verbose=False)
+        assert matplotlib.get_backend() == "svg"
+    finally:
+        matplotlib.use(backend)
+    assert res[0].ok and res[0].paths[0].exists()
+    assert not builder._DATA
@@ -1,40 +1,63 @@
+import argparse
+import time
 from pathlib import Path
 
 from lulab.io.loaders import load_topic_dataset
-from lulab.viz.export import save_figure
+from lulab.viz.builder import build_figures, timing_report
 from lulab.viz import plots
 
 
 TOPIC_DIR = Path(__file__).resolve().parents[1]
 OUT = TOPIC_DIR / "figures"
 
+LANGS = ("ru", "en")
 
-def build_set(df, lang: str):
-    out_lang = OUT / lang
-    out_lang.mkdir(parents=True, exist_ok=True)
-
-    plan = [
-        ("FIG_001_feh_histogram", plots.plot_feh_histogram),
-        ("FIG_002_feh_vs_distance", plots.plot_feh_vs_distance),
-        ("FIG_003_feh_vs_teff", plots.plot_feh_vs_teff),
-        ("FIG_004_feh_vs_logg", plots.plot_feh_vs_logg),
-        ("FIG_005_feh_vs_planet_mass", plots.plot_feh_vs_planet_mass),
-        ("FIG_006_feh_vs_planet_radius", plots.plot_feh_vs_planet_radius),
-        ("FIG_007_period_vs_mass", plots.plot_period_vs_mass),
-    ]
-
-    for name, fn in plan:
-        fig, ax = fn(df, lang=lang)
-        save_figure(fig, out_lang / name, formats=("pdf", "png"))
-        print(f"Saved [{lang}]: {name}")
+PLAN = [
+    ("FIG_001_feh_histogram", plots.plot_feh_histogram),
+    ("FIG_002_feh_vs_distance", plots.plot_feh_vs_distance),
+    ("FIG_003_feh_vs_teff", plots.plot_feh_vs_teff),
+    ("FIG_004_feh_vs_logg", plots.plot_feh_vs_logg),
+    ("FIG_005_feh_vs_planet_mass", plots.plot_feh_vs_planet_mass),
+    ("FIG_006_feh_vs_planet_radius", plots.plot_feh_vs_planet_radius),
+    ("FIG_007_period_vs_mass", plots.plot_period_vs_mass),
+]
 
 
 def main():
-    df = load_topic_dataset(TOPIC_DIR)
-    build_set(df, "ru")
-    build_set(df, "en")
+    ap = argparse.ArgumentParser(description="Build topic figures (parallel per figure x lang).")
+    ap.add_argument("--workers", type=int, default=None,
+                    help="worker processes (default: one per core; 1 = serial, in-process)")
+    ap.add_argument("--lang", action="append", default=None,
+                    help="language(s) to build (default: ru and en)")
+    ap.add_argument("--only", action="append", default=None,
+                    help="substring filter on figure names (repeatable)")
+    ap.add_argument("--force", action="store_true",
+                    help="re-render figures even if their inputs are unchanged")
+    ap.add_argument("--no-cache", action="store_true",
+                    help="always render and do not record render inputs")
+    ap.add_argument("--optimize-png", action="store_true",
+                    help="losslessly recompress the PNGs afterwards (lulab.io.png_opt)")
+    args = ap.parse_args()
+
+    plan = [(n, f) for n, f in PLAN if not args.only or any(s in n for s in args.only)]
+    t0 = time.perf_counter()
+    results = build_figures(plan, args.lang or LANGS, OUT,
+                            loader=load_topic_dataset, loader_args=(TOPIC_DIR,),
+                            formats=("pdf", "png"), workers=args.workers,
+                            cache=not args.no_cache, force=args.force)
+    print(timing_report(results, wall=time.perf_counter() - t0))
+
+    if args.optimize_png:
+        from lulab.io.png_opt import optimize_pngs, savings_report
+        print(savings_report(optimize_pngs([OUT], workers=args.workers)))
+
+    failed = [r for r in results if not r.ok]
+    for r in failed:
+        print(f"\n--- {r.name} [{r.lang}] ---\n{r.error}")
     print("Done. Figures in:", OUT)
+    if failed:
+        raise SystemExit(1)
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,30 @@
+from pathlib import Path
+
+from lulab.gce.gradients import build_gradient_table
+
+
+TOPIC_DIR = Path(__file__).resolve().parents[1]
+PROC = TOPIC_DIR / "data" / "processed"
+
+
+def build_gradients(force: bool = False):
+    """Boulet+2024 ages x APOGEE/Gaia R_gal -> per-age-slice [Fe/H] gradients."""
+    ages_csv = PROC / "boulet_apogee_ages.csv"
+    ism_csv = PROC / "apogee_gaia_fehr_R.csv"
+    out_csv = PROC / "boulet_apogee_gradients.csv"
+
+    missing = [p.name for p in (ages_csv, ism_csv) if not p.exists()]
+    if missing:
+        print("Skip gradients (missing inputs):", missing)
+        return None
+
+    return build_gradient_table(ages_csv, ism_csv, out_csv, force=force)
+
+
+def main():
+    build_gradients()
+    print("Done. Tables in:", PROC)
+
+
+if __name__ == "__main__":
+    main()